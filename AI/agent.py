@@ -5,14 +5,25 @@ Replaces the previous 7-agent supervisor pattern.
 """
 
 from langchain_core.messages import ToolMessage, SystemMessage
-from langgraph.prebuilt import create_react_agent
+from langchain_core.runnables import RunnableLambda
+from langgraph.prebuilt import ToolNode, create_react_agent
+from langgraph.prebuilt.chat_agent_executor import AgentState
+from langgraph.types import Command
 from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+from langgraph.config import get_config
+import asyncio
+import logging
 import os
-from core.llm_config import get_llm
+from typing import Annotated
+from core.llm_config import MAIN_MODEL, get_llm
+from core import prefetch, router, snapshots, tool_memo, tracing
 from tools.file_tools import read_file, list_directory, search_codebase
 from tools.knowledge_tools import search_knowledge_base
 from tools.cms_tools import query_cms_content
 from tools.navigation_tools import get_navigation_target
+from tools.symbol_tools import lookup_symbol
+
+logger = logging.getLogger(__name__)
 
 # ─── Dynamic File Map Builder ────────────────────────────────────────
 import glob as _glob
@@ -100,7 +111,18 @@ def _build_file_map():
     return "\n\n".join(sections)
 
 
-_FILE_MAP = _build_file_map()
+def _load_file_map():
+    """Build the file map, or load the master's snapshot in multi-worker mode."""
+    if snapshots.is_reader():
+        data, _ = snapshots.read_snapshot("file_map")
+        if data is not None:
+            return data["text"]
+    file_map = _build_file_map()
+    snapshots.write_snapshot("file_map", {"text": file_map})
+    return file_map
+
+
+_FILE_MAP = _load_file_map()
 
 # ─── System Prompt ───────────────────────────────────────────────────
 SYSTEM_PROMPT = f"""\
@@ -130,11 +152,13 @@ For architecture questions, use search_knowledge_base('architecture') to find Ma
 ═══════════════════════════════════════════════════════════════
 
 TOOL USAGE:
-1. ALWAYS use read_file() to read the actual source before answering code questions.
+1. ALWAYS use read_file() to read the actual source before answering code questions
+   (or lookup_symbol() when the question names one function, class, constant or variable).
    Do NOT guess at code — read the real file first.
 2. When asked to write NEW code, read existing files first to match conventions.
 3. For schema questions, read the Database Schema Summary.
-4. Use search_codebase() to find WHERE something is defined.
+4. Use lookup_symbol() to show a named definition or where a constant is set: it returns
+   just that code with its file and lines. Use search_codebase() to find where something is USED.
 5. Use search_knowledge_base() only for broad or ambiguous questions.
 6. You are READ-ONLY — present code in responses for the user to save manually.
 
@@ -157,9 +181,10 @@ FORMATTING AND TONE — FOLLOW STRICTLY:
 15. When listing items, prefer a compact table over verbose bullet points.
 16. ANSWER ONLY WHAT WAS ASKED. Do not volunteer unsolicited code reviews,
     audits, improvements, or checklists unless the user explicitly asks for them.
-17. When the user asks to SEE or SHOW code/templates/rules, return the file
-    content VERBATIM inside a fenced code block. Do not rewrite, improve, or
-    critique it. Just show the source with its file path.
+17. When the user asks to SEE or SHOW code/templates/rules, read the file with
+    read_file(path, raw=True) and return the content VERBATIM inside a fenced
+    code block. Do not rewrite, improve, or critique it. Just show the source
+    with its file path.
 18. If asked about Portal IDs, REST endpoints, web apps, feature services, or
     any system dependencies, ALWAYS use read_file('Documentation/System_Dependencies.md') FIRST.
 19. For questions about GP tools (Export, QA, Reconcile), how to use the web app,
@@ -198,11 +223,54 @@ ALL_TOOLS = [
     read_file,
     list_directory,
     search_codebase,
+    lookup_symbol,
     search_knowledge_base,
     query_cms_content,
     get_navigation_target,
 ]
 
+# Per-call ceiling; a timed-out call returns an error ToolMessage instead of stalling the turn
+TOOL_TIMEOUT_S = float(os.getenv("TOOL_TIMEOUT_S", "60"))
+
+
+class NG911AgentState(AgentState):
+    # Per-thread tool memo (core/tool_memo.py): key -> tool_call_id of the result's ToolMessage
+    tool_memo: Annotated[dict, tool_memo.merge_memo]
+
+
+async def _run_tool(request, execute):
+    """
+    ToolNode interceptor for every tool call:
+    - Serves repeats from the thread's tool memo when the source is unchanged
+      (recorded as a span with cached=True, no disk/Chroma/CMS access).
+    - Bounds real calls by TOOL_TIMEOUT_S. Sync tools run in a worker thread,
+      which cannot be killed — on timeout it finishes in the background, but
+      the turn moves on.
+    """
+    call = request.tool_call
+    key = tool_memo.memo_key(call["name"], call["args"])
+    state = request.state or {}
+    cached = tool_memo.lookup(state.get("tool_memo") or {}, key, state.get("messages") or [])
+    if cached is not None:
+        with tracing.span(call["name"], kind="tool", cached=True):
+            return ToolMessage(content=cached, name=call["name"], tool_call_id=call["id"])
+
+    try:
+        result = await asyncio.wait_for(execute(request), TOOL_TIMEOUT_S)
+    except asyncio.TimeoutError:
+        logger.warning(f"Tool '{call['name']}' timed out after {TOOL_TIMEOUT_S:g}s")
+        return ToolMessage(
+            content=f"Error: {call['name']} timed out after {TOOL_TIMEOUT_S:g} seconds. "
+                    "Try a narrower query or a different tool.",
+            name=call["name"],
+            tool_call_id=call["id"],
+            status="error",
+        )
+
+    if key and isinstance(result, ToolMessage) and result.status != "error" and isinstance(result.content, str):
+        return Command(update={"messages": [result], "tool_memo": {key: result.tool_call_id}})
+    return result
+
 # ─── Message Trimmer ─────────────────────────────────────────────────
 RECENT_WINDOW = 4  # keep the last N messages fully intact
 
@@ -216,7 +284,11 @@ def trim_messages(state):
     - For older messages, drops ToolMessage content (file reads, search
       results) since those are the biggest context consumers.
     """
-    msgs = state.get("messages", [])
+    with tracing.span("trim_messages", kind="api"):
+        return _trim(state.get("messages", []))
+
+
+def _trim(msgs):
     sys_msg = SystemMessage(content=SYSTEM_PROMPT)
 
     # Extract any user-context SystemMessages from the input (injected by api.py)
@@ -251,18 +323,67 @@ def trim_messages(state):
     return prefix + trimmed + recent
 
 
+async def _prompt_with_prefetch(state):
+    """
+    Async prompt: trim_messages plus the speculative retrieval started by
+    api.py (core/prefetch.py), placed just before the user's message. It is
+    added to every model call once ready, but never stored in the checkpoint.
+    """
+    messages = trim_messages(state)
+    holder = get_config()["configurable"].get("prefetch")
+    if holder is None:
+        return messages
+    # The first model call of a turn is the one made right after the user's message
+    first_call = bool(state["messages"]) and state["messages"][-1].type == "human"
+    if first_call:
+        with tracing.span("prefetch_wait", kind="api"):
+            context = await prefetch.context_message(holder, first_call)
+    else:
+        context = await prefetch.context_message(holder, first_call)
+    if context is None:
+        return messages
+    last_human = max((i for i, m in enumerate(messages) if m.type == "human"), default=len(messages))
+    return messages[:last_human] + [context] + messages[last_human:]
+
+
 # ─── Agent ───────────────────────────────────────────────────────────
-llm = get_llm()
+# One tool-bound ChatOllama per (model, num_predict) the router has picked
+_routed_models: dict[tuple[str, int], object] = {}
+
+
+def _routed_model(state, runtime):
+    """Dynamic model for create_react_agent: the model and token limit chosen by core/router.py for this turn."""
+    route = get_config()["configurable"].get("route") or {}
+    key = (route.get("model", MAIN_MODEL), route.get("num_predict", router.ANSWER_TOKENS))
+    model = _routed_models.get(key)
+    if model is None:
+        model = _routed_models[key] = get_llm(model=key[0], num_predict=key[1]).bind_tools(ALL_TOOLS)
+    return model
+
 
 # SQLite checkpointer persists conversations across restarts
-DB_PATH = os.path.join(os.path.dirname(__file__), "database", "conversations.db")
+DB_PATH = os.getenv(
+    "CONVERSATIONS_DB_PATH",
+    os.path.join(os.path.dirname(__file__), "database", "conversations.db"),
+)
 
 
-def create_agent(checkpointer):
-    """Create the agent with the given checkpointer."""
+def create_agent(checkpointer, model=None):
+    """
+    Create the agent with the given checkpointer.
+    - model: optional chat model override (benchmarks pass a scripted stub); defaults to the
+             Ollama model the router picked, read from config["configurable"]["route"].
+
+    Tool calls from the same AI message are dispatched as separate graph tasks
+    (version="v2") and run concurrently, so a multi-tool step takes about as long
+    as its slowest call. Results are appended in the order the model issued the
+    calls, regardless of which finishes first.
+    """
     return create_react_agent(
-        llm,
-        tools=ALL_TOOLS,
-        prompt=trim_messages,
+        model or _routed_model,
+        tools=ToolNode(ALL_TOOLS, awrap_tool_call=_run_tool),
+        prompt=RunnableLambda(trim_messages, afunc=_prompt_with_prefetch),
+        state_schema=NG911AgentState,
         checkpointer=checkpointer,
+        version="v2",
     )
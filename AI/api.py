@@ -4,21 +4,27 @@ Provides a Server-Sent Events (SSE) endpoint to stream LangGraph agent responses
 directly to the Web App frontend.
 """
 
+import asyncio
 import json
 import logging
+import os
 import re
-import threading
+import time
+from collections import OrderedDict
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, Request, HTTPException
+from fastapi import FastAPI, File, Form, Query, Request, Response, HTTPException, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, ValidationError
 from sse_starlette.sse import EventSourceResponse
+import aiosqlite
 import uvicorn
 
 # Import the pre-built, tool-equipped LangGraph agent
-from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
 from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
 from agent import create_agent, DB_PATH
+from core import fastpath, images, metrics, prefetch, router, snapshots, tracing, warmup
 from tools.navigation_tools import get_navigation_target
 
 # Set up logging to avoid polluting stdout
@@ -29,15 +35,37 @@ logger = logging.getLogger(__name__)
 agent = None
 checkpointer = None
 
+# Generous SQLite busy timeout: in multi-worker mode several processes write DB_PATH
+_DB_TIMEOUT_S = 30
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Manage async SQLite checkpointer lifecycle."""
+    """Manage async SQLite checkpointer lifecycle, the trace writer and the model warm-up/keep-alive task."""
     global agent, checkpointer
-    async with AsyncSqliteSaver.from_conn_string(DB_PATH) as checkpointer:
+    async with aiosqlite.connect(DB_PATH, timeout=_DB_TIMEOUT_S) as conn:
+        checkpointer = AsyncSqliteSaver(conn)
         agent = create_agent(checkpointer)
         logger.info(f"SQLite checkpointer initialized at {DB_PATH}")
-        yield
+        _load_bundle_navigation()
+        tracing.start_writer()
+        # In the background, so /api/ready can report "warming" while the models load
+        keepalive = asyncio.create_task(warmup.run())
+        try:
+            yield
+        finally:
+            keepalive.cancel()
+            tracing.stop_writer()
+
+
+def _load_bundle_navigation():
+    """With flat bundles, serve the navigation map the active bundle was built with."""
+    from database.retrieval import KB_BACKEND, get_active_collection
+    if KB_BACKEND != "flat":
+        return
+    from database import bundles
+    if bundles.load_navigation_map(get_active_collection()):
+        logger.info(f"Navigation map loaded from bundle {get_active_collection()}")
 
 
 app = FastAPI(title="CSRD NG911 AI Assistant API", lifespan=lifespan)
@@ -67,8 +95,9 @@ class ChatRequest(BaseModel):
     message: str
     thread_id: str = "default_session"
     user_context: UserContext = UserContext()
-    screenshot: str | None = None
+    screenshot: str | None = None  # Base64 image; prefer /api/chat/upload for large screenshots
     thinking: bool = True
+    client_message_id: str | None = None  # a resend with the same ID attaches to the original turn
 
 
 def _build_user_context_message(ctx: UserContext) -> str:
@@ -97,12 +126,221 @@ def _build_user_context_message(ctx: UserContext) -> str:
 
 
 async def stream_agent_events(user_message: str, thread_id: str, user_context: UserContext,
-                              screenshot: str | None = None, thinking: bool = True):
+                              screenshot: dict | None = None, thinking: bool = True,
+                              disconnected: asyncio.Event | None = None,
+                              client_message_id: str | None = None):
     """
     Generator that invokes the LangGraph agent and yields SSE events.
     Events are formattted as dicts matching the SSE spec.
+    The turn runs in its own task (_run_turn) so it can be cancelled when the
+    client disconnects (`disconnected` is set by the SSE response), even while
+    this generator is blocked on a send. Turns on the same thread never run
+    concurrently (see _run_serialized). A resend with the same client_message_id
+    does not run again: it gets a 'duplicate' event, then the original turn's
+    events (replayed, then live while it is still running).
+    Navigation and schema lookups with one exact answer skip the agent
+    (core/fastpath.py). For everything else, retrieval for the message starts
+    here, before the turn is queued or the graph runs (core/prefetch.py).
+    """
+    turn = None
+    if client_message_id:
+        turn, duplicate = _claim(thread_id, client_message_id)
+        if duplicate:
+            async for event in _follow(turn, client_message_id):
+                yield event
+            return
+
+    page_errors = bool(user_context.page_state and user_context.page_state.errors)
+    fast = fastpath.answer(user_message, screenshot is not None, page_errors)
+    if fast is not None and fast["answer"] is None:
+        metrics.record_fastpath(fast["kind"], answered=False)
+        fast = None
+    speculative = None if fast else prefetch.start(user_message, user_context.current_page)
+    queue: asyncio.Queue = asyncio.Queue()
+    run = asyncio.create_task(
+        _run_serialized(queue, client_message_id, user_message, thread_id, user_context, screenshot, thinking,
+                        speculative, fast)
+    )
+    watcher = asyncio.create_task(_cancel_on_disconnect(run, disconnected)) if disconnected else None
+    try:
+        while (event := await queue.get()) is not None:
+            if turn is not None:
+                _record(turn, event)
+            yield event
+    finally:
+        if turn is not None:
+            _finish_record(turn)
+        if watcher:
+            watcher.cancel()
+        _cancel_once(run)
+        prefetch.cancel(speculative)
+
+
+# ─── Per-Thread Run Serialization ────────────────────────────────────
+# Two turns on one thread must not run against the same checkpoint at once.
+# THREAD_BUSY_POLICY decides what a new message on a busy thread does:
+#   "queue":     wait for the running turn to finish (default)
+#   "supersede": cancel the running turn (checkpointed as interrupted) and run instead
+# Serialization is per worker process.
+THREAD_BUSY_POLICY = os.getenv("THREAD_BUSY_POLICY", "queue")
+# A client_message_id is remembered with its turn's events, so a resend (the client
+# reuses the ID until the turn's 'done') is answered from the original turn.
+DEDUPE_WINDOW_S = 600  # how long a client_message_id is remembered
+_SUPERSEDED = "superseded"
+_TRANSIENT_EVENTS = ("tool", "queued")  # not replayed once the turn has finished
+
+_thread_slots: dict[str, dict] = {}  # thread_id -> {"lock", "users", "run", "latest"}
+# (thread_id, client_message_id) -> {"at", "events", "listeners", "finished"}
+_submitted: OrderedDict[tuple[str, str], dict] = OrderedDict()
+
+
+def _claim(thread_id: str, client_message_id: str) -> tuple[dict, bool]:
+    """(turn record, whether the ID was already submitted recently and did not fail)."""
+    now = time.monotonic()
+    while _submitted and next(iter(_submitted.values()))["at"] < now - DEDUPE_WINDOW_S:
+        _submitted.popitem(last=False)
+    key = (thread_id, client_message_id)
+    if key in _submitted:
+        return _submitted[key], True
+    _submitted[key] = {"at": now, "events": [], "listeners": [], "finished": False}
+    return _submitted[key], False
+
+
+def _record(turn: dict, event: dict):
+    turn["events"].append(event)
+    for listener in turn["listeners"]:
+        listener.put_nowait(event)
+
+
+def _finish_record(turn: dict):
+    """Mark the turn finished, release followers, and keep its events in compact form."""
+    turn["finished"] = True
+    for listener in turn["listeners"]:
+        listener.put_nowait(None)
+    turn["listeners"].clear()
+    compact, chunks = [], []
+    for event in turn["events"]:
+        if event["event"] == "message":
+            chunks.append(json.loads(event["data"])["chunk"])
+        elif event["event"] not in _TRANSIENT_EVENTS:
+            compact.append(event)
+    if chunks:
+        compact.insert(0, {"event": "message", "data": json.dumps({"chunk": "".join(chunks)})})
+    turn["events"] = compact
+
+
+async def _follow(turn: dict, client_message_id: str):
+    """Events for a resend: the original turn's so far, then the rest as it streams."""
+    yield {"event": "duplicate", "data": json.dumps({"client_message_id": client_message_id})}
+    replay = list(turn["events"])
+    listener = None
+    if not turn["finished"]:
+        listener = asyncio.Queue()
+        turn["listeners"].append(listener)
+    done = False
+    for event in replay:
+        done = done or event["event"] == "done"
+        yield event
+    if listener is not None:
+        while (event := await listener.get()) is not None:
+            done = done or event["event"] == "done"
+            yield event
+    if not done:
+        yield {"event": "error", "data": json.dumps(
+            {"error": "The earlier send of this message did not complete. Send it again."})}
+
+
+async def _run_serialized(queue: asyncio.Queue, client_message_id: str | None, user_message: str, thread_id: str,
+                          user_context: UserContext, screenshot: dict | None, thinking: bool,
+                          speculative: dict | None = None, fast: dict | None = None):
+    """Run the turn once the thread is free, applying THREAD_BUSY_POLICY."""
+    slot = _thread_slots.setdefault(thread_id, {"lock": asyncio.Lock(), "users": 0, "run": None, "latest": None})
+    me = asyncio.current_task()
+    slot["users"] += 1
+    slot["latest"] = me
+    status = "cancelled"
+    try:
+        if slot["lock"].locked():
+            if THREAD_BUSY_POLICY == "supersede" and slot["run"] is not None:
+                _cancel_once(slot["run"], _SUPERSEDED)
+            else:
+                await queue.put({"event": "queued", "data": json.dumps({"thread_id": thread_id})})
+        async with slot["lock"]:
+            if THREAD_BUSY_POLICY == "supersede" and slot["latest"] is not me:
+                # A newer message arrived while this one waited: drop it unrun
+                status = _SUPERSEDED
+                await queue.put(_superseded_event())
+                return
+            slot["run"] = me
+            try:
+                if fast is not None:
+                    status = await _answer_directly(queue, user_message, thread_id, user_context, fast)
+                else:
+                    status = await _run_turn(queue, user_message, thread_id, user_context, screenshot, thinking,
+                                             speculative)
+            finally:
+                slot["run"] = None
+    finally:
+        slot["users"] -= 1
+        if not slot["users"]:
+            _thread_slots.pop(thread_id, None)
+        if client_message_id and status != "ok":
+            # Let the client retry a turn that did not complete
+            _submitted.pop((thread_id, client_message_id), None)
+        queue.put_nowait(None)
+
+
+def _superseded_event() -> dict:
+    return {"event": "error", "data": json.dumps({"error": "Superseded by a newer message in this conversation."})}
+
+
+def _cancel_once(run: asyncio.Task, reason: str | None = None):
+    # A second cancel() would interrupt the run's own cleanup (partial checkpoint)
+    if not run.done() and not run.cancelling():
+        run.cancel(reason)
+
+
+async def _cancel_on_disconnect(run: asyncio.Task, disconnected: asyncio.Event):
+    await disconnected.wait()
+    if not run.done():
+        logger.info("Client disconnected; cancelling agent run")
+    _cancel_once(run)
+
+
+async def _run_turn(queue: asyncio.Queue, user_message: str, thread_id: str, user_context: UserContext,
+                    screenshot: dict | None, thinking: bool, speculative: dict | None = None):
     """
-    config = {"configurable": {"thread_id": thread_id}}
+    Runs one agent turn, putting SSE events on `queue`. Returns the trace status.
+    Each turn is recorded as a trace (see core/tracing.py and /api/traces).
+    core/router.py picks the model, thinking mode and token budget; `thinking`
+    (the UI toggle) can only turn thinking off. `speculative` is the
+    prefetch holder from prefetch.start(), read by the agent's prompt.
+    On cancellation the LangGraph run and its in-flight Ollama request are
+    abandoned, the partial turn is checkpointed, and metrics are updated.
+    """
+    trace = tracing.Trace(thread_id)
+    page_errors = bool(user_context.page_state and user_context.page_state.errors)
+    with trace.span("route") as span:
+        route = router.route(user_message, thinking, screenshot is not None, page_errors)
+        span["attrs"].update(route)
+    logger.info(f"Route for thread {thread_id}: {route['tier']} ({route['reason']}) -> {route['model']}, "
+                f"thinking={'on' if route['thinking'] else 'off'}")
+    config = {
+        "configurable": {"thread_id": thread_id, "route": route, "prefetch": speculative},
+        "callbacks": [tracing.TraceCallbackHandler(trace)],
+    }
+    status = "ok"
+    started = time.monotonic()
+    # Text of the AI message currently streaming (not yet in the checkpoint)
+    pending_id, pending_text = None, ""
+    # Whether the model called a retrieval tool, and when its first result arrived
+    retrieval_called, retrieval_round_trip = False, None
+    # Token usage over the turn's model calls; context_tokens is the latest call's prompt size
+    usage = {"input_tokens": 0, "output_tokens": 0, "context_tokens": 0}
+    tools_called = []
+    # Everything streamed to the client this turn, for the rendered transcript
+    accumulated_text = ""
+    token = tracing.set_current(trace)
 
     try:
         # Build message list: inject user context as a system message, then the user query.
@@ -111,21 +349,24 @@ async def stream_agent_events(user_message: str, thread_id: str, user_context: U
             ctx_str = _build_user_context_message(user_context)
             messages.append(SystemMessage(content=f"[CURRENT USER] {ctx_str}"))
 
-        # Prepend /no_think when thinking is disabled
-        actual_message = user_message if thinking else f"/no_think\n{user_message}"
+        # Prepend /no_think when the route has thinking off
+        actual_message = user_message if route["thinking"] else f"/no_think\n{user_message}"
+
+        # Skip re-sending a screenshot the model already has from earlier in this thread
+        if screenshot and images.seen_in_thread(thread_id, screenshot["hash"]):
+            actual_message += "\n\n[Screenshot unchanged since the previous one in this conversation; refer to that image.]"
+            screenshot = None
 
-        # Build multimodal message if screenshot is attached
+        # Build multimodal message if screenshot is attached (preprocessed by core/images.py)
         if screenshot:
             content = [
                 {"type": "text", "text": actual_message},
-                {"type": "image_url", "image_url": {"url": f"data:image/png;base64,{screenshot}"}}
+                {"type": "image_url", "image_url": {"url": screenshot["data_url"]}}
             ]
             messages.append(HumanMessage(content=content))
         else:
             messages.append(HumanMessage(content=actual_message))
 
-        accumulated_text = ""
-
         async for event, metadata in agent.astream(
             {"messages": messages},
             config=config,
@@ -135,93 +376,350 @@ async def stream_agent_events(user_message: str, thread_id: str, user_context: U
             if hasattr(event, "tool_calls") and event.tool_calls:
                 for tc in event.tool_calls:
                     name = tc.get("name", "")
+                    retrieval_called = retrieval_called or name in prefetch.RETRIEVAL_TOOLS
+                    if name and name not in tools_called:
+                        tools_called.append(name)
                     if name:
                         # Yield a special 'tool' event so the frontend can display a status ribbon
-                        yield {
+                        await queue.put({
                             "event": "tool",
                             "data": json.dumps({"tool": name})
-                        }
+                        })
+
+            if getattr(event, "usage_metadata", None):
+                usage["input_tokens"] += event.usage_metadata.get("input_tokens", 0)
+                usage["output_tokens"] += event.usage_metadata.get("output_tokens", 0)
+                usage["context_tokens"] = event.usage_metadata.get("input_tokens", 0) or usage["context_tokens"]
+
+            if (getattr(event, "type", "") == "tool" and retrieval_round_trip is None
+                    and getattr(event, "name", "") in prefetch.RETRIEVAL_TOOLS):
+                retrieval_round_trip = time.monotonic() - started
 
             # Check if this is an AI Message token payload
             if getattr(event, "content", None) and getattr(event, "type", "") in ("ai", "AIMessageChunk"):
                 accumulated_text += event.content
-                yield {
+                if event.id != pending_id:
+                    pending_id, pending_text = event.id, ""
+                pending_text += event.content
+                await queue.put({
                     "event": "message",
                     "data": json.dumps({"chunk": event.content})
-                }
+                })
 
         # Auto-append navigation link if the agent didn't include one
         if "{{nav:" not in accumulated_text:
-            nav_result = get_navigation_target.invoke(user_message)
+            with trace.span("nav_autolink"):
+                nav_result = get_navigation_target.invoke(user_message)
             if "{{nav:" in nav_result:
                 nav_match = re.search(r'\{\{nav:[^}]+\}\}', nav_result)
                 if nav_match:
                     nav_chunk = "\n\n" + nav_match.group(0)
-                    yield {
+                    accumulated_text += nav_chunk
+                    await queue.put({
                         "event": "message",
                         "data": json.dumps({"chunk": nav_chunk})
-                    }
+                    })
 
-        # Save/update conversation metadata
-        title = user_message[:50].strip()
-        if len(user_message) > 50:
-            title += "..."
-        _upsert_conversation_meta(thread_id, user_context.username, title)
+        # Save/update conversation metadata and the rendered transcript
+        with trace.span("save_turn"):
+            await _save_turn(thread_id, user_context.username, user_message, accumulated_text)
 
-        yield {
+        duration = time.monotonic() - started
+        metrics.record_completed(duration)
+        prefetch.record(speculative, retrieval_called, retrieval_round_trip)
+        await queue.put(_stats_event(duration, route["model"], route["tier"], usage, tools_called))
+        await queue.put({
             "event": "done",
-            "data": "{}"
-        }
-
+            "data": json.dumps({"trace_id": trace.trace_id})
+        })
+
+    except asyncio.CancelledError as e:
+        superseded = bool(e.args) and e.args[0] == _SUPERSEDED
+        status = _SUPERSEDED if superseded else "cancelled"
+        elapsed = time.monotonic() - started
+        saved = metrics.record_cancelled(elapsed, superseded=superseded)
+        logger.info(f"Run for thread {thread_id} {status} after {elapsed:.1f}s (~{saved:.1f}s of generation saved)")
+        if superseded:
+            queue.put_nowait(_superseded_event())
+        try:
+            note = _SUPERSEDED_NOTE if superseded else _INTERRUPTED_NOTE
+            await _checkpoint_partial_turn({"configurable": {"thread_id": thread_id}}, pending_id, pending_text, note)
+            await _save_turn(thread_id, user_context.username, user_message,
+                             f"{accumulated_text}\n\n{note}" if accumulated_text else note)
+        except Exception as e:
+            logger.error(f"Could not checkpoint cancelled turn for thread {thread_id}: {e}")
+        raise
     except Exception as e:
+        status = "error"
         logger.error(f"Error during agent execution: {e}")
-        yield {
+        await queue.put({
             "event": "error",
             "data": json.dumps({"error": str(e)})
-        }
+        })
+        try:
+            await _save_turn(thread_id, user_context.username, user_message,
+                             f"{accumulated_text}\n\n**Error:** {e}".lstrip())
+        except Exception as save_error:
+            logger.error(f"Could not save transcript for thread {thread_id}: {save_error}")
+    finally:
+        tracing.reset_current(token)
+        trace.finish(status)
+    return status
+
+
+async def _answer_directly(queue: asyncio.Queue, user_message: str, thread_id: str, user_context: UserContext,
+                           fast: dict) -> str:
+    """
+    Reply with a fast-path answer (core/fastpath.py) instead of running the
+    agent. The exchange is checkpointed as an ordinary turn. Returns the trace status.
+    """
+    trace = tracing.Trace(thread_id)
+    status = "ok"
+    started = time.monotonic()
+    logger.info(f"Fast path for thread {thread_id}: {fast['kind']} -> {fast['target']}")
+    try:
+        await queue.put({"event": "message", "data": json.dumps({"chunk": fast["answer"]})})
+        with trace.span("fastpath_checkpoint", fastpath=fast["kind"], target=fast["target"]):
+            await agent.aupdate_state(
+                {"configurable": {"thread_id": thread_id}},
+                {"messages": [HumanMessage(content=user_message), AIMessage(content=fast["answer"])]},
+                as_node="agent",
+            )
+        with trace.span("save_turn"):
+            await _save_turn(thread_id, user_context.username, user_message, fast["answer"])
+        duration = time.monotonic() - started
+        metrics.record_fastpath(fast["kind"], answered=True, duration_s=duration)
+        await queue.put(_stats_event(duration, "fast path", fast["kind"], {}, []))
+        await queue.put({"event": "done", "data": json.dumps({"trace_id": trace.trace_id})})
+    except asyncio.CancelledError:
+        status = "cancelled"
+        raise
+    except Exception as e:
+        status = "error"
+        logger.error(f"Error answering from the fast path: {e}")
+        await queue.put({"event": "error", "data": json.dumps({"error": str(e)})})
+    finally:
+        trace.finish(status)
+    return status
+
+
+def _stats_event(duration_s: float, model: str, tier: str, usage: dict, tools: list[str]) -> dict:
+    """Per-turn summary sent just before 'done' (clients that do not use it ignore it)."""
+    output = usage.get("output_tokens", 0)
+    return {"event": "stats", "data": json.dumps({
+        "duration_s": round(duration_s, 2),
+        "model": model,
+        "tier": tier,
+        "input_tokens": usage.get("input_tokens", 0),
+        "output_tokens": output,
+        "context_tokens": usage.get("context_tokens", 0),
+        "tokens_per_s": round(output / duration_s, 1) if duration_s > 0 else 0.0,
+        "tools": tools,
+    })}
+
+
+_INTERRUPTED_NOTE = "[Response interrupted: the user closed the chat.]"
+_SUPERSEDED_NOTE = "[Response interrupted: superseded by a newer message.]"
+
+
+async def _checkpoint_partial_turn(config: dict, pending_id: str | None, pending_text: str, note: str):
+    """
+    Close out a cancelled turn so the thread stays valid for the next one:
+    answer any tool calls left without results, keep the text streamed so far,
+    and end on a plain AI message (the graph then has nothing pending).
+    """
+    state = await agent.aget_state(config)
+    msgs = state.values.get("messages", []) if state and state.values else []
+    answered = {m.tool_call_id for m in msgs if m.type == "tool"}
+    last_ai = next((m for m in reversed(msgs) if m.type == "ai"), None)
+
+    closing = []
+    if last_ai is not None:
+        for tc in last_ai.tool_calls:
+            if tc["id"] not in answered:
+                closing.append(ToolMessage(content="[cancelled]", name=tc["name"],
+                                           tool_call_id=tc["id"], status="error"))
+    # The streaming message only reaches the checkpoint if its LLM call completed
+    partial = pending_text if pending_text and (last_ai is None or last_ai.id != pending_id) else ""
+    closing.append(AIMessage(content=f"{partial}\n\n{note}" if partial else note))
+    await agent.aupdate_state(config, {"messages": closing}, as_node="agent")
+
+
+async def _save_turn(thread_id: str, username: str, user_message: str, reply: str):
+    """Update the conversation's metadata and append the turn to its rendered transcript."""
+    title = user_message[:50].strip()
+    if len(user_message) > 50:
+        title += "..."
+
+    def _write():
+        _upsert_conversation_meta(thread_id, username, title)
+        _append_transcript(thread_id, [("user", user_message), ("assistant", reply)])
+
+    # A thread continued from before the transcript table keeps its earlier turns
+    await _backfill_transcript(thread_id, exclude_last_turn=True)
+    # Off the event loop: a blocking wait on the DB lock would stall the
+    # checkpointer's own commit, which needs the loop to finish
+    await asyncio.to_thread(_write)
+
 
 @app.post("/api/chat")
 async def chat_endpoint(request: ChatRequest):
     """
     Accepts a user message and returns an SSE stream.
+    Closing the stream cancels the agent run (see stream_agent_events).
     """
+    screenshot = None
+    if request.screenshot:
+        try:
+            raw = images.decode_base64(request.screenshot)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        screenshot = await _prepare_screenshot(raw)
+    return _chat_response(request, screenshot)
+
+
+@app.post("/api/chat/upload")
+async def chat_upload_endpoint(payload: str = Form(...), screenshot: UploadFile | None = File(None)):
+    """
+    Multipart variant of /api/chat for messages with a screenshot: `payload` is the
+    ChatRequest JSON, `screenshot` the raw image file (no Base64 inflation).
+    """
+    try:
+        request = ChatRequest.model_validate_json(payload)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    prepared = None
+    if screenshot is not None:
+        prepared = await _prepare_screenshot(await screenshot.read())
+    return _chat_response(request, prepared)
+
+
+async def _prepare_screenshot(raw: bytes) -> dict:
+    """Downsize/re-encode off the event loop; undecodable images are a 400."""
+    try:
+        return await asyncio.to_thread(images.prepare_screenshot, raw)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _chat_response(request: ChatRequest, screenshot: dict | None) -> EventSourceResponse:
+    disconnected = asyncio.Event()
+
+    async def _on_client_close(_message):
+        disconnected.set()
+
     return EventSourceResponse(
         stream_agent_events(
             request.message, request.thread_id, request.user_context,
-            screenshot=request.screenshot, thinking=request.thinking,
-        )
+            screenshot=screenshot, thinking=request.thinking,
+            disconnected=disconnected, client_message_id=request.client_message_id,
+        ),
+        client_close_handler_callable=_on_client_close,
     )
 
 
 @app.post("/api/reingest")
 async def reingest_endpoint():
-    """Triggers knowledge base re-ingestion + nav map rebuild. Called by CI/CD after deploy."""
+    """
+    Triggers a blue/green knowledge base rebuild + nav map rebuild. Called by CI/CD after deploy.
+    The live collection keeps serving searches until the new one is validated and swapped in.
+    """
     try:
-        from database.ingest import ingest
-        thread = threading.Thread(target=ingest, daemon=True)
-        thread.start()
-        return {"status": "ingestion_started", "note": "Navigation map will rebuild after ingestion completes."}
+        from database.ingest import start_reingest
+        started = start_reingest()
     except Exception as e:
         logger.error(f"Reingest failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+    if not started:
+        raise HTTPException(status_code=409, detail="A re-ingestion job is already running.")
+    return {"status": "ingestion_started", "note": "Poll /api/reingest/status for progress."}
+
+
+@app.get("/api/reingest/status")
+async def reingest_status_endpoint():
+    """Returns the state, phase and progress of the current/last re-ingestion job."""
+    from database.ingest import get_reingest_status
+    return get_reingest_status()
+
+
+@app.get("/api/bundles")
+async def bundles_endpoint():
+    """Lists the installed knowledge-base bundles (KB_BACKEND=flat), newest first."""
+    from database import bundles
+    from database.retrieval import KB_BACKEND, get_active_collection
+    installed = bundles.list_bundles() if KB_BACKEND == "flat" else []
+    return {"backend": KB_BACKEND, "active": get_active_collection(), "bundles": installed}
+
+
+@app.post("/api/bundles/{name}/activate")
+async def activate_bundle_endpoint(name: str):
+    """Verifies an installed bundle and switches searches to it (deploy or roll back, no rebuild)."""
+    from database import bundles
+    from database.retrieval import KB_BACKEND
+    if KB_BACKEND != "flat":
+        raise HTTPException(status_code=400, detail="Bundles require KB_BACKEND=flat.")
+    if name not in {b["name"] for b in bundles.list_bundles()}:
+        raise HTTPException(status_code=404, detail=f"Bundle '{name}' is not installed.")
+    try:
+        manifest = await asyncio.to_thread(bundles.activate, name)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"status": "activated", "active": name, "content_hash": manifest.get("content_hash")}
+
+
+@app.get("/api/traces/{thread_id}")
+async def traces_endpoint(thread_id: str, limit: int = 10):
+    """Returns the most recent turn traces for a thread as span waterfalls (for profiling)."""
+    return {"thread_id": thread_id, "traces": await asyncio.to_thread(tracing.get_traces, thread_id, limit)}
+
+
+@app.get("/api/metrics")
+async def metrics_endpoint():
+    """Returns this worker's run counters (completed/cancelled runs, generation seconds saved)."""
+    return metrics.snapshot()
+
+
+@app.get("/api/ready")
+async def ready_endpoint():
+    """
+    Readiness probe. 503 until the agent is built and the model warm-up has
+    finished (or while Ollama is unreachable); the body reports warm/cold state per model.
+    """
+    state = await warmup.readiness()
+    ready = agent is not None and state["warmup"] in ("done", "disabled") and state["ollama_reachable"] is not False
+    body = {"ready": ready, **state}
+    if not ready:
+        return JSONResponse(status_code=503, content=body)
+    return body
 
 
 @app.get("/api/nav-map")
 async def nav_map_endpoint():
     """Returns the current dynamic navigation map (for debugging)."""
-    from tools.navigation_tools import NAVIGATION_MAP
-    return {"count": len(NAVIGATION_MAP), "entries": NAVIGATION_MAP}
+    from tools import navigation_tools
+    navigation_tools.refresh_from_snapshot()
+    nav = navigation_tools.NAVIGATION_MAP
+    return {"count": len(nav), "entries": nav}
 
 
 # ─── Conversation History Endpoints ──────────────────────────────────
 
-# Separate SQLite table for conversation metadata (title, user, timestamps)
-# The checkpointer stores message content; this stores the index.
+# Separate SQLite tables for conversation metadata (title, user, timestamps) and
+# the rendered transcript (the user and assistant text of each turn, as streamed).
+# The checkpointer stores the full agent state; the history panel only needs these.
 import sqlite3
 
+TRANSCRIPT_PAGE_SIZE = 50  # messages per /api/conversations/{thread_id} page
+TRANSCRIPT_MAX_PAGE_SIZE = 200
+
+
+def _connect() -> sqlite3.Connection:
+    return sqlite3.connect(DB_PATH, timeout=_DB_TIMEOUT_S)
+
+
 def _ensure_meta_table():
     """Create conversation metadata table if it doesn't exist."""
-    conn = sqlite3.connect(DB_PATH)
+    conn = _connect()
     conn.execute("""
         CREATE TABLE IF NOT EXISTS conversation_meta (
             thread_id TEXT PRIMARY KEY,
@@ -237,9 +735,115 @@ def _ensure_meta_table():
 _ensure_meta_table()
 
 
+def _ensure_transcript_table():
+    """Create the rendered-transcript table if it doesn't exist (seq is 1-based per thread)."""
+    conn = _connect()
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS conversation_transcript (
+            thread_id TEXT NOT NULL,
+            seq INTEGER NOT NULL,
+            role TEXT NOT NULL,
+            content TEXT NOT NULL,
+            created_at TEXT DEFAULT (datetime('now')),
+            PRIMARY KEY (thread_id, seq)
+        ) WITHOUT ROWID
+    """)
+    conn.commit()
+    conn.close()
+
+_ensure_transcript_table()
+
+
+def _append_transcript(thread_id: str, messages: list[tuple[str, str]]):
+    """Append (role, content) rows after the thread's last seq, in one transaction."""
+    conn = _connect()
+    with conn:
+        last = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM conversation_transcript WHERE thread_id = ?",
+                            (thread_id,)).fetchone()[0]
+        conn.executemany(
+            "INSERT INTO conversation_transcript (thread_id, seq, role, content) VALUES (?, ?, ?, ?)",
+            [(thread_id, last + i, role, content) for i, (role, content) in enumerate(messages, 1)],
+        )
+    conn.close()
+
+
+def _transcript_last_seq(thread_id: str) -> int:
+    """0 when the thread has no transcript rows."""
+    conn = _connect()
+    last = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM conversation_transcript WHERE thread_id = ?",
+                        (thread_id,)).fetchone()[0]
+    conn.close()
+    return last
+
+
+def _transcript_page(thread_id: str, before: int, limit: int) -> list[tuple]:
+    """Up to limit + 1 (seq, role, content) rows with seq < before, newest first."""
+    conn = _connect()
+    rows = conn.execute(
+        "SELECT seq, role, content FROM conversation_transcript WHERE thread_id = ? AND seq < ? "
+        "ORDER BY seq DESC LIMIT ?",
+        (thread_id, before, limit + 1),
+    ).fetchall()
+    conn.close()
+    return rows
+
+
+def _transcript_version(thread_id: str) -> str:
+    """
+    ETag part that changes with the thread's content: transcript row count and
+    last seq, plus the metadata timestamps (a deleted and recreated thread, or a
+    turn saved again, gets a new created_at / updated_at).
+    """
+    conn = _connect()
+    count, last = conn.execute(
+        "SELECT COUNT(*), COALESCE(MAX(seq), 0) FROM conversation_transcript WHERE thread_id = ?",
+        (thread_id,)).fetchone()
+    meta = conn.execute("SELECT created_at, updated_at FROM conversation_meta WHERE thread_id = ?",
+                        (thread_id,)).fetchone() or ("", "")
+    conn.close()
+    created, updated = (re.sub(r"\D", "", ts or "") for ts in meta)
+    return f"{count}-{last}-{created}-{updated}"
+
+
+def _render_checkpoint_messages(msgs: list) -> list[tuple[str, str]]:
+    """User and assistant text from checkpointed messages (threads from before the transcript table)."""
+    rendered = []
+    for msg in msgs:
+        msg_type = getattr(msg, "type", "")
+        content = getattr(msg, "content", "")
+        if isinstance(content, list):
+            content = "".join(part.get("text", "") for part in content if isinstance(part, dict))
+        if msg_type == "human":
+            rendered.append(("user", content.removeprefix("/no_think\n")))
+        elif msg_type == "ai" and content:
+            rendered.append(("assistant", content))
+    return rendered
+
+
+async def _backfill_transcript(thread_id: str, exclude_last_turn: bool = False) -> int | None:
+    """
+    Render a thread that has no transcript rows from its checkpoint (threads
+    from before the transcript table). exclude_last_turn leaves out the turn
+    being saved right now. Returns the last seq, or None if there is no checkpoint.
+    """
+    last = await asyncio.to_thread(_transcript_last_seq, thread_id)
+    if last:
+        return last
+    state = await agent.aget_state({"configurable": {"thread_id": thread_id}})
+    if not state or not state.values:
+        return None
+    msgs = state.values.get("messages", [])
+    if exclude_last_turn:
+        msgs = msgs[:max((i for i, m in enumerate(msgs) if m.type == "human"), default=0)]
+    rendered = _render_checkpoint_messages(msgs)
+    if rendered:
+        await asyncio.to_thread(_append_transcript, thread_id, rendered)
+    return len(rendered)
+
+
 def _upsert_conversation_meta(thread_id: str, username: str, title: str):
     """Insert new conversation or update timestamp of existing one (title preserved)."""
-    conn = sqlite3.connect(DB_PATH)
+    conn = _connect()
     conn.execute("""
         INSERT INTO conversation_meta (thread_id, username, title, updated_at)
         VALUES (?, ?, ?, datetime('now'))
@@ -252,7 +856,7 @@ def _upsert_conversation_meta(thread_id: str, username: str, title: str):
 @app.get("/api/conversations")
 async def list_conversations(username: str = "anonymous"):
     """Returns list of past conversations for a user."""
-    conn = sqlite3.connect(DB_PATH)
+    conn = _connect()
     rows = conn.execute(
         "SELECT thread_id, title, created_at, updated_at FROM conversation_meta WHERE username = ? ORDER BY updated_at DESC LIMIT 50",
         (username,)
@@ -265,39 +869,62 @@ async def list_conversations(username: str = "anonymous"):
 
 
 @app.get("/api/conversations/{thread_id}")
-async def get_conversation(thread_id: str):
-    """Returns message history for a specific conversation thread."""
+async def get_conversation(request: Request, response: Response, thread_id: str, before: int | None = None,
+                           limit: int = Query(TRANSCRIPT_PAGE_SIZE, ge=1, le=TRANSCRIPT_MAX_PAGE_SIZE)):
+    """
+    Returns one page of a conversation's rendered transcript, oldest first:
+    the newest `limit` messages, or those before seq `before`. `next_cursor`
+    is the `before` value for the previous page (null on the first message).
+    The ETag covers the transcript's row count, last seq and the thread's
+    created/updated times, so it changes when a turn is added or saved again
+    and when the thread is deleted and recreated. If-None-Match gets a 304
+    without reading any messages.
+    Threads from before the transcript table are rendered from their
+    checkpoint once, then served from the table.
+    """
     try:
-        config = {"configurable": {"thread_id": thread_id}}
-        state = await agent.aget_state(config)
-        if not state or not state.values:
+        last = await _backfill_transcript(thread_id)
+        if last is None:
             raise HTTPException(status_code=404, detail="Conversation not found")
-
-        messages = []
-        for msg in state.values.get("messages", []):
-            msg_type = getattr(msg, "type", "")
-            content = getattr(msg, "content", "")
-            if msg_type == "human":
-                messages.append({"role": "user", "content": content})
-            elif msg_type == "ai" and content:
-                messages.append({"role": "assistant", "content": content})
-        return {"thread_id": thread_id, "messages": messages}
+        version = await asyncio.to_thread(_transcript_version, thread_id)
+        etag = f'W/"{version}-{before or 0}-{limit}"'
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=headers)
+        rows = await asyncio.to_thread(_transcript_page, thread_id, before or last + 1, limit)
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error fetching conversation {thread_id}: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+    response.headers.update(headers)
+    page = rows[:limit]
+    return {
+        "thread_id": thread_id,
+        "messages": [{"seq": seq, "role": role, "content": content} for seq, role, content in reversed(page)],
+        "next_cursor": page[-1][0] if len(rows) > limit else None,
+        "total": last,
+    }
+
 
 @app.delete("/api/conversations/{thread_id}")
 async def delete_conversation(thread_id: str):
     """Deletes a conversation from metadata (checkpointer data remains but is orphaned)."""
-    conn = sqlite3.connect(DB_PATH)
+    conn = _connect()
     conn.execute("DELETE FROM conversation_meta WHERE thread_id = ?", (thread_id,))
+    conn.execute("DELETE FROM conversation_transcript WHERE thread_id = ?", (thread_id,))
     conn.commit()
     conn.close()
     return {"status": "deleted"}
 
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    if snapshots.ENABLED:
+        # Multi-worker mode: this process already built the nav/file map snapshots on
+        # import; workers load them. Conversation state is shared via the SQLite
+        # checkpointer (WAL mode), and the knowledge base via the on-disk Chroma index.
+        snapshots.mark_workers_as_readers()
+        uvicorn.run("api:app", host="0.0.0.0", port=8000, workers=snapshots.API_WORKERS)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8000)
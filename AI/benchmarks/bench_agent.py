@@ -0,0 +1,303 @@
+"""
+Offline agent benchmark suite.
+
+Runs the real create_agent() graph (ToolNode, trim_messages, AsyncSqliteSaver)
+against a scripted stub LLM and hashing embeddings, for the fixed question
+corpus in benchmarks/corpus.py. Needs no network, GPU or Ollama.
+
+Reports:
+  - agent:  wall time per turn, split into LLM / tool / framework overhead
+  - tools:  per-tool latency against the real files
+  - trim:   trim_messages cost vs. conversation length
+  - sse:    stream_agent_events throughput including SSE framing
+
+Usage (run from AI/):
+    python -m benchmarks.bench_agent
+    python -m benchmarks.bench_agent --output bench.json
+    python -m benchmarks.bench_agent --baseline benchmarks/baseline.json --tolerance 1.0
+The --baseline form exits non-zero when any metric regresses beyond the tolerance.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+from benchmarks.corpus import QUESTIONS, SSE_ANSWER_WORDS, answer_text
+from benchmarks.fakes import HashingEmbeddings, ScriptedChatModel, text_turn
+from benchmarks.stats import summary
+
+TRIM_HISTORY_SIZES = [10, 50, 200]
+TOOL_OUTPUT_CHARS = 20_000  # size of synthetic tool results in trim histories
+
+
+def _union_ms(intervals: list[tuple[float, float]]) -> float:
+    """Total covered time of possibly-overlapping (start, end) intervals."""
+    total, cur_start, cur_end = 0.0, None, None
+    for start, end in sorted(intervals):
+        if cur_end is None or start > cur_end:
+            if cur_end is not None:
+                total += cur_end - cur_start
+            cur_start, cur_end = start, end
+        else:
+            cur_end = max(cur_end, end)
+    if cur_end is not None:
+        total += cur_end - cur_start
+    return total
+
+
+def _setup(workdir: str):
+    """
+    Point every on-disk side effect at `workdir` and swap Ollama embeddings for
+    HashingEmbeddings, then build a knowledge base from the real repo sources.
+    Must run before agent/api are imported (they read these paths at import time).
+    """
+    os.environ["CONVERSATIONS_DB_PATH"] = os.path.join(workdir, "conversations.db")
+    os.environ["TRACE_DB_PATH"] = os.path.join(workdir, "traces.db")
+    os.environ["TRACING_ENABLED"] = "0"
+    os.environ["CHROMA_DB_DIR"] = os.path.join(workdir, "chroma_db")
+
+    from database import ingest, retrieval
+    from tools import knowledge_tools
+
+    ingest.CHROMA_DB_DIR = os.environ["CHROMA_DB_DIR"]
+    ingest.get_embeddings = HashingEmbeddings
+    knowledge_tools.CHROMA_DB_DIR = os.environ["CHROMA_DB_DIR"]
+    retrieval.get_embeddings = HashingEmbeddings
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        ingest.ingest()
+    print(f"[setup] Knowledge base built with hashing embeddings in {time.perf_counter() - start:.1f}s")
+
+
+# ─── Benchmarks ──────────────────────────────────────────────────────
+async def bench_agent_turns(agent, model: ScriptedChatModel, iterations: int) -> dict:
+    """Drive each corpus question through the graph and split wall time by span kind."""
+    from langchain_core.messages import HumanMessage
+    from core import tracing
+
+    per_question = {}
+    all_overhead, all_wall = [], []
+    for q in QUESTIONS:
+        walls, llms, tools, overheads = [], [], [], []
+        for _ in range(iterations):
+            model.push(*q["script"])
+            trace = tracing.Trace(f"bench-{uuid.uuid4().hex[:8]}")
+            config = {
+                "configurable": {"thread_id": trace.thread_id},
+                "callbacks": [tracing.TraceCallbackHandler(trace)],
+            }
+            start = time.perf_counter()
+            async for _event in agent.astream(
+                {"messages": [HumanMessage(content=q["question"])]},
+                config=config,
+                stream_mode="messages",
+            ):
+                pass
+            wall = (time.perf_counter() - start) * 1000
+
+            def spans(kind):
+                return [
+                    (s["start_ms"], s["start_ms"] + (s["duration_ms"] or 0))
+                    for s in trace.spans if s["kind"] == kind
+                ]
+
+            llm_ms = _union_ms(spans("llm"))
+            tool_ms = _union_ms(spans("tool"))
+            walls.append(wall)
+            llms.append(llm_ms)
+            tools.append(tool_ms)
+            overheads.append(wall - llm_ms - tool_ms)
+        per_question[q["id"]] = {
+            "wall_ms": summary(walls),
+            "llm_ms": summary(llms),
+            "tool_ms": summary(tools),
+            "overhead_ms": summary(overheads),
+        }
+        all_overhead.extend(overheads)
+        all_wall.extend(walls)
+    return {
+        "wall_ms": summary(all_wall),
+        "overhead_ms": summary(all_overhead),
+        "questions": per_question,
+    }
+
+
+def bench_tools(iterations: int) -> dict:
+    """Invoke every tool call from the corpus directly, outside the graph."""
+    from agent import ALL_TOOLS
+
+    by_name = {t.name: t for t in ALL_TOOLS}
+    timings: dict[str, list[float]] = {}
+    for q in QUESTIONS:
+        for turn in q["script"]:
+            for tc in turn.get("tool_calls", []):
+                tool = by_name[tc["name"]]
+                for _ in range(iterations):
+                    start = time.perf_counter()
+                    tool.invoke(tc["args"])
+                    timings.setdefault(tc["name"], []).append((time.perf_counter() - start) * 1000)
+    return {name: summary(vals) for name, vals in sorted(timings.items())}
+
+
+def _synthetic_history(n: int) -> list:
+    from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+    msgs = [SystemMessage(content="[CURRENT USER] User: bench | Role: Admin")]
+    i = 0
+    while len(msgs) < n:
+        call_id = f"call_{i}"
+        msgs.append(HumanMessage(content=f"question {i}"))
+        msgs.append(AIMessage(content="", tool_calls=[{"name": "read_file", "args": {"file_path": "x"}, "id": call_id}]))
+        msgs.append(ToolMessage(content="x" * TOOL_OUTPUT_CHARS, tool_call_id=call_id, name="read_file"))
+        msgs.append(AIMessage(content=answer_text(80)))
+        i += 1
+    return msgs[:n]
+
+
+def bench_trim(iterations: int) -> dict:
+    """Time trim_messages on growing conversations (it runs before every LLM call)."""
+    from agent import trim_messages
+
+    result = {}
+    for n in TRIM_HISTORY_SIZES:
+        state = {"messages": _synthetic_history(n)}
+        timings = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            trim_messages(state)
+            timings.append((time.perf_counter() - start) * 1000)
+        result[f"history_{n}"] = summary(timings)
+    return result
+
+
+async def bench_sse(agent, model: ScriptedChatModel, iterations: int) -> dict:
+    """Measure stream_agent_events + SSE encoding for a long streamed answer."""
+    import api
+    from sse_starlette.sse import ServerSentEvent
+
+    api.agent = agent
+    events_per_s, mb_per_s = [], []
+    for _ in range(iterations):
+        model.push(text_turn(answer_text(SSE_ANSWER_WORDS)))
+        n_events, n_bytes = 0, 0
+        start = time.perf_counter()
+        async for ev in api.stream_agent_events(
+            "Explain the nightly pipeline in detail", f"bench-sse-{uuid.uuid4().hex[:8]}",
+            api.UserContext(username="bench", is_admin=True),
+        ):
+            n_bytes += len(ServerSentEvent(ev["data"], event=ev["event"]).encode())
+            n_events += 1
+        elapsed = time.perf_counter() - start
+        events_per_s.append(n_events / elapsed)
+        mb_per_s.append(n_bytes / elapsed / 1e6)
+    return {"events_per_s": summary(events_per_s), "mb_per_s": summary(mb_per_s)}
+
+
+# ─── Regression Gate ─────────────────────────────────────────────────
+def _flatten(d: dict, prefix: str = "") -> dict:
+    flat = {}
+    for k, v in d.items():
+        key = f"{prefix}.{k}" if prefix else k
+        if isinstance(v, dict):
+            flat.update(_flatten(v, key))
+        elif k == "p50":
+            flat[key] = v
+    return flat
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """
+    Return regressions: p50 latencies above baseline*(1+tolerance), or
+    *_per_s throughputs below baseline/(1+tolerance).
+    """
+    current, base = _flatten(results), _flatten(baseline)
+    failures = []
+    for key, old in base.items():
+        new = current.get(key)
+        if new is None or old <= 0:
+            continue
+        if "_per_s" in key:
+            if new < old / (1 + tolerance):
+                failures.append(f"{key}: {new:.3f} < {old:.3f} / {1 + tolerance:.2f}")
+        elif new > old * (1 + tolerance) and new - old > 1.0:  # ignore sub-ms jitter
+            failures.append(f"{key}: {new:.3f} > {old:.3f} * {1 + tolerance:.2f}")
+    return failures
+
+
+def _print_report(results: dict):
+    a = results["agent"]
+    print("\n=== Agent turns (ms) ===")
+    print(f"{'question':<16}{'wall p50':>10}{'llm p50':>10}{'tool p50':>10}{'overhead p50':>14}")
+    for qid, r in a["questions"].items():
+        print(f"{qid:<16}{r['wall_ms']['p50']:>10.2f}{r['llm_ms']['p50']:>10.2f}"
+              f"{r['tool_ms']['p50']:>10.2f}{r['overhead_ms']['p50']:>14.2f}")
+    print(f"overall overhead p50={a['overhead_ms']['p50']:.2f} p95={a['overhead_ms']['p95']:.2f}")
+    print("\n=== Tools (ms) ===")
+    for name, r in results["tools"].items():
+        print(f"{name:<24}p50={r['p50']:.3f}  p95={r['p95']:.3f}")
+    print("\n=== trim_messages (ms) ===")
+    for size, r in results["trim"].items():
+        print(f"{size:<24}p50={r['p50']:.3f}  p95={r['p95']:.3f}")
+    s = results["sse"]
+    print("\n=== SSE ===")
+    print(f"events/s p50={s['events_per_s']['p50']:.0f}  MB/s p50={s['mb_per_s']['p50']:.2f}")
+
+
+async def _run(args) -> dict:
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+    from agent import DB_PATH, create_agent
+
+    model = ScriptedChatModel()
+    async with AsyncSqliteSaver.from_conn_string(DB_PATH) as checkpointer:
+        agent = create_agent(checkpointer, model=model)
+        # Warm-up pass so import/compile costs don't land in the first sample
+        await bench_agent_turns(agent, model, 1)
+        results = {
+            "agent": await bench_agent_turns(agent, model, args.iterations),
+            "tools": bench_tools(args.iterations),
+            "trim": bench_trim(args.iterations),
+            "sse": await bench_sse(agent, model, max(1, args.iterations // 4)),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline NG911 agent benchmark suite")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--baseline", help="compare against this results JSON and fail on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed relative slowdown (0.5 = +50%%)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="ng911-bench-") as workdir:
+        _setup(workdir)
+        results = asyncio.run(_run(args))
+
+    _print_report(results)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        failures = compare(results, baseline, args.tolerance)
+        if failures:
+            print("\n[FAIL] Regressions vs baseline:")
+            for line in failures:
+                print(f"  {line}")
+            sys.exit(1)
+        print("\n[OK] No regressions vs baseline.")
+
+
+if __name__ == "__main__":
+    main()
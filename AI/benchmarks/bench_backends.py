@@ -0,0 +1,204 @@
+"""
+Knowledge-base backend comparison: Chroma (HNSW) vs the flat NumPy index.
+
+Builds one index per backend variant from the production chunking
+(ingest.split_documents defaults) with HashingEmbeddings, then opens each in
+a fresh subprocess and reports:
+  - import ms:  importing the backend's modules
+  - load ms:    opening the generation and answering the first query
+  - RSS MB:     resident memory added by opening it and running the golden set
+  - p50 / p95:  query latency (embedding the query + search)
+  - recall@k:   golden-set recall (benchmarks/golden_retrieval.py)
+  - overlap:    share of the top-k that matches exact float32 search
+  - disk KB:    size of the generation on disk
+Flat variants cover float16 / int8 storage at full and truncated dimensions.
+HashingEmbeddings are not Matryoshka-trained, so truncated-dimension recall here
+is a pessimistic bound; confirm with nomic-embed-text v1.5 before lowering KB_FLAT_DIMS.
+
+Usage (run from AI/):
+    python -m benchmarks.bench_backends
+    python -m benchmarks.bench_backends --variants chroma,float16,int8 --k 4 --repeats 20
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+_AI_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# name -> (backend, flat dtype, flat dims)
+VARIANTS = {
+    "chroma": ("chroma", None, 0),
+    "float16": ("flat", "float16", 0),
+    "int8": ("flat", "int8", 0),
+    "float16-256": ("flat", "float16", 256),
+    "int8-256": ("flat", "int8", 256),
+}
+
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # peak, Linux units
+
+
+def _dir_size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(root, f)) for root, _dirs, files in os.walk(path) for f in files)
+
+
+# ─── Child: measure one backend ──────────────────────────────────────
+def _child(backend: str, path: str, name: str, k: int, repeats: int):
+    from benchmarks.fakes import HashingEmbeddings
+    from benchmarks.golden_retrieval import GOLDEN_SET
+    from benchmarks.stats import summary
+
+    rss_start = _rss_mb()
+    start = time.perf_counter()
+    if backend == "chroma":
+        from langchain_chroma import Chroma
+    else:
+        from database.flat_index import FlatIndex
+    import_ms = (time.perf_counter() - start) * 1000
+
+    rss_before = _rss_mb()
+    start = time.perf_counter()
+    if backend == "chroma":
+        store = Chroma(collection_name=name, persist_directory=path, embedding_function=HashingEmbeddings())
+    else:
+        store = FlatIndex(path, HashingEmbeddings())
+    store.similarity_search(GOLDEN_SET[0]["question"], k=k)
+    load_ms = (time.perf_counter() - start) * 1000
+
+    latencies, results = [], {}
+    for item in GOLDEN_SET:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            docs = store.similarity_search(item["question"], k=k)
+            latencies.append((time.perf_counter() - start) * 1000)
+        results[item["question"]] = [d.metadata.get("chunk_key", "") for d in docs]
+    print(json.dumps({
+        "import_ms": round(import_ms, 1),
+        "load_ms": round(load_ms, 1),
+        "rss_mb": round(_rss_mb() - rss_before, 1),
+        "rss_import_mb": round(rss_before - rss_start, 1),
+        "latency_ms": summary(latencies),
+        "results": results,
+    }))
+
+
+# ─── Parent: build and compare ───────────────────────────────────────
+def _build(variants: list[str], workdir: str) -> tuple[dict, dict]:
+    """Build every variant. Returns ({variant: path}, exact float32 top-k inputs)."""
+    import numpy as np
+    from langchain_chroma import Chroma
+    from benchmarks.fakes import HashingEmbeddings
+    from database import flat_index, ingest
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        docs = ingest.load_all_documents()
+    chunks = ingest.split_documents(docs)
+    for i, c in enumerate(chunks):
+        # Stable key to compare result lists across backends
+        c.metadata["chunk_key"] = f"{c.metadata.get('source', '')}#{i}"
+        c.id = str(i)
+    embeddings = HashingEmbeddings()
+    vectors = embeddings.embed_documents([c.page_content for c in chunks])
+    print(f"{len(chunks)} chunks x {len(vectors[0])} dims from {len(docs)} documents.\n")
+
+    paths = {}
+    for name in variants:
+        backend, dtype, dims = VARIANTS[name]
+        path = os.path.join(workdir, name)
+        if backend == "chroma":
+            store = Chroma(collection_name=name, persist_directory=path, embedding_function=embeddings)
+            for i in range(0, len(chunks), 100):
+                store.add_documents(chunks[i : i + 100], ids=[c.id for c in chunks[i : i + 100]])
+            del store
+        else:
+            flat_index.build(path, chunks, vectors, model="hashing", dtype=dtype, dims=dims)
+        paths[name] = path
+    exact = {"matrix": np.asarray(vectors, dtype=np.float32), "keys": [c.metadata["chunk_key"] for c in chunks]}
+    return paths, exact
+
+
+def _exact_top(exact: dict, question: str, k: int) -> list[str]:
+    import numpy as np
+    from benchmarks.fakes import HashingEmbeddings
+
+    q = np.asarray(HashingEmbeddings().embed_query(question), dtype=np.float32)
+    top = np.argsort(-(exact["matrix"] @ q))[:k]
+    return [exact["keys"][i] for i in top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chroma vs flat NumPy knowledge-base backend")
+    parser.add_argument("--variants", default=",".join(VARIANTS), help=f"comma list of: {', '.join(VARIANTS)}")
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--repeats", type=int, default=10, help="latency samples per question")
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--child", nargs=3, metavar=("BACKEND", "PATH", "NAME"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(*args.child, args.k, args.repeats)
+        return
+
+    from benchmarks.golden_retrieval import GOLDEN_SET
+
+    variants = [v for v in args.variants.split(",") if v]
+    rows = []
+    with tempfile.TemporaryDirectory(prefix="ng911-backends-") as workdir:
+        paths, exact = _build(variants, workdir)
+        expected = {item["question"]: _exact_top(exact, item["question"], args.k) for item in GOLDEN_SET}
+        for name in variants:
+            backend = VARIANTS[name][0]
+            proc = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_backends", "--k", str(args.k),
+                 "--repeats", str(args.repeats), "--child", backend, paths[name], name],
+                cwd=_AI_DIR, capture_output=True, text=True, check=True,
+            )
+            child = json.loads(proc.stdout.strip().splitlines()[-1])
+            recalls, overlaps = [], []
+            for item in GOLDEN_SET:
+                keys = child["results"][item["question"]]
+                sources = [key.rsplit("#", 1)[0] for key in keys]
+                found = {r for r in item["relevant"] if any(s.endswith(r) for s in sources)}
+                recalls.append(len(found) / len(item["relevant"]))
+                overlaps.append(len(set(keys) & set(expected[item["question"]])) / args.k)
+            rows.append({
+                "variant": name,
+                **{key: child[key] for key in ("import_ms", "load_ms", "rss_mb", "rss_import_mb", "latency_ms")},
+                "recall": round(sum(recalls) / len(recalls), 3),
+                "exact_overlap": round(sum(overlaps) / len(overlaps), 3),
+                "disk_bytes": _dir_size(paths[name]),
+            })
+
+    header = (f"{'variant':<14}{'import ms':>10}{'load ms':>9}{'RSS MB':>8}{'p50 ms':>8}{'p95 ms':>8}"
+              f"{'recall':>8}{'overlap':>9}{'disk KB':>9}")
+    print(header)
+    print("-" * len(header))
+    for r in rows:
+        print(f"{r['variant']:<14}{r['import_ms']:>10.1f}{r['load_ms']:>9.1f}{r['rss_mb']:>8.1f}"
+              f"{r['latency_ms']['p50']:>8.2f}{r['latency_ms']['p95']:>8.2f}"
+              f"{r['recall']:>8.3f}{r['exact_overlap']:>9.3f}{r['disk_bytes'] // 1024:>9}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Multi-worker load test for the API.
+
+Starts benchmarks/stub_app.py (real API, scripted LLM) with 1, 2, 4... workers,
+drives it with concurrent /api/chat SSE clients for a fixed duration, and
+reports throughput and latency per worker count. Because the stub LLM costs
+almost nothing, the numbers isolate the API's own CPU work (JSON parsing, SSE
+framing, trimming, tools, checkpointing) — the part multi-worker mode scales.
+
+--startup instead measures what the snapshot cache (core/snapshots.py) saves
+each worker: building the navigation map and file map vs loading the master's
+snapshots.
+
+Usage (run from AI/):
+    python -m benchmarks.bench_load
+    python -m benchmarks.bench_load --workers 1,2,4 --concurrency 32 --duration 20
+    python -m benchmarks.bench_load --startup
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+import httpx
+
+from benchmarks.stats import summary
+
+_AI_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+async def _wait_ready(base_url: str, timeout: float = 120):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(f"{base_url}/api/nav-map", timeout=2)).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.5)
+    raise RuntimeError(f"Server at {base_url} did not become ready")
+
+
+async def _client_loop(client: httpx.AsyncClient, base_url: str, stop_at: float,
+                       latencies: list[float], errors: list[str]):
+    while time.monotonic() < stop_at:
+        payload = {"message": "Where is QAStatus calculated?", "thread_id": f"load-{uuid.uuid4().hex}"}
+        start = time.perf_counter()
+        try:
+            async with client.stream("POST", f"{base_url}/api/chat", json=payload, timeout=60) as resp:
+                done = False
+                async for line in resp.aiter_lines():
+                    if line.startswith("event: done"):
+                        done = True
+                    elif line.startswith("event: error"):
+                        errors.append("error event")
+                if done:
+                    latencies.append((time.perf_counter() - start) * 1000)
+        except httpx.HTTPError as e:
+            errors.append(repr(e))
+
+
+async def run_load(base_url: str, concurrency: int, duration: float) -> dict:
+    latencies, errors = [], []
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits) as client:
+        start = time.monotonic()
+        stop_at = start + duration
+        await asyncio.gather(*[
+            _client_loop(client, base_url, stop_at, latencies, errors) for _ in range(concurrency)
+        ])
+        elapsed = time.monotonic() - start
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "req_per_s": round(len(latencies) / elapsed, 2),
+        "latency_ms": summary(latencies),
+    }
+
+
+def bench_startup(rounds: int = 20):
+    """Per-worker startup work with and without the snapshot cache."""
+    with tempfile.TemporaryDirectory(prefix="ng911-snap-") as workdir:
+        _bench_startup(workdir, rounds)
+
+
+def _bench_startup(workdir: str, rounds: int):
+    os.environ.update(API_WORKERS="2", SNAPSHOT_DIR=workdir)  # before core.snapshots is imported
+    import agent
+    from core import snapshots
+    from tools import navigation_tools
+
+    def timed(fn) -> list[float]:
+        out = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            fn()
+            out.append((time.perf_counter() - start) * 1000)
+        return out
+
+    build = [a + b for a, b in zip(timed(navigation_tools.build_navigation_map), timed(agent._build_file_map))]
+    snapshots.write_snapshot("file_map", {"text": agent._build_file_map()})
+    load = [a + b for a, b in zip(timed(lambda: snapshots.read_snapshot("navigation_map")),
+                                  timed(lambda: snapshots.read_snapshot("file_map")))]
+    size = sum(os.path.getsize(os.path.join(workdir, f)) for f in os.listdir(workdir))
+    b, l = summary(build), summary(load)
+    print(f"Per worker, nav map + file map ({rounds} rounds, snapshots {size / 1024:.0f} KB):")
+    print(f"  build from the repo   p50 {b['p50']:8.2f} ms   p95 {b['p95']:8.2f} ms")
+    print(f"  load the snapshots    p50 {l['p50']:8.2f} ms   p95 {l['p95']:8.2f} ms")
+    print("Each worker still holds its own parsed copy; the cache saves startup time, not memory.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NG911 API multi-worker load test")
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=15)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--startup", action="store_true", help="measure the snapshot cache instead")
+    args = parser.parse_args()
+    if args.startup:
+        bench_startup()
+        return
+
+    rows = []
+    for workers in [int(w) for w in args.workers.split(",")]:
+        with tempfile.TemporaryDirectory(prefix="ng911-load-") as workdir:
+            env = dict(
+                os.environ,
+                API_WORKERS=str(workers),
+                SNAPSHOT_DIR=os.path.join(workdir, "snapshots"),
+                CONVERSATIONS_DB_PATH=os.path.join(workdir, "conversations.db"),
+                TRACE_DB_PATH=os.path.join(workdir, "traces.db"),
+            )
+            proc = subprocess.Popen(
+                [sys.executable, "-m", "benchmarks.stub_app", "--workers", str(workers), "--port", str(args.port)],
+                cwd=_AI_DIR, env=env,
+            )
+            base_url = f"http://127.0.0.1:{args.port}"
+            try:
+                asyncio.run(_wait_ready(base_url))
+                result = asyncio.run(run_load(base_url, args.concurrency, args.duration))
+            finally:
+                proc.terminate()
+                proc.wait(timeout=30)
+        result["workers"] = workers
+        rows.append(result)
+        print(f"[{workers} worker(s)] {result['req_per_s']} req/s, "
+              f"p50={result['latency_ms']['p50']:.0f} ms, errors={result['errors']}")
+
+    base = rows[0]["req_per_s"] or 1
+    print(f"\n{'workers':>8}{'req/s':>10}{'scaling':>9}{'p50 ms':>9}{'p95 ms':>9}{'errors':>8}")
+    for r in rows:
+        print(f"{r['workers']:>8}{r['req_per_s']:>10.1f}{r['req_per_s'] / base:>8.2f}x"
+              f"{r['latency_ms']['p50']:>9.0f}{r['latency_ms']['p95']:>9.0f}{r['errors']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Partitioned vs single-collection retrieval (database/partitions.py).
+
+Builds the production chunking (ingest.split_documents defaults, deduplicated
+as ingest does) with HashingEmbeddings into:
+  - single:      one Chroma collection, as before KB_PARTITIONED
+  - partitioned: one Chroma collection per category
+  - flat:        the flat index (category masks), for reference
+then runs the golden set two ways and reports recall@k and p50 / p95 latency:
+  routed    the query's routed categories (partitions.route): a $in filter
+            on single and flat, only the routed partitions on partitioned.
+            "single / unfiltered" is the old default behaviour.
+  category  an explicit category filter (the category of the question's first
+            relevant file), as when the agent passes `category`: a filtered
+            search on single vs one partition. Recall counts only the
+            relevant files in that category.
+Latency includes embedding the query. Stand-in embeddings make absolute
+recall low; compare the rows with each other.
+
+Usage (run from AI/):
+    python -m benchmarks.bench_partitions
+    python -m benchmarks.bench_partitions --k 6 --repeats 20
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+from langchain_chroma import Chroma
+from benchmarks.bench_retrieval import _recall, _rel_path
+from benchmarks.fakes import HashingEmbeddings
+from benchmarks.golden_retrieval import GOLDEN_SET
+from benchmarks.stats import summary
+from database import dedup, flat_index, ingest, partitions
+
+_REPO_ROOT = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+
+
+def _build(chunks: list, workdir: str) -> dict:
+    """The three stores over the same chunks."""
+    embeddings = HashingEmbeddings()
+    single = Chroma(collection_name="single", persist_directory=workdir, embedding_function=embeddings)
+    stores = {}
+    for i in range(0, len(chunks), 100):
+        batch = chunks[i : i + 100]
+        single.add_documents(batch)
+        by_category = {}
+        for c in batch:
+            by_category.setdefault(c.metadata.get("category") or "other", []).append(c)
+        for category, docs in by_category.items():
+            if category not in stores:
+                stores[category] = Chroma(collection_name=partitions.collection_name("bench", category),
+                                          persist_directory=workdir, embedding_function=embeddings)
+            stores[category].add_documents(docs)
+    path = os.path.join(workdir, "flat")
+    flat_index.build(path, chunks, embeddings.embed_documents([c.page_content for c in chunks]))
+    return {
+        "single": single,
+        "partitioned": partitions.PartitionedStore(stores, embeddings),
+        "flat": flat_index.FlatIndex(path, embeddings),
+    }
+
+
+def _category(relevant: str) -> str:
+    return ingest._classify(os.path.join(_REPO_ROOT, relevant))["category"]
+
+
+def _run(store, cases: list[tuple], k: int, repeats: int) -> dict:
+    """cases: (question, filter, relevant files)."""
+    recalls, latencies = [], []
+    for question, search_filter, relevant in cases:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            hits = store.similarity_search_with_relevance_scores(question, k=k, filter=search_filter)
+            latencies.append((time.perf_counter() - start) * 1000)
+        recalls.append(_recall([_rel_path(d.metadata.get("source", "")) for d, _ in hits], relevant))
+    return {"recall": round(sum(recalls) / len(recalls), 3), "latency_ms": summary(latencies)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Partitioned vs single-collection retrieval")
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--repeats", type=int, default=10, help="latency samples per question")
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        chunks = ingest.split_documents(ingest.load_all_documents())
+    if dedup.KB_DEDUP:
+        chunks = list(dedup.apply(chunks, dedup.plan(chunks)))
+    sizes = {}
+    for c in chunks:
+        sizes[c.metadata.get("category")] = sizes.get(c.metadata.get("category"), 0) + 1
+    print(f"{len(chunks)} chunks: " + ", ".join(f"{c} {n}" for c, n in sorted(sizes.items())) + "\n")
+
+    routed = [(g["question"], partitions.route_filter(g["question"]), g["relevant"]) for g in GOLDEN_SET]
+    unfiltered = [(q, None, rel) for q, _, rel in routed]
+    by_category = []
+    for g in GOLDEN_SET:
+        category = _category(g["relevant"][0])
+        relevant = [r for r in g["relevant"] if _category(r) == category]
+        by_category.append((g["question"], {"category": category}, relevant))
+
+    rows = []
+    with tempfile.TemporaryDirectory(prefix="ng911-partitions-") as workdir:
+        stores = _build(chunks, workdir)
+        for name, store, cases, mode in [
+            ("single", stores["single"], unfiltered, "unfiltered"),
+            ("single", stores["single"], routed, "routed"),
+            ("partitioned", stores["partitioned"], routed, "routed"),
+            ("flat", stores["flat"], routed, "routed"),
+            ("single", stores["single"], by_category, "category"),
+            ("partitioned", stores["partitioned"], by_category, "category"),
+            ("flat", stores["flat"], by_category, "category"),
+        ]:
+            rows.append({"store": name, "mode": mode, **_run(store, cases, args.k, args.repeats)})
+
+    header = f"{'store':<13}{'mode':<12}{'recall@' + str(args.k):>10}{'p50 ms':>9}{'p95 ms':>9}"
+    print(header)
+    print("-" * len(header))
+    for r in rows:
+        print(f"{r['store']:<13}{r['mode']:<12}{r['recall']:>10.3f}{r['latency_ms']['p50']:>9.2f}"
+              f"{r['latency_ms']['p95']:>9.2f}")
+    skipped = sum(1 for _, f, _ in routed if f)
+    print(f"\nRouting narrowed {skipped} of {len(routed)} golden questions.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Labeled check of KB_MIN_RELEVANCE (database/compaction.py), which prefetch
+(SPECULATIVE_MIN_RELEVANCE, core/prefetch.py) reuses.
+
+Runs every golden question (benchmarks/golden_retrieval.py) against the active
+knowledge base with the production embeddings, without category routing, and
+labels each of the top-k hits relevant when it comes from one of the question's
+relevant files. Then sweeps the threshold and reports, for each value:
+  - relevant kept:    share of relevant hits at or above it (compact_hits also
+                      keeps the best hit of every search, as here)
+  - irrelevant cut:   share of irrelevant hits below it
+  - prefetch empty:   questions where no relevant hit clears it (prefetch has no
+                      best-hit exception, so the model gets no relevant context)
+and recommends the highest threshold that keeps --keep of the relevant hits.
+
+Relevance scores depend on the embedding model: run this against an index
+built with the model you serve (nomic-embed-text by default), and re-run it
+when that changes.
+
+Usage (run from AI/, with Ollama up and the knowledge base built):
+    python -m benchmarks.bench_relevance
+    python -m benchmarks.bench_relevance --k 8 --keep 0.9
+"""
+
+import argparse
+
+from benchmarks.bench_retrieval import _is_relevant, _rel_source
+from benchmarks.golden_retrieval import GOLDEN_SET
+from database.compaction import KB_MIN_RELEVANCE
+from database.retrieval import CHROMA_DB_DIR, open_store
+
+
+def label_hits(store, k: int) -> list[list[tuple[float, bool]]]:
+    """Per question: (relevance, is_relevant) for each of the top-k hits, best first."""
+    out = []
+    for item in GOLDEN_SET:
+        hits = store.similarity_search_with_relevance_scores(item["question"], k=k)
+        out.append([(score, _is_relevant(_rel_source(doc), item["relevant"])) for doc, score in hits])
+    return out
+
+
+def sweep(labeled: list[list[tuple[float, bool]]], threshold: float) -> dict:
+    kept = total_rel = cut = total_irr = empty = 0
+    for hits in labeled:
+        best = max((s for s, _ in hits), default=None)
+        for score, relevant in hits:
+            passes = score >= threshold or score == best
+            if relevant:
+                total_rel += 1
+                kept += passes
+            else:
+                total_irr += 1
+                cut += not passes
+        empty += not any(relevant and score >= threshold for score, relevant in hits)
+    return {
+        "threshold": threshold,
+        "relevant_kept": kept / max(total_rel, 1),
+        "irrelevant_cut": cut / max(total_irr, 1),
+        "prefetch_empty": empty,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Labeled check of the knowledge-base relevance threshold")
+    parser.add_argument("--k", type=int, default=8, help="hits per question (above SEARCH_K, to see the tail)")
+    parser.add_argument("--keep", type=float, default=0.95, help="share of relevant hits the threshold must keep")
+    args = parser.parse_args()
+
+    store = open_store(CHROMA_DB_DIR)
+    if store is None:
+        raise SystemExit(f"No knowledge base at {CHROMA_DB_DIR}; run database/ingest.py first")
+    labeled = label_hits(store, args.k)
+    scores = [s for hits in labeled for s, _ in hits]
+    n_rel = sum(r for hits in labeled for _, r in hits)
+    print(f"{len(labeled)} questions, {len(scores)} hits ({n_rel} relevant), "
+          f"relevance {min(scores):.2f} .. {max(scores):.2f}\n")
+
+    thresholds = sorted({round(t / 20, 2) for t in range(0, 17)} | {KB_MIN_RELEVANCE})
+    rows = [sweep(labeled, t) for t in thresholds]
+    print(f"{'threshold':>10}{'relevant kept':>15}{'irrelevant cut':>16}{'prefetch empty':>16}")
+    for r in rows:
+        mark = "  <- KB_MIN_RELEVANCE" if r["threshold"] == KB_MIN_RELEVANCE else ""
+        print(f"{r['threshold']:>10.2f}{r['relevant_kept']:>15.0%}{r['irrelevant_cut']:>16.0%}"
+              f"{r['prefetch_empty']:>10}/{len(labeled)}{mark}")
+
+    ok = [r for r in rows if r["relevant_kept"] >= args.keep]
+    if ok:
+        best = max(ok, key=lambda r: r["threshold"])
+        print(f"\nHighest threshold keeping {args.keep:.0%} of relevant hits: {best['threshold']:.2f} "
+              f"(cuts {best['irrelevant_cut']:.0%} of irrelevant hits)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Token savings of read_file's renderers (tools/file_tools.py) on the repo.
+
+Renders every HTML, JSON, CSS and JS file under the repo root (the same skip
+list as ingest) and reports, per type and for the largest files:
+  - chars before / after
+  - estimated tokens before / after (cl100k-style pre-tokenization: letter
+    runs, digit groups of up to 3, each other symbol, and each line break
+    with its indentation count as one token; close to BPE counts for markup
+    and code, without a tokenizer download)
+  - tokens read_file actually returns (both sides capped at 30 000 chars, so
+    a denser rendering can return more tokens here: more of the file fits)
+JS is returned verbatim; only files over the cap gain a declaration outline
+(so its before/after totals differ by the outlines).
+
+Usage (run from AI/):
+    python -m benchmarks.bench_renderers
+    python -m benchmarks.bench_renderers --top 15
+"""
+
+import argparse
+import os
+import re
+
+from database.ingest import SKIP_DIRS
+from tools.file_tools import READ_MAX_CHARS, render
+
+_REPO_ROOT = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+_TYPES = {".html": "html", ".htm": "html", ".json": "json", ".css": "css", ".js": "js", ".mjs": "js"}
+_TOKEN = re.compile(r"[A-Za-z]+|\d{1,3}|[^\sA-Za-z\d]|\n\s*")
+
+
+def estimate_tokens(text: str) -> int:
+    return len(_TOKEN.findall(text))
+
+
+def _files():
+    for root, dirs, files in os.walk(_REPO_ROOT):
+        dirs[:] = sorted(d for d in dirs if d not in SKIP_DIRS)
+        for name in sorted(files):
+            kind = _TYPES.get(os.path.splitext(name)[1].lower())
+            if kind:
+                yield os.path.join(root, name), kind
+
+
+def main():
+    parser = argparse.ArgumentParser(description="read_file renderer token savings")
+    parser.add_argument("--top", type=int, default=10, help="largest files to list")
+    args = parser.parse_args()
+
+    rows = []
+    for path, kind in _files():
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            raw = f.read()
+        rendered, _ = render(path, raw)
+        rows.append({
+            "file": os.path.relpath(path, _REPO_ROOT).replace("\\", "/"),
+            "kind": kind,
+            "chars": (len(raw), len(rendered)),
+            "tokens": (estimate_tokens(raw), estimate_tokens(rendered)),
+            "read": (estimate_tokens(raw[:READ_MAX_CHARS]), estimate_tokens(rendered[:READ_MAX_CHARS])),
+        })
+
+    header = (f"{'type':<6}{'files':>6}{'chars before':>14}{'after':>10}{'tokens before':>15}{'after':>10}"
+              f"{'saved':>8}{'read_file tokens':>18}{'after':>9}")
+    print(header)
+    print("-" * len(header))
+    for kind in ("html", "json", "css", "js", "all"):
+        group = [r for r in rows if kind in ("all", r["kind"])]
+        if not group:
+            continue
+        total = {k: (sum(r[k][0] for r in group), sum(r[k][1] for r in group)) for k in ("chars", "tokens", "read")}
+        saved = 1 - total["tokens"][1] / max(total["tokens"][0], 1)
+        print(f"{kind:<6}{len(group):>6}{total['chars'][0]:>14,}{total['chars'][1]:>10,}{total['tokens'][0]:>15,}"
+              f"{total['tokens'][1]:>10,}{saved:>8.0%}{total['read'][0]:>18,}{total['read'][1]:>9,}")
+
+    print(f"\nLargest {args.top} files by tokens:")
+    for r in sorted(rows, key=lambda r: -r["tokens"][0])[: args.top]:
+        before, after = r["tokens"]
+        print(f"  {before:>7,} -> {after:>7,} ({1 - after / max(before, 1):>4.0%})  {r['file']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+Retrieval quality and latency harness for the knowledge base.
+
+Rebuilds a throwaway Chroma index for every chunking configuration in the grid
+(chunk size x overlap x splitting preset) using HashingEmbeddings as a local
+embedding stand-in, then runs the golden set (benchmarks/golden_retrieval.py)
+at each k and reports:
+  - recall@k:  share of a question's relevant files present in the top-k chunks
+  - MRR:       1 / rank of the first chunk from a relevant file
+  - exact recall@k: the same metric from brute-force search over the stored
+    vectors, i.e. the ceiling the HNSW index would reach with perfect recall
+  - context chars: text the top-k chunks add to the prompt, per question
+  - compacted recall / chars: the same after database/compaction.py (threshold,
+    merging, snippets), i.e. what search_knowledge_base actually returns
+  - index size, chunk count and ingest time (split + embed + write)
+  - p50 / p95 query latency
+
+Absolute scores depend on the embedding model; use this to compare settings
+against each other, then confirm the winner with nomic-embed-text.
+
+Usage (run from AI/):
+    python -m benchmarks.bench_retrieval
+    python -m benchmarks.bench_retrieval --chunk-sizes 1000,2500 --overlaps 0,300 --ks 2,4,8
+    python -m benchmarks.bench_retrieval --separators structured,default,plain --output retrieval.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+from langchain_chroma import Chroma
+from benchmarks.fakes import HashingEmbeddings
+from benchmarks.golden_retrieval import GOLDEN_SET
+from benchmarks.stats import summary
+from database import ingest
+from database.compaction import KB_MIN_RELEVANCE, compact_hits
+
+# Splitting presets: structure-aware chunkers (production), the character splitter
+# with the production separators, and a structure-agnostic baseline
+SEPARATOR_PRESETS = {
+    "structured": {"structure_aware": True},
+    "default": {"separators": ingest.SEPARATORS, "structure_aware": False},
+    "plain": {"separators": ["\n\n", "\n", " "], "structure_aware": False},
+}
+
+_REPO_ROOT = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+
+
+def _rel_path(source: str) -> str:
+    return os.path.relpath(source, _REPO_ROOT).replace("\\", "/")
+
+
+def _rel_source(doc) -> str:
+    return _rel_path(doc.metadata.get("source", ""))
+
+
+def _is_relevant(source: str, relevant: list[str]) -> bool:
+    return any(source.endswith(r) for r in relevant)
+
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for root, _dirs, files in os.walk(path):
+        for f in files:
+            total += os.path.getsize(os.path.join(root, f))
+    return total
+
+
+def build_index(docs: list, workdir: str, name: str, chunk_size: int, chunk_overlap: int,
+                preset: dict) -> tuple[Chroma, dict]:
+    """Split + embed + persist one configuration. Returns the store and build stats."""
+    persist_dir = os.path.join(workdir, name)
+    start = time.perf_counter()
+    chunks = ingest.split_documents(docs, chunk_size, chunk_overlap, **preset)
+    store = Chroma(collection_name=name, persist_directory=persist_dir, embedding_function=HashingEmbeddings())
+    for i in range(0, len(chunks), 100):
+        store.add_documents(chunks[i : i + 100])
+    elapsed = time.perf_counter() - start
+    return store, {
+        "chunks": len(chunks),
+        "avg_chunk_chars": sum(len(c.page_content) for c in chunks) // max(len(chunks), 1),
+        "total_chars": sum(len(c.page_content) for c in chunks),
+        "ingest_s": round(elapsed, 2),
+        "index_bytes": _dir_size(persist_dir),
+    }
+
+
+def _recall(sources: list[str], relevant: list[str]) -> float:
+    found = {r for r in relevant if any(s.endswith(r) for s in sources)}
+    return len(found) / len(relevant)
+
+
+def _exact_sources(store: Chroma) -> tuple[np.ndarray, list[str]]:
+    data = store.get(include=["embeddings", "metadatas"])
+    matrix = np.asarray(data["embeddings"], dtype=np.float32)
+    sources = [
+        os.path.relpath(m.get("source", ""), _REPO_ROOT).replace("\\", "/") for m in data["metadatas"]
+    ]
+    return matrix, sources
+
+
+def evaluate(store: Chroma, k: int, repeats: int, exact: tuple[np.ndarray, list[str]] | None = None,
+             min_relevance: float = KB_MIN_RELEVANCE) -> dict:
+    """Run the golden set at top-k. Latency is sampled `repeats` times per question."""
+    recalls, exact_recalls, rranks, latencies, ctx_chars = [], [], [], [], []
+    compact_recalls, compact_chars = [], []
+    embeddings = HashingEmbeddings()
+    for item in GOLDEN_SET:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            docs = store.similarity_search(item["question"], k=k)
+            latencies.append((time.perf_counter() - start) * 1000)
+        sources = [_rel_source(d) for d in docs]
+        ctx_chars.append(sum(len(d.page_content) for d in docs))
+        compact = compact_hits(item["question"], store.similarity_search_with_relevance_scores(item["question"], k=k),
+                               min_relevance=min_relevance)
+        compact_chars.append(sum(len(r["text"]) for r in compact))
+        compact_recalls.append(_recall([_rel_path(r["source"]) for r in compact], item["relevant"]))
+        recalls.append(_recall(sources, item["relevant"]))
+        if exact is not None:
+            matrix, all_sources = exact
+            q = np.asarray(embeddings.embed_query(item["question"]), dtype=np.float32)
+            top = np.argsort(((matrix - q) ** 2).sum(axis=1))[:k]
+            exact_recalls.append(_recall([all_sources[i] for i in top], item["relevant"]))
+        rank = next((i for i, s in enumerate(sources, 1) if _is_relevant(s, item["relevant"])), None)
+        rranks.append(1 / rank if rank else 0.0)
+    return {
+        "recall": round(sum(recalls) / len(recalls), 3),
+        "mrr": round(sum(rranks) / len(rranks), 3),
+        "exact_recall": round(sum(exact_recalls) / len(exact_recalls), 3) if exact_recalls else None,
+        "ctx_chars": sum(ctx_chars) // len(ctx_chars),
+        "compact_recall": round(sum(compact_recalls) / len(compact_recalls), 3),
+        "compact_chars": sum(compact_chars) // len(compact_chars),
+        "latency_ms": summary(latencies),
+    }
+
+
+def _ints(text: str) -> list[int]:
+    return [int(x) for x in text.split(",") if x.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NG911 retrieval quality/latency harness")
+    parser.add_argument("--chunk-sizes", default=f"1000,1500,{ingest.CHUNK_SIZE},4000")
+    parser.add_argument("--overlaps", default=f"0,{ingest.CHUNK_OVERLAP}")
+    parser.add_argument("--ks", default="2,4,6,8")
+    parser.add_argument("--separators", default="structured", help=f"comma list of: {', '.join(SEPARATOR_PRESETS)}")
+    parser.add_argument("--min-relevance", type=float, default=KB_MIN_RELEVANCE,
+                        help="compaction threshold (scores from the stand-in embeddings run lower than nomic's)")
+    parser.add_argument("--repeats", type=int, default=5, help="latency samples per question")
+    parser.add_argument("--output", help="write results JSON here")
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        docs = ingest.load_all_documents()
+    print(f"Loaded {len(docs)} source documents; {len(GOLDEN_SET)} golden questions.\n")
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="ng911-retrieval-") as workdir:
+        for sep_name in args.separators.split(","):
+            for size in _ints(args.chunk_sizes):
+                for overlap in _ints(args.overlaps):
+                    if overlap >= size:
+                        continue
+                    name = f"c{size}_o{overlap}_{sep_name}"
+                    store, build = build_index(docs, workdir, name, size, overlap, SEPARATOR_PRESETS[sep_name])
+                    exact = _exact_sources(store)
+                    for k in _ints(args.ks):
+                        row = {"chunk_size": size, "overlap": overlap, "separators": sep_name, "k": k, **build}
+                        row.update(evaluate(store, k, args.repeats, exact, args.min_relevance))
+                        results.append(row)
+
+    header = f"{'config':<25}{'k':>3}{'recall':>8}{'MRR':>7}{'exact':>7}{'ctx ch':>8}{'cmp rec':>8}{'cmp ch':>8}{'chunks':>8}{'index KB':>10}{'ingest s':>10}{'p50 ms':>8}{'p95 ms':>8}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        config = f"{r['chunk_size']}/{r['overlap']}/{r['separators']}"
+        print(f"{config:<25}{r['k']:>3}{r['recall']:>8.3f}{r['mrr']:>7.3f}{r['exact_recall']:>7.3f}{r['ctx_chars']:>8}{r['compact_recall']:>8.3f}{r['compact_chars']:>8}{r['chunks']:>8}"
+              f"{r['index_bytes'] // 1024:>10}{r['ingest_s']:>10.2f}"
+              f"{r['latency_ms']['p50']:>8.2f}{r['latency_ms']['p95']:>8.2f}")
+
+    current = next(
+        (r for r in results if r["chunk_size"] == ingest.CHUNK_SIZE and r["overlap"] == ingest.CHUNK_OVERLAP
+         and r["separators"] == "structured" and r["k"] == 4),
+        None,
+    )
+    best = max(results, key=lambda r: (r["recall"], r["mrr"], -r["latency_ms"]["p50"]))
+    if current:
+        print(f"\nCurrent settings ({ingest.CHUNK_SIZE}/{ingest.CHUNK_OVERLAP}, k=4): "
+              f"recall={current['recall']:.3f} MRR={current['mrr']:.3f}")
+    print(f"Best in grid ({best['chunk_size']}/{best['overlap']}/{best['separators']}, k={best['k']}): "
+          f"recall={best['recall']:.3f} MRR={best['mrr']:.3f}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
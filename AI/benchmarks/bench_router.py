@@ -0,0 +1,153 @@
+"""
+Accuracy and latency harness for the heuristic router (core/router.py).
+
+Runs every message in benchmarks/router_labels.py through router.classify() and reports:
+  - accuracy, a confusion matrix, and under-routing (a cheaper tier than the
+    label, i.e. a quality risk) vs over-routing (wasted time only)
+  - the router's own cost per call, next to one LLM routing call as in the
+    archived supervisor
+  - estimated generation time saved against the pre-router behaviour (every
+    request on the main model with thinking on), from a token-throughput model
+    whose assumptions are command-line flags
+
+--fit refits the scorer weights (ridge least squares on tier index 0/1/2),
+prints leave-one-out accuracy, and prints a WEIGHTS dict to paste into core/router.py.
+
+Usage (run from AI/):
+    python -m benchmarks.bench_router
+    python -m benchmarks.bench_router --main-tps 90 --small-tps 160 --thinking-tokens 900
+    python -m benchmarks.bench_router --fit
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.router_labels import ROUTER_LABELS
+from benchmarks.stats import summary
+from core import router
+
+
+def _rule_tier(item: dict) -> str | None:
+    """The tier a rule assigns before the scorer runs, if any."""
+    _tier, reason = router.classify(item["message"], item.get("screenshot", False), item.get("page_errors", False))
+    return None if reason.startswith("score") else _tier
+
+
+def _matrix(items: list[dict]) -> tuple[np.ndarray, np.ndarray]:
+    names = list(router.WEIGHTS)
+    rows, targets = [], []
+    for item in items:
+        feats = router.features(item["message"], item.get("screenshot", False), item.get("page_errors", False))
+        rows.append([1.0] + [feats[n] for n in names if n != "bias"])
+        targets.append(router.TIERS.index(item["tier"]))
+    return np.asarray(rows), np.asarray(targets, dtype=float)
+
+
+def _fit(items: list[dict], ridge: float) -> dict:
+    x, y = _matrix(items)
+    reg = ridge * np.eye(x.shape[1])
+    reg[0, 0] = 0.0  # do not shrink the bias
+    w = np.linalg.solve(x.T @ x + reg, x.T @ y)
+    names = ["bias"] + [n for n in router.WEIGHTS if n != "bias"]
+    return {n: round(float(v), 3) for n, v in zip(names, w)}
+
+
+def _tier_from_score(item: dict, weights: dict) -> str:
+    rule = _rule_tier(item)
+    if rule:
+        return rule
+    feats = router.features(item["message"], item.get("screenshot", False), item.get("page_errors", False))
+    s = router.score(feats, weights)
+    return "fast" if s < 0.5 else "deep" if s >= 1.5 else "standard"
+
+
+def fit(ridge: float):
+    # Rule-decided messages never reach the scorer, so they are left out of the fit
+    scored = [item for item in ROUTER_LABELS if not _rule_tier(item)]
+    weights = _fit(scored, ridge)
+    loo_hits = 0
+    for item in ROUTER_LABELS:
+        if _rule_tier(item):
+            loo_hits += _rule_tier(item) == item["tier"]
+            continue
+        held_out = _fit([s for s in scored if s is not item], ridge)
+        loo_hits += _tier_from_score(item, held_out) == item["tier"]
+    train_hits = sum(_tier_from_score(item, weights) == item["tier"] for item in ROUTER_LABELS)
+    print(f"Fitted on {len(scored)} scored messages (ridge={ridge}); "
+          f"training accuracy {train_hits / len(ROUTER_LABELS):.3f}, "
+          f"leave-one-out accuracy {loo_hits / len(ROUTER_LABELS):.3f}\n")
+    print("WEIGHTS = {")
+    for name, value in weights.items():
+        print(f'    "{name}": {value},')
+    print("}")
+
+
+def _turn_seconds(tier: str, args) -> float:
+    """Estimated generation seconds for one turn routed to `tier`."""
+    if tier == "fast":
+        return args.answer_tokens / (args.small_tps if router.SMALL_MODEL or args.assume_small else args.main_tps)
+    if tier == "standard":
+        return args.answer_tokens / args.main_tps
+    return (args.answer_tokens + args.thinking_tokens) / args.main_tps
+
+
+def evaluate(args):
+    predicted, timings = [], []
+    for item in ROUTER_LABELS:
+        start = time.perf_counter()
+        tier, _ = router.classify(item["message"], item.get("screenshot", False), item.get("page_errors", False))
+        timings.append((time.perf_counter() - start) * 1e6)
+        predicted.append(tier)
+
+    labels = [item["tier"] for item in ROUTER_LABELS]
+    correct = sum(p == t for p, t in zip(predicted, labels))
+    under = sum(router.TIERS.index(p) < router.TIERS.index(t) for p, t in zip(predicted, labels))
+    over = sum(router.TIERS.index(p) > router.TIERS.index(t) for p, t in zip(predicted, labels))
+    print(f"{len(labels)} labeled messages: accuracy {correct / len(labels):.3f}, "
+          f"under-routed {under}, over-routed {over}\n")
+
+    print(f"{'label / routed':<16}" + "".join(f"{t:>10}" for t in router.TIERS))
+    for t in router.TIERS:
+        row = [sum(1 for p, l in zip(predicted, labels) if l == t and p == q) for q in router.TIERS]
+        print(f"{t:<16}" + "".join(f"{n:>10}" for n in row))
+
+    misses = [(item["message"], item["tier"], p) for item, p in zip(ROUTER_LABELS, predicted) if p != item["tier"]]
+    if misses:
+        print("\nMisrouted:")
+        for message, label, got in misses:
+            print(f"  [{label} -> {got}] {message[:90]}")
+
+    stats = summary(timings)
+    print(f"\nRouter cost: p50 {stats['p50']:.1f} us, p95 {stats['p95']:.1f} us per call "
+          f"(LLM routing call as in the archived supervisor: ~{args.supervisor_s:.1f} s)")
+
+    baseline = sum(_turn_seconds("deep", args) for _ in labels)
+    routed = sum(_turn_seconds(p, args) for p in predicted)
+    small = "SMALL_MODEL" if router.SMALL_MODEL else ("assumed small model" if args.assume_small else "main model")
+    print(f"\nEstimated generation time over the set (fast tier on {small}):")
+    print(f"  all deep (pre-router): {baseline:8.1f} s  ({baseline / len(labels):.1f} s/turn)")
+    print(f"  routed:                {routed:8.1f} s  ({routed / len(labels):.1f} s/turn)")
+    print(f"  saved:                 {baseline - routed:8.1f} s  ({(baseline - routed) / baseline:.0%})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Heuristic router accuracy / latency harness")
+    parser.add_argument("--fit", action="store_true", help="refit the scorer weights and print them")
+    parser.add_argument("--ridge", type=float, default=1.0)
+    parser.add_argument("--main-tps", type=float, default=90.0, help="main model decode tokens/s")
+    parser.add_argument("--small-tps", type=float, default=160.0, help="small model decode tokens/s")
+    parser.add_argument("--answer-tokens", type=int, default=300, help="typical answer length")
+    parser.add_argument("--thinking-tokens", type=int, default=900, help="typical thinking length")
+    parser.add_argument("--supervisor-s", type=float, default=1.5, help="one LLM routing call")
+    parser.add_argument("--assume-small", action="store_true", help="estimate as if SMALL_MODEL were set")
+    args = parser.parse_args()
+    if args.fit:
+        fit(args.ridge)
+    else:
+        evaluate(args)
+
+
+if __name__ == "__main__":
+    main()
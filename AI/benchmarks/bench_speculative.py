@@ -0,0 +1,101 @@
+"""
+Coverage and latency harness for speculative retrieval (core/prefetch.py).
+
+Builds a throwaway index at the production chunking settings with
+HashingEmbeddings (as benchmarks/bench_retrieval.py does), then prefetches for
+every golden question at each relevance threshold and reports:
+  - coverage: share of questions whose injected context contains at least one
+    relevant source, i.e. turns where the first model call could answer
+    without a retrieval tool call
+  - recall:   share of each question's relevant files in the context
+  - empty:    share of questions where nothing cleared the threshold
+  - injected context chars per question
+  - prefetch latency p50 / p95, next to SPECULATIVE_WAIT_S (how long the
+    first model call waits for it)
+
+Scores from the stand-in embeddings run lower than nomic-embed-text's, so
+compare thresholds against each other here and confirm the production
+threshold on a real index.
+
+Usage (run from AI/):
+    python -m benchmarks.bench_speculative
+    python -m benchmarks.bench_speculative --thresholds -1,0,0.1,0.2 --repeats 5
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+from benchmarks.bench_retrieval import SEPARATOR_PRESETS, _recall, build_index
+from benchmarks.golden_retrieval import GOLDEN_SET
+from benchmarks.stats import summary
+from core import prefetch
+from database import ingest
+from tools import knowledge_tools
+
+_REPO_ROOT = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+
+
+def _rel(source: str) -> str:
+    return os.path.relpath(source, _REPO_ROOT).replace("\\", "/")
+
+
+def evaluate(threshold: float, repeats: int) -> dict:
+    covered, recalls, chars, latencies, empty = 0, [], [], [], 0
+    for item in GOLDEN_SET:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            results = prefetch.gather(item["question"], min_relevance=threshold)
+            text = prefetch.format_context(results)
+            latencies.append((time.perf_counter() - start) * 1000)
+        sources = [_rel(r["source"]) for r in results]
+        recall = _recall(sources, item["relevant"])
+        covered += recall > 0
+        recalls.append(recall)
+        chars.append(len(text))
+        empty += not text
+    n = len(GOLDEN_SET)
+    return {
+        "threshold": threshold,
+        "coverage": round(covered / n, 3),
+        "recall": round(sum(recalls) / n, 3),
+        "empty": round(empty / n, 3),
+        "chars": sum(chars) // n,
+        "latency_ms": summary(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Speculative retrieval coverage / latency harness")
+    parser.add_argument("--thresholds", default=f"-1,0,0.1,{prefetch.SPECULATIVE_MIN_RELEVANCE}",
+                        help="comma list of minimum relevance scores to try")
+    parser.add_argument("--repeats", type=int, default=3, help="latency samples per question")
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        docs = ingest.load_all_documents()
+    print(f"Loaded {len(docs)} source documents; {len(GOLDEN_SET)} golden questions.\n")
+
+    rows = []
+    with tempfile.TemporaryDirectory(prefix="ng911-speculative-") as workdir:
+        store, build = build_index(docs, workdir, "speculative", ingest.CHUNK_SIZE, ingest.CHUNK_OVERLAP,
+                                   SEPARATOR_PRESETS["structured"])
+        knowledge_tools._get_vector_store = lambda: store
+        for threshold in sorted({float(t) for t in args.thresholds.split(",") if t.strip()}):
+            rows.append(evaluate(threshold, args.repeats))
+
+    header = f"{'min rel':>8}{'coverage':>10}{'recall':>8}{'empty':>7}{'chars':>7}{'p50 ms':>8}{'p95 ms':>8}"
+    print(header)
+    print("-" * len(header))
+    for r in rows:
+        print(f"{r['threshold']:>8.2f}{r['coverage']:>10.3f}{r['recall']:>8.3f}{r['empty']:>7.2f}{r['chars']:>7}"
+              f"{r['latency_ms']['p50']:>8.1f}{r['latency_ms']['p95']:>8.1f}")
+    print(f"\n{build['chunks']} chunks. The first model call waits up to {prefetch.SPECULATIVE_WAIT_S * 1000:.0f} ms "
+          "for the prefetch (SPECULATIVE_WAIT_S); query embedding with nomic-embed-text adds its own latency.")
+
+
+if __name__ == "__main__":
+    main()
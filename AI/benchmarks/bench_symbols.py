@@ -0,0 +1,81 @@
+"""
+lookup_symbol vs search_codebase + read_file for "show me X" questions.
+
+Builds the symbol index from the ingest sources (database/symbols.py) and,
+for every name defined exactly once, compares what the agent gets back:
+  old   search_codebase(name), then read_file on the defining file (the best
+        case: the model picks the right file from the matches). Two tool
+        rounds, or more when the definition is not among the 20 matches.
+  new   lookup_symbol(name): the definition alone, one round.
+Tokens are estimated as in bench_renderers.py. read_file runs against
+PROJECT_ROOT (AI/data), the copy of the sources the file tools see.
+
+Usage (run from AI/):
+    python -m benchmarks.bench_symbols
+    python -m benchmarks.bench_symbols --show 10
+"""
+
+import argparse
+import contextlib
+import io
+import re
+
+from benchmarks.bench_renderers import estimate_tokens
+from benchmarks.stats import summary
+from database import symbols
+from tools.file_tools import read_file, search_codebase
+from tools.symbol_tools import format_lookup
+
+
+def _data_path(rel_path: str) -> str:
+    """Repo path -> the same file under PROJECT_ROOT (AI/data mirrors NG911System/ at its top)."""
+    return rel_path.removeprefix("NG911System/")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="lookup_symbol vs search_codebase + read_file")
+    parser.add_argument("--show", type=int, default=5, help="largest savings to list")
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        index = symbols.build()
+    rows = []
+    for name, entries in sorted(index["symbols"].items()):
+        if len(entries) != 1:
+            continue  # ambiguous names need file= on lookup_symbol as well
+        entry = entries[0]
+        path = _data_path(entry["file"])
+        search = search_codebase.invoke({"pattern": re.escape(name.rsplit(".", 1)[-1])})  # methods by bare name
+        read = read_file.invoke({"file_path": path})
+        if read.startswith("Error"):
+            continue  # not mirrored under PROJECT_ROOT
+        lookup = format_lookup(index, name, symbols.lookup(index, name))
+        rows.append({
+            "name": name,
+            "kind": entry["kind"],
+            "old": estimate_tokens(search) + estimate_tokens(read),
+            "new": estimate_tokens(lookup),
+            "found": path.replace("/", "") in search.replace("\\", "").replace("/", ""),
+        })
+
+    header = f"{'kind':<10}{'names':>6}{'old p50':>9}{'old p95':>9}{'new p50':>9}{'new p95':>9}{'saved':>8}{'search hit':>12}"
+    print(header)
+    print("-" * len(header))
+    for kind in ("function", "method", "class", "constant", "variable", "all"):
+        group = [r for r in rows if kind in ("all", r["kind"])]
+        if not group:
+            continue
+        old, new = summary([r["old"] for r in group]), summary([r["new"] for r in group])
+        saved = 1 - sum(r["new"] for r in group) / max(sum(r["old"] for r in group), 1)
+        hits = sum(r["found"] for r in group) / len(group)
+        print(f"{kind:<10}{len(group):>6}{old['p50']:>9,.0f}{old['p95']:>9,.0f}{new['p50']:>9,.0f}"
+              f"{new['p95']:>9,.0f}{saved:>8.0%}{hits:>12.0%}")
+    print("\nTool rounds: 1 with lookup_symbol; 2 without, when the search lists the defining file.")
+
+    print(f"\nLargest {args.show} savings (tokens):")
+    for r in sorted(rows, key=lambda r: r["new"] - r["old"])[: args.show]:
+        print(f"  {r['old']:>7,} -> {r['new']:>6,}  {r['name']} ({r['kind']})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Fixed question corpus for the offline agent benchmark.
+Each entry pairs a user question with the scripted AI turns the stub LLM replays.
+Tool arguments point at real files under AI/data (the read-only tool root),
+so tool latency is measured against the actual corpus.
+"""
+
+from benchmarks.fakes import text_turn, tool_turn
+
+_FILLER = (
+    "The nightly pipeline reconciles municipal versions into Default, runs the "
+    "QA GP tool against SDE.NG911_SiteAddress and exports the SSAP deliverable. "
+)
+
+
+def answer_text(words: int) -> str:
+    """Deterministic answer text of roughly `words` words."""
+    base = _FILLER.split()
+    return " ".join(base[i % len(base)] for i in range(words))
+
+
+QUESTIONS = [
+    {
+        "id": "greeting",
+        "question": "hi",
+        "script": [text_turn("Hello. Ask me anything about the NG911 addressing system.")],
+    },
+    {
+        "id": "portal_ids",
+        "question": "What is the Portal ID of the QA GP tool?",
+        "script": [
+            tool_turn(("read_file", {"file_path": "Documentation/System_Dependencies.md"})),
+            text_turn("The QA GP tool is Portal item 0aef1fe4cdd94edea1488f52cabca7a0 (Regional/QA/GPServer)."),
+        ],
+    },
+    {
+        "id": "field_count",
+        "question": "How many fields does the SiteAddress feature class have?",
+        "script": [
+            tool_turn(("read_file", {"file_path": "Documentation/Database_Schema_Summary.md"})),
+            text_turn(answer_text(60)),
+        ],
+    },
+    {
+        "id": "where_defined",
+        "question": "Where is QAStatus calculated?",
+        "script": [
+            tool_turn(("search_codebase", {"pattern": "QAStatus"})),
+            text_turn(answer_text(40)),
+        ],
+    },
+    {
+        "id": "kb_broad",
+        "question": "How does the nightly reconcile pipeline work?",
+        "script": [
+            tool_turn(("search_knowledge_base", {"query": "nightly reconcile post pipeline"})),
+            text_turn(answer_text(150)),
+        ],
+    },
+    {
+        "id": "navigation",
+        "question": "Take me to the St_PreTyp field",
+        "script": [
+            tool_turn(("get_navigation_target", {"topic": "St_PreTyp"})),
+            text_turn("{{nav:schema-guide#field-St_PreTyp|St_PreTyp field}}"),
+        ],
+    },
+    {
+        "id": "browse",
+        "question": "What scripts are in the reconcile folder?",
+        "script": [
+            tool_turn(("list_directory", {"directory_path": "Database Scripts/1.ReconcilePost-QA-Export"})),
+            text_turn(answer_text(50)),
+        ],
+    },
+    {
+        "id": "multi_tool",
+        "question": "What parameters does the Export GP tool take and where do I run it?",
+        "script": [
+            tool_turn(
+                ("read_file", {"file_path": "Database Scripts/1.ReconcilePost-QA-Export/ExportGPtool.py"}),
+                ("search_knowledge_base", {"query": "Export GP tool parameters", "category": "documentation"}),
+                ("get_navigation_target", {"topic": "export"}),
+            ),
+            text_turn(answer_text(120)),
+        ],
+    },
+    {
+        "id": "multi_step",
+        "question": "Compare the Full Address rule with the schema definition of Full_Addr.",
+        "script": [
+            tool_turn(("search_codebase", {"pattern": "Full_Addr", "extensions": "txt"})),
+            tool_turn(("read_file", {"file_path": "Database Scripts/0.Attribute Rules/1.Full Address.txt"})),
+            tool_turn(("read_file", {"file_path": "Documentation/Database_Schema_Summary.md"})),
+            text_turn(answer_text(200)),
+        ],
+    },
+]
+
+# Long single-step answer used for the SSE throughput measurement
+SSE_ANSWER_WORDS = 2000
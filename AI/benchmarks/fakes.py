@@ -0,0 +1,163 @@
+"""
+Offline stand-ins for Ollama used by the benchmark suite.
+- ScriptedChatModel: replays a fixed queue of AI turns (tool calls or text),
+  streaming text token-by-token so the SSE path is exercised realistically.
+- HashingEmbeddings: deterministic bag-of-words feature-hashing embeddings.
+  Carries real lexical signal (unlike random fakes), so retrieval quality
+  numbers are meaningful relative to each other — but not to nomic-embed-text.
+No network, no GPU.
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import re
+import time
+from collections import deque
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+
+# ─── Scripted Chat Model ─────────────────────────────────────────────
+def tool_turn(*calls: tuple[str, dict]) -> dict:
+    """Script entry: one AI step that calls the given (tool_name, args) pairs."""
+    return {"tool_calls": [{"name": n, "args": a} for n, a in calls]}
+
+
+def text_turn(text: str) -> dict:
+    """Script entry: one AI step that answers with `text`."""
+    return {"text": text}
+
+
+class ScriptedChatModel(BaseChatModel):
+    """
+    Deterministic chat model that pops one scripted turn per call.
+    - token_delay: seconds to sleep per streamed token (0 = measure pure framework cost).
+    - tool_delay: seconds to sleep before emitting a tool-call turn (simulated decode).
+    - responder: optional callable(messages) -> turn, used instead of the queue when
+      many conversations run concurrently (e.g. the load test).
+    Load turns with push(); the queue is shared across threads, so run questions sequentially.
+    """
+
+    token_delay: float = 0.0
+    tool_delay: float = 0.0
+    queue: deque = None
+    calls: int = 0
+    responder: object = None
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.queue = deque()
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools, **kwargs):
+        # Tool schemas are irrelevant to a scripted model
+        return self
+
+    def push(self, *turns: dict):
+        self.queue.extend(turns)
+
+    def _next_turn(self, messages) -> dict:
+        self.calls += 1
+        if self.responder is not None:
+            return self.responder(messages)
+        if not self.queue:
+            return text_turn("(script exhausted)")
+        return self.queue.popleft()
+
+    def _tool_calls(self, turn: dict) -> list[dict]:
+        return [
+            {"name": tc["name"], "args": tc["args"], "id": f"call_{self.calls}_{i}"}
+            for i, tc in enumerate(turn["tool_calls"])
+        ]
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        turn = self._next_turn(messages)
+        if "tool_calls" in turn:
+            msg = AIMessage(content="", tool_calls=self._tool_calls(turn))
+        else:
+            msg = AIMessage(content=turn["text"])
+        return ChatResult(generations=[ChatGeneration(message=msg)])
+
+    def _chunks(self, turn: dict):
+        if "tool_calls" in turn:
+            yield AIMessageChunk(
+                content="",
+                tool_call_chunks=[
+                    {"name": tc["name"], "args": json.dumps(tc["args"]), "id": tc["id"], "index": i}
+                    for i, tc in enumerate(self._tool_calls(turn))
+                ],
+            )
+            return
+        for token in re.findall(r"\S+\s*", turn["text"]):
+            yield AIMessageChunk(content=token)
+        n = len(turn["text"].split())
+        yield AIMessageChunk(
+            content="",
+            usage_metadata={"input_tokens": 0, "output_tokens": n, "total_tokens": n},
+        )
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        turn = self._next_turn(messages)
+        if "tool_calls" in turn and self.tool_delay:
+            time.sleep(self.tool_delay)
+        for chunk in self._chunks(turn):
+            if self.token_delay and chunk.content:
+                time.sleep(self.token_delay)
+            if run_manager and chunk.content:
+                run_manager.on_llm_new_token(chunk.content)
+            yield ChatGenerationChunk(message=chunk)
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        turn = self._next_turn(messages)
+        if "tool_calls" in turn and self.tool_delay:
+            await asyncio.sleep(self.tool_delay)
+        for chunk in self._chunks(turn):
+            if self.token_delay and chunk.content:
+                await asyncio.sleep(self.token_delay)
+            if run_manager and chunk.content:
+                await run_manager.on_llm_new_token(chunk.content)
+            yield ChatGenerationChunk(message=chunk)
+
+
+# ─── Hashing Embeddings ──────────────────────────────────────────────
+_TOKEN_RE = re.compile(r"[a-z][a-z0-9_]{2,}")  # identifiers/words of 3+ chars
+_STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i in is it of on or that the this "
+    "to what when where which who why with you your".split()
+)
+
+
+class HashingEmbeddings(Embeddings):
+    """
+    Signed feature hashing over lowercase word unigrams + bigrams (stopwords
+    dropped), L2-normalized.
+    Drop-in for OllamaEmbeddings wherever get_embeddings() is used.
+    """
+
+    def __init__(self, size: int = 768):
+        self.size = size
+
+    def _embed(self, text: str) -> list[float]:
+        vec = [0.0] * self.size
+        tokens = [t for t in _TOKEN_RE.findall(text.lower()) if t not in _STOPWORDS]
+        # Texts with no word tokens (punctuation, CSS braces) fall back to one
+        # whole-text feature: a zero vector would sit closer to every query under L2.
+        features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])] or [text]
+        for feat in features:
+            h = int.from_bytes(hashlib.blake2b(feat.encode(), digest_size=8).digest(), "little")
+            vec[h % self.size] += 1.0 if (h >> 63) & 1 else -1.0
+        norm = math.sqrt(sum(v * v for v in vec)) or 1.0
+        return [v / norm for v in vec]
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._embed(text)
@@ -0,0 +1,96 @@
+"""
+Golden retrieval set for the NG911 knowledge base.
+Each question lists the source files (repo-relative, forward slashes) that a
+good retrieval should surface. Matching is by path suffix, so entries stay valid
+regardless of where the repo is checked out.
+"""
+
+_RULES = "NG911System/Database Scripts/0.Attribute Rules/"
+_SCRIPTS = "NG911System/Database Scripts/1.ReconcilePost-QA-Export/"
+_ETL = "NG911System/Database Scripts/2. Salmon Arm Sync/"
+_DOCS = "Context/Documentation/"
+_WEB = "Web App/docs/"
+
+GOLDEN_SET = [
+    {
+        "question": "How do users log in and how are admin users detected?",
+        "relevant": [_DOCS + "Authentication_RBAC_Guide.md", _WEB + "auth.js"],
+    },
+    {
+        "question": "What parameters does the Export GP tool take?",
+        "relevant": [_DOCS + "GP_Tools_Complete_Guide.md", _SCRIPTS + "ExportGPtool.py"],
+    },
+    {
+        "question": "How is the NGUID attribute generated?",
+        "relevant": [_RULES + "2.NGUID.txt", _DOCS + "Attribute_Rules_Reference.md"],
+    },
+    {
+        "question": "How is Full_Addr assembled from the street name parts?",
+        "relevant": [_RULES + "1.Full Address.txt", _DOCS + "Attribute_Rules_Reference.md"],
+    },
+    {
+        "question": "What are the stages of the nightly reconcile pipeline?",
+        "relevant": [_DOCS + "Nightly_Pipeline_Operations.md",
+                     _SCRIPTS + "1.NG911-Reconcile Municipal-QA- Reconcile Default.py"],
+    },
+    {
+        "question": "What QAStatus values can an address have?",
+        "relevant": [_DOCS + "Domains_Reference.md", _RULES + "7.QAStatus.txt"],
+    },
+    {
+        "question": "How does the Salmon Arm ETL sync addresses into the central database?",
+        "relevant": [_ETL + "2.NG911-SalmonArmETL.py"],
+    },
+    {
+        "question": "How does an admin edit CMS content in the Documentation Hub?",
+        "relevant": [_DOCS + "CMS_Admin_Guide.md", _WEB + "cms-core.js"],
+    },
+    {
+        "question": "What is the Portal ID of the ReconcilePostTraditional geoprocessing service?",
+        "relevant": [_DOCS + "System_Dependencies.md"],
+    },
+    {
+        "question": "How does the Sync App choose the source and target match fields?",
+        "relevant": [_DOCS + "Sync_App_User_Guide.md", _WEB + "sync-app.js"],
+    },
+    {
+        "question": "The AI service fails with a port 8000 binding error WinError 10048",
+        "relevant": [_DOCS + "System_Troubleshooting_Guide.md"],
+    },
+    {
+        "question": "How are Latitude and Longitude calculated from the point geometry?",
+        "relevant": [_RULES + "3.Longitude.txt", _RULES + "4.Latitude.txt"],
+    },
+    {
+        "question": "Which AddCode maps to each municipality?",
+        "relevant": [_RULES + "5.Addcode.txt", _DOCS + "Domains_Reference.md"],
+    },
+    {
+        "question": "What does the Power Automate email for the Salmon Arm sync contain?",
+        "relevant": [_ETL + "PowerautomateEmail-SalmonArmsync.html"],
+    },
+    {
+        "question": "Which fields are enforced by the mandatory constraint rule?",
+        "relevant": [_RULES + "A.Mandatory (constraint rule).txt"],
+    },
+    {
+        "question": "How does the router load HTML partials for each page route?",
+        "relevant": [_WEB + "router.js"],
+    },
+    {
+        "question": "What are the Revelstoke access details and editing workflow?",
+        "relevant": [_DOCS + "Municipal_Operations_Handbook.md", _WEB + "partials/revelstoke.html"],
+    },
+    {
+        "question": "When does the DateUpdate rule set the date?",
+        "relevant": [_RULES + "6.DateUpdate.txt"],
+    },
+    {
+        "question": "How does the Documentation Hub search box find pages?",
+        "relevant": [_WEB + "search-core.js"],
+    },
+    {
+        "question": "How does the QA GP tool validate addresses and flag duplicates?",
+        "relevant": [_SCRIPTS + "QASSAPGPtool.py", _DOCS + "GP_Tools_Complete_Guide.md"],
+    },
+]
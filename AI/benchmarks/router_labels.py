@@ -0,0 +1,81 @@
+"""
+Labeled routing set for core/router.py (see benchmarks/bench_router.py).
+Each message is labeled with the cheapest tier that answers it well:
+  fast      small model, no thinking: greetings, navigation, single-value lookups
+  standard  main model, no thinking:  explanations and how-tos answered from the docs/code
+  deep      main model, thinking:     debugging, errors, comparisons, writing or changing code
+Optional "screenshot" / "page_errors" flags mirror what the UI sends with the message.
+"""
+
+ROUTER_LABELS = [
+    # ─── fast ────────────────────────────────────────────────────────
+    {"message": "hi", "tier": "fast"},
+    {"message": "Hello!", "tier": "fast"},
+    {"message": "thanks, that helped", "tier": "fast"},
+    {"message": "ok thank you", "tier": "fast"},
+    {"message": "good morning", "tier": "fast"},
+    {"message": "Take me to the St_PreTyp field", "tier": "fast"},
+    {"message": "where is the GP tools page", "tier": "fast"},
+    {"message": "open the schema guide", "tier": "fast"},
+    {"message": "go to the domains page", "tier": "fast"},
+    {"message": "Where can I find the CMS admin page?", "tier": "fast"},
+    {"message": "navigate to the nightly pipeline docs", "tier": "fast"},
+    {"message": "What is the Portal ID of the QA GP tool?", "tier": "fast"},
+    {"message": "What is the URL of the reconcile GP service?", "tier": "fast"},
+    {"message": "How many fields does the SiteAddress feature class have?", "tier": "fast"},
+    {"message": "What QAStatus values can an address have?", "tier": "fast"},
+    {"message": "Which AddCode is Revelstoke?", "tier": "fast"},
+    {"message": "what type is the Add_Number field", "tier": "fast"},
+    {"message": "list the attribute rules", "tier": "fast"},
+    {"message": "What scripts are in the reconcile folder?", "tier": "fast"},
+    {"message": "show me the St_PosTyp domain", "tier": "fast"},
+    {"message": "bye", "tier": "fast"},
+    {"message": "Which field stores the municipality?", "tier": "fast"},
+    {"message": "hi there", "tier": "fast"},
+    {"message": "thanks a lot, that works!", "tier": "fast"},
+    # ─── standard ────────────────────────────────────────────────────
+    {"message": "How is the NGUID attribute generated?", "tier": "standard"},
+    {"message": "How is Full_Addr assembled from the street name parts?", "tier": "standard"},
+    {"message": "What are the stages of the nightly reconcile pipeline?", "tier": "standard"},
+    {"message": "How does the Salmon Arm ETL sync addresses into the central database?", "tier": "standard"},
+    {"message": "How does an admin edit CMS content in the Documentation Hub?", "tier": "standard"},
+    {"message": "How does the Sync App choose the source and target match fields?", "tier": "standard"},
+    {"message": "How are Latitude and Longitude calculated from the point geometry?", "tier": "standard"},
+    {"message": "What does the Power Automate email for the Salmon Arm sync contain?", "tier": "standard"},
+    {"message": "Which fields are enforced by the mandatory constraint rule?", "tier": "standard"},
+    {"message": "When does the DateUpdate rule set the date?", "tier": "standard"},
+    {"message": "How do users log in and how are admin users detected?", "tier": "standard"},
+    {"message": "What parameters does the Export GP tool take and where do I run it?", "tier": "standard"},
+    {"message": "How does the QA GP tool validate addresses and flag duplicates?", "tier": "standard"},
+    {"message": "Explain what the reconcile and post step does", "tier": "standard"},
+    {"message": "what happens to an address after I submit it for QA", "tier": "standard"},
+    {"message": "How do I run the export tool for Sicamous?", "tier": "standard"},
+    {"message": "Describe the Revelstoke editing workflow", "tier": "standard"},
+    {"message": "What does the Documentation Hub search box index?", "tier": "standard"},
+    {"message": "How do I add a new municipality to the pipeline?", "tier": "standard"},
+    {"message": "Summarize the attribute rules that run on insert", "tier": "standard"},
+    # Greeting or acknowledgement followed by a real question (not smalltalk)
+    {"message": "hey what is NGUID", "tier": "standard"},
+    {"message": "ok now explain the QA", "tier": "standard"},
+    # ─── deep ────────────────────────────────────────────────────────
+    {"message": "The AI service fails with a port 8000 binding error WinError 10048", "tier": "deep"},
+    {"message": "Compare the Full Address rule with the schema definition of Full_Addr.", "tier": "deep"},
+    {"message": "Why does the QA tool flag this address as a duplicate when the unit numbers differ?", "tier": "deep"},
+    {"message": "The nightly reconcile failed last night with a lock error, what went wrong and how do I fix it?", "tier": "deep"},
+    {"message": "Write an Arcade rule that sets QAStatus to Pending when St_Name changes", "tier": "deep"},
+    {"message": "Modify the export script so it also writes a CSV of rejected records", "tier": "deep"},
+    {"message": "Why is Full_Addr empty for addresses with a unit but no street prefix?", "tier": "deep"},
+    {"message": "I get 'ERROR 999999: Something unexpected caused the tool to fail' when I run the QA tool", "tier": "deep"},
+    {"message": "Is there a race between the NGUID rule and the DateUpdate rule on bulk inserts?", "tier": "deep"},
+    {"message": "Debug this: if ($feature.St_PreTyp == null) { return $feature.St_Name } it returns nothing", "tier": "deep"},
+    {"message": "What would break if we renamed the AddCode field?", "tier": "deep"},
+    {"message": "Design a safer way to roll back a bad reconcile post", "tier": "deep"},
+    {"message": "My edits are not showing up in the QA version, why?", "tier": "deep"},
+    {"message": "this page shows an error, what does it mean?", "tier": "deep", "screenshot": True, "page_errors": True},
+    {"message": "Traceback (most recent call last): File \"ExportGPtool.py\", line 88, in execute KeyError: 'AddCode'", "tier": "deep"},
+    {"message": "Should we move the Salmon Arm sync to run after the reconcile instead of before? What are the trade-offs?", "tier": "deep"},
+    {"message": "Refactor the Full Address rule to handle the new St_PosMod field", "tier": "deep"},
+    {"message": "why did my address fail validation", "tier": "deep", "page_errors": True},
+    {"message": "thanks, why does QA fail", "tier": "deep"},
+    {"message": "ok fix it", "tier": "deep"},
+]
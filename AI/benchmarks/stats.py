@@ -0,0 +1,15 @@
+"""Small timing/statistics helpers shared by the benchmark scripts."""
+
+
+def pct(values: list[float], p: float) -> float:
+    """Nearest-rank percentile."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, round(p / 100 * len(ordered) + 0.5) - 1))
+    return ordered[idx]
+
+
+def summary(values: list[float]) -> dict:
+    """p50 / p95 / sample count, rounded for reports."""
+    return {"p50": round(pct(values, 50), 3), "p95": round(pct(values, 95), 3), "n": len(values)}
@@ -0,0 +1,54 @@
+"""
+ASGI entry point for load testing: the real api.app (endpoints, SSE framing,
+checkpointer, tracing, tools) with the Ollama model swapped for ScriptedChatModel
+in each worker's lifespan. Every turn reads one documentation file, then streams a
+300-word answer — CPU work comparable to a typical short answer.
+
+Started by benchmarks/bench_load.py:
+    python -m benchmarks.stub_app --workers 4 --port 8765
+"""
+
+import argparse
+import os
+from contextlib import asynccontextmanager
+
+import uvicorn
+
+os.environ.setdefault("WARMUP_ENABLED", "0")  # no Ollama behind the stub
+
+import api
+from agent import create_agent
+from benchmarks.corpus import answer_text
+from benchmarks.fakes import ScriptedChatModel, text_turn, tool_turn
+from core import snapshots
+
+
+def _respond(messages) -> dict:
+    if messages and messages[-1].type == "human":
+        return tool_turn(("read_file", {"file_path": "Documentation/System_Dependencies.md"}))
+    return text_turn(answer_text(300))
+
+
+@asynccontextmanager
+async def _lifespan(app):
+    async with api.lifespan(app):
+        api.agent = create_agent(api.checkpointer, model=ScriptedChatModel(responder=_respond))
+        yield
+
+
+app = api.app
+app.router.lifespan_context = _lifespan
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    if args.workers > 1:
+        # Same startup path as api.py: snapshots were built on import, workers load them
+        snapshots.mark_workers_as_readers()
+        uvicorn.run("benchmarks.stub_app:app", host="127.0.0.1", port=args.port,
+                    workers=args.workers, log_level="warning")
+    else:
+        uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
@@ -0,0 +1,174 @@
+"""
+Deterministic answers for navigation and schema lookups.
+
+"Take me to the St_PreTyp field" or "what's the length of Full_Addr" have
+exact answers in NAVIGATION_MAP (tools/navigation_tools.py) and
+SSAP_Schema.json. Running the ReAct loop on them costs seconds of generation.
+stream_agent_events asks answer() first. A message gets a direct reply only
+when the whole message matches one of the phrasings below AND names exactly
+one navigation entry or schema field. Anything else, including every message
+with a screenshot or page errors, falls through to the agent.
+
+Replies use the same {{nav:route#element|Label}} syntax as the agent and are
+checkpointed like an agent turn, so the conversation continues normally.
+Hits and fall-throughs are counted in /api/metrics.
+"""
+
+import json
+import logging
+import os
+import re
+
+from tools import navigation_tools
+
+logger = logging.getLogger(__name__)
+
+FASTPATH_ENABLED = os.getenv("FASTPATH_ENABLED", "1") == "1"
+_REPO_ROOT = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+SCHEMA_JSON_PATH = os.getenv(
+    "SCHEMA_JSON_PATH", os.path.join(_REPO_ROOT, "Web App", "DownloadFiles", "SSAP_Schema.json")
+)
+
+# ─── Phrasings ───────────────────────────────────────────────────────
+# Anchored on both ends: extra clauses ("... and why is it empty?") never match
+_NAV = re.compile(
+    r"^\s*(?:please\s+)?(?P<verb>take me to|go to|open|navigate to|jump to|show me|where is|where can i find)\s+"
+    r"(?:the\s+)?(?P<target>[\w\s-]+?)(?:\s+(?P<kind>field|page|domain|rule|script|section|docs|documentation))?"
+    r"\s*[?.!]*\s*$", re.I)
+_FIELD = r"(?:the\s+)?(?P<field>[\w\s]+?)(?:\s+field)?"
+_SCHEMA = [
+    re.compile(r"^\s*(?:what(?:'s| is)|whats)\s+the\s+(?P<attr>max(?:imum)? length|length|size|data type|field type|"
+               r"type|alias(?: name)?)\s+(?:of|for)\s+" + _FIELD + r"\s*\??\s*$", re.I),
+    re.compile(r"^\s*what\s+(?P<attr>type)\s+is\s+" + _FIELD + r"\s*\??\s*$", re.I),
+    re.compile(r"^\s*how\s+(?P<attr>long)\s+(?:is|can)\s+" + _FIELD + r"(?:\s+be)?\s*\??\s*$", re.I),
+    re.compile(r"^\s*(?:is|can)\s+" + _FIELD + r"\s+(?:be\s+)?(?P<attr>nullable|null|required|editable)\s*\??\s*$", re.I),
+]
+
+# "show me" is a navigation request only for places; "show me the NGUID rule" wants the
+# source (agent prompt rule 17), so rules, scripts, domains and bare names go to the agent
+_SHOW_KINDS = {"field", "page", "section", "docs", "documentation"}
+
+# Which NAVIGATION_MAP keys a "<target> <kind>" request may resolve to
+_KIND_KEYS = {
+    "domain": lambda t: [f"{t} domain"],
+    "rule": lambda t: [f"rule {t}"],
+    "script": lambda t: [f"script {t}"],
+}
+
+# ─── Schema Index ────────────────────────────────────────────────────
+_schema: dict = {"mtime": None, "fields": {}, "lookup": {}}
+
+
+def _normalize(name: str) -> str:
+    return re.sub(r"[\s_]+", "_", name.strip().lower())
+
+
+def _load_schema() -> dict:
+    """field lookup (normalized name or alias -> set of field names), reloaded when the JSON changes."""
+    try:
+        mtime = os.path.getmtime(SCHEMA_JSON_PATH)
+    except OSError:
+        return _schema
+    if mtime == _schema["mtime"]:
+        return _schema
+    with open(SCHEMA_JSON_PATH, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    fields, lookup = {}, {}
+    for dataset in data.get("datasets", []):
+        for field in dataset.get("fields", {}).get("fieldArray", []):
+            fields[field["name"]] = {**field, "dataset": dataset.get("name", "")}
+            for key in (field["name"], field.get("aliasName", "")):
+                if key.strip():
+                    lookup.setdefault(_normalize(key), set()).add(field["name"])
+    _schema.update(mtime=mtime, fields=fields, lookup=lookup)
+    logger.info(f"Schema index loaded: {len(fields)} fields from {os.path.basename(SCHEMA_JSON_PATH)}")
+    return _schema
+
+
+def _type_name(field: dict) -> str:
+    return field["type"].replace("esriFieldType", "")
+
+
+def _a(word: str) -> str:
+    return f"an {word}" if word[0] in "AEIOU" else f"a {word}"
+
+
+def _field_nav(name: str) -> str:
+    entry = navigation_tools.NAVIGATION_MAP.get(name.lower())
+    return f"\n\n{navigation_tools.nav_syntax(entry)}" if entry else ""
+
+
+def _schema_answer(name: str, attr: str) -> str:
+    field = _schema["fields"][name]
+    kind = _type_name(field)
+    alias = field.get("aliasName", "").strip()
+    title = f"**{name}**" + (f" ({alias})" if alias and alias != name else "")
+    attr = attr.lower()
+    if attr in ("length", "max length", "maximum length", "size", "long"):
+        if kind == "String":
+            lead = f"{title} is a String field with a maximum length of {field['length']} characters."
+        else:
+            lead = f"{title} is {_a(kind)} field; character length applies only to text fields."
+    elif attr.startswith("alias"):
+        lead = f"The alias of **{name}** is \"{alias}\"." if alias else f"**{name}** has no alias."
+    elif attr in ("nullable", "null"):
+        lead = f"{title} {'allows' if field.get('isNullable') else 'does not allow'} nulls."
+    elif attr == "required":
+        lead = f"{title} is {'required' if field.get('required') else 'not required'}."
+    elif attr == "editable":
+        lead = f"{title} is {'editable' if field.get('editable', True) else 'not editable'}."
+    else:
+        size = f", length {field['length']}" if kind == "String" else ""
+        lead = f"{title} is {_a(kind)} field{size}."
+    nullable = "nullable" if field.get("isNullable") else "not nullable"
+    detail = f"{kind}" + (f"({field['length']})" if kind == "String" else "") + f", {nullable}"
+    return f"{lead}\n\nSource: SSAP_Schema.json ({field['dataset']}.{name}: {detail}){_field_nav(name)}"
+
+
+def _match_schema(message: str) -> dict | None:
+    for pattern in _SCHEMA:
+        m = pattern.match(message)
+        if not m:
+            continue
+        names = _load_schema()["lookup"].get(_normalize(m.group("field")), set())
+        if len(names) != 1:
+            return {"kind": "schema", "answer": None}
+        name = next(iter(names))
+        return {"kind": "schema", "answer": _schema_answer(name, m.group("attr")), "target": name}
+    return None
+
+
+def _match_nav(message: str) -> dict | None:
+    m = _NAV.match(message)
+    if not m:
+        return None
+    if m.group("verb").lower() == "show me" and (m.group("kind") or "").lower() not in _SHOW_KINDS:
+        return None
+    navigation_tools.refresh_from_snapshot()
+    nav = navigation_tools.NAVIGATION_MAP
+    target = re.sub(r"\s+", " ", m.group("target").strip().lower())
+    kind = (m.group("kind") or "").lower()
+    keys = _KIND_KEYS[kind](target) if kind in _KIND_KEYS else [target]
+    entries = [nav[k] for k in keys if k in nav]
+    if kind == "field":
+        entries = [e for e in entries if e.get("element", "").startswith("field-")]
+    if len(entries) != 1:
+        return {"kind": "nav", "answer": None}
+    entry = entries[0]
+    return {"kind": "nav", "answer": f"Here's the link:\n\n{navigation_tools.nav_syntax(entry)}",
+            "target": entry["route"] + (f"#{entry['element']}" if entry.get("element") else "")}
+
+
+def answer(message: str, screenshot: bool = False, page_errors: bool = False) -> dict | None:
+    """
+    {"kind": "nav"|"schema", "answer": str | None, "target"} when the message
+    has a fast-path phrasing (answer is None if it did not resolve to exactly
+    one target), or None when it does not look like a lookup at all.
+    """
+    if not FASTPATH_ENABLED or screenshot or page_errors or "\n" in message.strip():
+        return None
+    try:
+        return _match_schema(message) or _match_nav(message)
+    except Exception as e:
+        logger.warning(f"Fast path failed, falling through to the agent: {e}")
+        return None
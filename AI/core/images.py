@@ -0,0 +1,135 @@
+"""
+Screenshot preprocessing for multimodal chat requests.
+
+Browser screenshots arrive as full-resolution PNGs. Before they reach the
+vision model they are:
+  1. decoded (Base64 from JSON, or raw bytes from a multipart upload)
+  2. downsized so the longest edge is at most SCREENSHOT_MAX_EDGE pixels
+  3. re-encoded as JPEG or WebP (SCREENSHOT_FORMAT, SCREENSHOT_QUALITY)
+  4. fingerprinted with a 64-bit difference hash (dHash), so a screenshot that is
+     visually unchanged since the last one in the same thread can be skipped
+Estimated image tokens before/after are logged for every screenshot.
+"""
+
+import base64
+import binascii
+import io
+import logging
+import os
+from collections import OrderedDict, deque
+
+from PIL import Image, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+SCREENSHOT_MAX_EDGE = int(os.getenv("SCREENSHOT_MAX_EDGE", "1280"))
+SCREENSHOT_FORMAT = os.getenv("SCREENSHOT_FORMAT", "JPEG").upper()  # JPEG or WEBP
+SCREENSHOT_QUALITY = int(os.getenv("SCREENSHOT_QUALITY", "80"))
+SCREENSHOT_MAX_BYTES = 20 * 1024 * 1024  # reject decoded uploads larger than this
+# Hashes this many bits apart or fewer count as the same screenshot
+SCREENSHOT_DEDUPE_BITS = int(os.getenv("SCREENSHOT_DEDUPE_BITS", "4"))
+
+# Qwen-VL style vision encoders: 14 px patches merged 2x2 → one token per 28x28 px
+_PIXELS_PER_TOKEN_EDGE = 28
+
+_MIME = {"JPEG": "image/jpeg", "WEBP": "image/webp"}
+
+
+def estimate_image_tokens(width: int, height: int) -> int:
+    """Approximate vision tokens the model spends prefilling an image of this size."""
+    return max(1, round(width / _PIXELS_PER_TOKEN_EDGE)) * max(1, round(height / _PIXELS_PER_TOKEN_EDGE))
+
+
+def dhash(img: Image.Image) -> int:
+    """64-bit difference hash: robust to re-encoding and resizing, sensitive to content changes."""
+    small = img.convert("L").resize((9, 8), Image.LANCZOS)
+    px = list(small.getdata())
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            bits = (bits << 1) | (px[row * 9 + col] > px[row * 9 + col + 1])
+    return bits
+
+
+def decode_base64(data: str) -> bytes:
+    """Decode a Base64 screenshot, tolerating a data: URL prefix."""
+    if data.startswith("data:"):
+        data = data.split(",", 1)[-1]
+    try:
+        return base64.b64decode(data, validate=True)
+    except (binascii.Error, ValueError) as e:
+        raise ValueError(f"Screenshot is not valid Base64: {e}")
+
+
+def prepare_screenshot(raw: bytes) -> dict:
+    """
+    Downsize and re-encode an uploaded image.
+    Returns {"data_url", "hash", "width", "height", "tokens", "tokens_before", "bytes", "bytes_before"}.
+    Raises ValueError for oversized or undecodable input.
+    """
+    if len(raw) > SCREENSHOT_MAX_BYTES:
+        raise ValueError(f"Screenshot exceeds {SCREENSHOT_MAX_BYTES // (1024 * 1024)} MB.")
+    try:
+        img = Image.open(io.BytesIO(raw))
+        img.load()
+    except (UnidentifiedImageError, OSError) as e:
+        raise ValueError(f"Screenshot could not be decoded: {e}")
+
+    orig_w, orig_h = img.size
+    if img.mode in ("RGBA", "LA", "P"):
+        # JPEG has no alpha: flatten onto white like the page background
+        rgba = img.convert("RGBA")
+        img = Image.new("RGB", rgba.size, (255, 255, 255))
+        img.paste(rgba, mask=rgba.getchannel("A"))
+    elif img.mode != "RGB":
+        img = img.convert("RGB")
+
+    if max(orig_w, orig_h) > SCREENSHOT_MAX_EDGE:
+        img.thumbnail((SCREENSHOT_MAX_EDGE, SCREENSHOT_MAX_EDGE), Image.LANCZOS)
+
+    fmt = SCREENSHOT_FORMAT if SCREENSHOT_FORMAT in _MIME else "JPEG"
+    buf = io.BytesIO()
+    img.save(buf, format=fmt, quality=SCREENSHOT_QUALITY, optimize=True)
+    encoded = buf.getvalue()
+
+    result = {
+        "data_url": f"data:{_MIME[fmt]};base64,{base64.b64encode(encoded).decode('ascii')}",
+        "hash": dhash(img),
+        "width": img.width,
+        "height": img.height,
+        "tokens": estimate_image_tokens(img.width, img.height),
+        "tokens_before": estimate_image_tokens(orig_w, orig_h),
+        "bytes": len(encoded),
+        "bytes_before": len(raw),
+    }
+    logger.info(
+        f"Screenshot {orig_w}x{orig_h} -> {img.width}x{img.height} {fmt}: "
+        f"~{result['tokens_before']} -> ~{result['tokens']} image tokens, "
+        f"{len(raw) // 1024} -> {len(encoded) // 1024} KB"
+    )
+    return result
+
+
+# ─── Per-Thread Dedupe ───────────────────────────────────────────────
+_MAX_THREADS = 1000
+_HASHES_PER_THREAD = 8
+_thread_hashes: OrderedDict[str, deque] = OrderedDict()
+
+
+def seen_in_thread(thread_id: str, image_hash: int) -> bool:
+    """
+    True if a near-identical screenshot was already sent in this thread
+    (the model still has that image in its history). Records the hash otherwise.
+    Per worker process; a miss only costs resending the image.
+    """
+    hashes = _thread_hashes.get(thread_id)
+    if hashes is not None:
+        _thread_hashes.move_to_end(thread_id)
+        if any(bin(h ^ image_hash).count("1") <= SCREENSHOT_DEDUPE_BITS for h in hashes):
+            return True
+    else:
+        hashes = _thread_hashes[thread_id] = deque(maxlen=_HASHES_PER_THREAD)
+        if len(_thread_hashes) > _MAX_THREADS:
+            _thread_hashes.popitem(last=False)
+    hashes.append(image_hash)
+    return False
@@ -8,25 +8,34 @@ load_dotenv()
 OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
 MAIN_MODEL = os.getenv("MAIN_MODEL", "qwen3.5:35b")
 EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "nomic-embed-text")
+# Optional smaller chat model for simple requests (core/router.py); empty = always MAIN_MODEL
+SMALL_MODEL = os.getenv("SMALL_MODEL", "")
+# Seconds Ollama keeps a model loaded after its last request (renewed in business hours by core/warmup.py)
+MODEL_KEEP_ALIVE_S = int(os.getenv("MODEL_KEEP_ALIVE_S", "1800"))
 
+# Options that decide how Ollama loads the main model. A request with different
+# values forces a reload, so core/warmup.py warms the model with exactly these.
+LLM_LOAD_OPTIONS = {"num_ctx": 32768, "num_batch": 512, "num_gpu": 99}
 
-def get_llm(temperature=0.0):
+
+def get_llm(temperature=0.0, model=MAIN_MODEL, num_predict=2048):
     """
-    Returns the primary ChatOllama LLM instance optimized for the RTX 5090.
+    Returns a ChatOllama instance (the primary model by default) optimized for the RTX 5090.
+    core/router.py picks `model` and `num_predict` per request.
     - num_ctx=32768:   32K context cap. Fits comfortably in RTX 5090 VRAM
                        alongside the ~26GB model weights.
     - num_predict=2048: Prevents runaway generation on verbose answers.
     - num_batch=512:   Parallel prompt evaluation tokens for faster prefill.
     - num_gpu=99:      Force all model layers onto GPU (no CPU offloading).
+    - keep_alive:      MODEL_KEEP_ALIVE_S, so the model stays loaded between turns.
     """
     return ChatOllama(
         base_url=OLLAMA_BASE_URL,
-        model=MAIN_MODEL,
+        model=model,
         temperature=temperature,
-        num_ctx=32768,
-        num_predict=2048,
-        num_batch=512,
-        num_gpu=99,
+        num_predict=num_predict,
+        keep_alive=MODEL_KEEP_ALIVE_S,
+        **LLM_LOAD_OPTIONS,
     )
 
 
@@ -38,4 +47,5 @@ def get_embeddings():
     return OllamaEmbeddings(
         base_url=OLLAMA_BASE_URL,
         model=EMBEDDING_MODEL,
+        keep_alive=MODEL_KEEP_ALIVE_S,
     )
@@ -0,0 +1,99 @@
+"""
+In-process run counters, exposed at /api/metrics.
+
+Counts completed and cancelled agent runs (client closed the SSE stream, or a
+newer message superseded the turn) and the generation time involved:
+  - cancelled_generation_s: time cancelled runs had already spent (wasted)
+  - saved_generation_s:     estimated time they would still have needed, from
+                            the median duration of recent completed runs
+and the outcomes of speculative retrieval (core/prefetch.py):
+  - prefetch_hit/miss/late/empty/error: per-turn outcome counts
+  - prefetch_wait_s:  time first model calls spent waiting for the prefetch
+  - prefetch_saved_s: estimated time hits saved, from the median time turns
+                      that did call a retrieval tool took to get its result
+and the deterministic fast path (core/fastpath.py):
+  - fastpath_nav / fastpath_schema: turns answered without the agent
+  - fastpath_fallthrough: lookup-shaped messages that did not resolve to
+                          exactly one target and went to the agent
+  - fastpath_hit_rate: fast-path answers / all turns
+Counters are per process; with API_WORKERS > 1 each worker reports its own.
+"""
+
+import statistics
+import threading
+import time
+from collections import deque
+
+_lock = threading.Lock()
+_started_at = time.time()
+_recent_durations: deque[float] = deque(maxlen=200)  # completed-run seconds
+_recent_round_trips: deque[float] = deque(maxlen=200)  # run start -> first retrieval tool result
+_counters = {
+    "runs_completed": 0,
+    "runs_cancelled": 0,
+    "runs_superseded": 0,  # subset of runs_cancelled
+    "cancelled_generation_s": 0.0,
+    "saved_generation_s": 0.0,
+    "prefetch_hit": 0,
+    "prefetch_miss": 0,
+    "prefetch_late": 0,
+    "prefetch_empty": 0,
+    "prefetch_error": 0,
+    "prefetch_wait_s": 0.0,
+    "prefetch_saved_s": 0.0,
+    "fastpath_nav": 0,
+    "fastpath_schema": 0,
+    "fastpath_fallthrough": 0,
+    "fastpath_ms": 0.0,  # total time to answer fast-path turns
+}
+
+
+def record_completed(duration_s: float):
+    with _lock:
+        _counters["runs_completed"] += 1
+        _recent_durations.append(duration_s)
+
+
+def record_cancelled(elapsed_s: float, superseded: bool = False) -> float:
+    """Count a cancelled run. Returns the estimated generation seconds saved."""
+    with _lock:
+        typical = statistics.median(_recent_durations) if _recent_durations else 0.0
+        saved = max(typical - elapsed_s, 0.0)
+        _counters["runs_cancelled"] += 1
+        _counters["runs_superseded"] += int(superseded)
+        _counters["cancelled_generation_s"] += elapsed_s
+        _counters["saved_generation_s"] += saved
+    return saved
+
+
+def record_prefetch(outcome: str, wait_s: float, round_trip_s: float | None = None) -> float:
+    """Count one turn's speculative retrieval outcome. Returns the estimated seconds saved."""
+    with _lock:
+        if round_trip_s is not None:
+            _recent_round_trips.append(round_trip_s)
+        saved = 0.0
+        if outcome == "hit" and _recent_round_trips:
+            saved = max(statistics.median(_recent_round_trips) - wait_s, 0.0)
+        _counters[f"prefetch_{outcome}"] += 1
+        _counters["prefetch_wait_s"] += wait_s
+        _counters["prefetch_saved_s"] += saved
+    return saved
+
+
+def record_fastpath(kind: str, answered: bool, duration_s: float = 0.0):
+    with _lock:
+        if answered:
+            _counters[f"fastpath_{kind}"] += 1
+            _counters["fastpath_ms"] += duration_s * 1000
+        else:
+            _counters["fastpath_fallthrough"] += 1
+
+
+def snapshot() -> dict:
+    with _lock:
+        data = {k: round(v, 2) if isinstance(v, float) else v for k, v in _counters.items()}
+    fast = data["fastpath_nav"] + data["fastpath_schema"]
+    turns = fast + data["runs_completed"] + data["runs_cancelled"]
+    data["fastpath_hit_rate"] = round(fast / turns, 3) if turns else 0.0
+    data["uptime_s"] = round(time.time() - _started_at)
+    return data
@@ -0,0 +1,163 @@
+"""
+Speculative retrieval for chat turns.
+
+Most answers begin with the model spending a full prefill + decode just to
+decide to call search_knowledge_base or read_file. When a message arrives,
+stream_agent_events starts a retrieval for it right away (start()), in
+parallel with queueing, checkpoint loading and graph setup. Two searches run:
+  - the knowledge base, for the user's message
+  - the HTML partial of the page the user is on (user_context.current_page)
+Only results at or above SPECULATIVE_MIN_RELEVANCE are kept, as snippets,
+capped at SPECULATIVE_MAX_CHARS.
+
+The agent's prompt (agent._prompt_with_prefetch) gives the first model call
+up to SPECULATIVE_WAIT_S for the retrieval to finish. If it finishes later,
+the context goes into the next model call instead. The context is added to
+the prompt only, never to the checkpointed history.
+
+Outcomes are counted in /api/metrics (core/metrics.py):
+  hit    context reached the first call and no retrieval tool was called
+  miss   context reached the first call, but the model still called a retrieval tool
+  late   not ready in time for the first call
+  empty  nothing relevant enough to inject
+"""
+
+import asyncio
+import logging
+import os
+import time
+
+from langchain_core.messages import SystemMessage
+
+from core import metrics, router
+from database.compaction import KB_MIN_RELEVANCE
+from tools import knowledge_tools
+
+logger = logging.getLogger(__name__)
+
+SPECULATIVE_ENABLED = os.getenv("SPECULATIVE_ENABLED", "1") == "1"
+SPECULATIVE_WAIT_S = float(os.getenv("SPECULATIVE_WAIT_S", "0.25"))
+SPECULATIVE_MAX_CHARS = int(os.getenv("SPECULATIVE_MAX_CHARS", "3000"))
+# Same (uncalibrated) default as search; benchmarks/bench_relevance.py reports "prefetch empty" for it
+SPECULATIVE_MIN_RELEVANCE = float(os.getenv("SPECULATIVE_MIN_RELEVANCE", str(KB_MIN_RELEVANCE)))
+_PAGE_K = 2  # chunks prefetched from the current page's partial
+
+# Tools whose call means the model went looking for context anyway
+RETRIEVAL_TOOLS = {"search_knowledge_base", "read_file", "search_codebase", "lookup_symbol"}
+
+_HEADER = (
+    "[PREFETCHED CONTEXT] Retrieved automatically for the user's next message, before any tool call. "
+    "If it answers the question, answer from it and cite the sources; call tools only for what it does not cover."
+)
+
+
+def _page_route(current_page: str) -> str:
+    """'schema-guide#field-X' or 'schema-guide/sub' -> 'schema-guide' (the partial's component)."""
+    for sep in ("#", "?", "/"):
+        current_page = current_page.split(sep, 1)[0]
+    return current_page.strip()
+
+
+def gather(message: str, current_page: str = "", min_relevance: float | None = None) -> list[dict]:
+    """Blocking: knowledge-base hits for `message` plus hits from the current page, best first."""
+    threshold = SPECULATIVE_MIN_RELEVANCE if min_relevance is None else min_relevance
+    results = knowledge_tools.search(message) or []
+    route = _page_route(current_page)
+    if route and route != "home":
+        results += knowledge_tools.search(message, k=_PAGE_K, filter={"component": route}) or []
+
+    kept, seen = [], set()
+    for r in sorted(results, key=lambda r: -r["relevance"]):
+        key = (r["source"], r["start_line"], r["text"][:80])
+        if r["relevance"] < threshold or key in seen:
+            continue
+        seen.add(key)
+        kept.append(r)
+    return kept
+
+
+def format_context(results: list[dict]) -> str:
+    """Compact context message text, or "" when there is nothing to inject."""
+    out, used = [], len(_HEADER)
+    for r in results:
+        where = f", {', '.join(r['symbols'])}" if r["symbols"] else ""
+        if r["start_line"]:
+            where += f", lines {r['start_line']}-{r['end_line']}"
+        block = f"--- {r['source']}{where} ---\n{r['text']}"
+        if out and used + len(block) > SPECULATIVE_MAX_CHARS:
+            break
+        out.append(block[: SPECULATIVE_MAX_CHARS - used])
+        used += len(block)
+    return "\n\n".join([_HEADER] + out) if out else ""
+
+
+async def _retrieve(message: str, current_page: str) -> str:
+    results = await asyncio.to_thread(gather, message, current_page)
+    return format_context(results)
+
+
+def start(message: str, current_page: str = "") -> dict | None:
+    """
+    Launch retrieval for a new message. Returns the per-turn holder to pass to
+    the graph as config["configurable"]["prefetch"], or None if skipped.
+    """
+    if not SPECULATIVE_ENABLED or router.is_smalltalk(message):
+        return None
+    return {
+        "task": asyncio.create_task(_retrieve(message, current_page)),
+        "started": time.monotonic(),
+        "wait_s": 0.0,
+        "injected": None,  # "first" or "later"
+        "late": False,
+    }
+
+
+def cancel(holder: dict | None):
+    if holder is not None and not holder["task"].done():
+        holder["task"].cancel()
+
+
+async def context_message(holder: dict, first_call: bool) -> SystemMessage | None:
+    """
+    The context message for one model call, or None. The first call of a
+    turn waits up to SPECULATIVE_WAIT_S; later calls take it only if ready.
+    """
+    task = holder["task"]
+    if first_call and not task.done():
+        start = time.monotonic()
+        await asyncio.wait({task}, timeout=SPECULATIVE_WAIT_S)
+        holder["wait_s"] += time.monotonic() - start
+    if not task.done():
+        holder["late"] = holder["late"] or first_call
+        return None
+    if task.cancelled():
+        return None
+    if task.exception() is not None:
+        if first_call:
+            logger.warning(f"Speculative retrieval failed: {task.exception()}")
+        return None
+    text = task.result()
+    if not text:
+        return None
+    if holder["injected"] is None:
+        holder["injected"] = "first" if first_call else "later"
+    return SystemMessage(content=text)
+
+
+def record(holder: dict | None, retrieval_called: bool, round_trip_s: float | None):
+    """
+    Count the turn's outcome. `round_trip_s` is the time from the start of the
+    graph run to the first retrieval tool result, when the model made one.
+    """
+    if holder is None:
+        return
+    task = holder["task"]
+    if holder["injected"] == "first":
+        outcome = "miss" if retrieval_called else "hit"
+    elif holder["late"]:
+        outcome = "late"
+    elif task.done() and not task.cancelled() and task.exception() is not None:
+        outcome = "error"
+    else:
+        outcome = "empty"
+    metrics.record_prefetch(outcome, holder["wait_s"], round_trip_s)
@@ -0,0 +1,138 @@
+"""
+Per-request model routing without an LLM call.
+
+The archived supervisor (Archive/agents/supervisor.py) spent a full model call
+on every route. This router takes microseconds. A few high-precision rules
+(greetings, stack traces, code) decide obvious cases. Everything else is scored
+by a tiny linear model over query features. Its weights are fitted on
+benchmarks/router_labels.py with `python -m benchmarks.bench_router --fit`.
+
+Tiers:
+  fast      SMALL_MODEL (MAIN_MODEL if unset), thinking off
+  standard  MAIN_MODEL, thinking off
+  deep      MAIN_MODEL, thinking on, up to THINK_BUDGET_DEEP thinking tokens
+Ollama has no separate thinking limit, so the budget raises the request's
+num_predict above the answer allowance. When the user turns thinking off in
+the UI, no tier thinks. With ROUTER_ENABLED=0 every request reports tier
+"default": MAIN_MODEL, thinking as the UI asks.
+"""
+
+import math
+import os
+import re
+
+from core.llm_config import MAIN_MODEL, SMALL_MODEL
+
+ROUTER_ENABLED = os.getenv("ROUTER_ENABLED", "1") == "1"
+ANSWER_TOKENS = 2048  # num_predict without thinking (matches get_llm)
+THINK_BUDGET_DEEP = int(os.getenv("THINK_BUDGET_DEEP", "3072"))
+
+TIERS = ("fast", "standard", "deep")
+
+# ─── Features ────────────────────────────────────────────────────────
+_SMALLTALK = re.compile(
+    r"^\W*(hi|hello|hey|yo|thanks?( you)?|thank you|ty|ok(ay)?|cool|great|bye|good (morning|afternoon|evening))"
+    r"\b(?P<tail>[\w\s,!.']{0,40})$", re.I)
+# The only words a greeting or thank-you may trail off with ("thanks, that helped", "hi there").
+# Anything else ("hey what is NGUID", "ok fix it") is a request and goes to the scorer.
+_COURTESY = frozenset(
+    "hi hello hey there all everyone team guys folks thanks thank you ty so much a lot very again "
+    "for the help that that's helped helps it it's this works worked was is great good perfect cool nice "
+    "awesome ok okay got sounds bye see ya later cheers appreciate appreciated morning afternoon evening".split())
+_TRACEBACK = re.compile(r"Traceback \(most recent call last\)|\bERROR \d{3,}|\b\w+Error:|\bException\b|WinError", re.I)
+_CODE = re.compile(r"`|\$feature|\b(def|return|var|if)\b.*[({=]|==|\.py\b|\w+\(\)")
+_NAV = re.compile(r"\b(take me|go to|open|navigate|where is|where can i find|show me)\b", re.I)
+_LOOKUP = re.compile(r"^\W*(what is|what's|which|how many|list|what type|what are the \w+ values)\b", re.I)
+_EXPLAIN = re.compile(r"\b(how (does|do|is|are)|explain|describe|summari[sz]e|what happens|walk me)\b", re.I)
+_PROBLEM = re.compile(
+    r"\b(why|error|fail(s|ed|ing|ure)?|broken|wrong|bug|crash|not (working|showing)|doesn'?t|isn'?t|"
+    r"can'?t|won'?t|lock(ed)?|empty|missing)\b", re.I)
+_CHANGE = re.compile(r"\b(write|modify|change|refactor|implement|add (a|an|support)|fix|debug|design|rewrite)\b", re.I)
+_COMPARE = re.compile(r"\b(compare|versus|vs\.?|trade-?offs?|should (we|i)|what would|race|difference)\b", re.I)
+_WORD = re.compile(r"\w+")
+
+
+def features(message: str, screenshot: bool = False, page_errors: bool = False) -> dict:
+    """Query features the scorer uses (all cheap regex/length checks)."""
+    words = len(_WORD.findall(message))
+    return {
+        "log_words": math.log1p(words),
+        "nav": float(bool(_NAV.search(message))),
+        "lookup": float(bool(_LOOKUP.search(message))),
+        "explain": float(bool(_EXPLAIN.search(message))),
+        "problem": float(bool(_PROBLEM.search(message))),
+        "change": float(bool(_CHANGE.search(message))),
+        "compare": float(bool(_COMPARE.search(message))),
+        "code": float(bool(_CODE.search(message))),
+        "clauses": float(message.count("?") + len(re.findall(r"\band\b|,", message)) > 1),
+        "screenshot": float(screenshot),
+        "page_errors": float(page_errors),
+    }
+
+
+# Fitted by benchmarks/bench_router.py --fit (ridge least squares on tier index 0/1/2)
+WEIGHTS = {
+    "bias": 0.525,
+    "log_words": 0.213,
+    "nav": -0.812,
+    "lookup": -0.74,
+    "explain": -0.084,
+    "problem": 0.707,
+    "change": 0.663,
+    "compare": 0.726,
+    "code": 0.133,
+    "clauses": 0.007,
+    "screenshot": 0.0,
+    "page_errors": 0.176,
+}
+
+
+def score(feats: dict, weights: dict = WEIGHTS) -> float:
+    """Complexity score: below 0.5 is fast, 1.5 and above is deep."""
+    return weights["bias"] + sum(weights[name] * value for name, value in feats.items())
+
+
+def is_smalltalk(message: str) -> bool:
+    """Greetings and acknowledgements: nothing to look up."""
+    m = _SMALLTALK.match(message.strip())
+    return bool(m) and all(w in _COURTESY for w in re.findall(r"[\w']+", m.group("tail").lower()))
+
+
+def classify(message: str, screenshot: bool = False, page_errors: bool = False) -> tuple[str, str]:
+    """Returns (tier, reason)."""
+    text = message.strip()
+    if is_smalltalk(text):
+        return "fast", "smalltalk"
+    if _TRACEBACK.search(text):
+        return "deep", "error text"
+    if screenshot and page_errors:
+        return "deep", "screenshot of a page with errors"
+    s = score(features(text, screenshot, page_errors))
+    tier = "fast" if s < 0.5 else "deep" if s >= 1.5 else "standard"
+    return tier, f"score {s:.2f}"
+
+
+def route(message: str, thinking: bool = True, screenshot: bool = False, page_errors: bool = False) -> dict:
+    """
+    Pick the model and thinking mode for one request.
+    Returns {"tier", "reason", "model", "thinking", "think_budget", "num_predict"}.
+    """
+    if not ROUTER_ENABLED:
+        # Previous behaviour: main model, thinking as the UI asks, one shared token limit
+        return {"tier": "default", "reason": "router disabled", "model": MAIN_MODEL, "thinking": thinking,
+                "think_budget": 0, "num_predict": ANSWER_TOKENS}
+    tier, reason = classify(message, screenshot, page_errors)
+    model = SMALL_MODEL if tier == "fast" and SMALL_MODEL else MAIN_MODEL
+    # Images need the (vision-capable) main model
+    if screenshot:
+        model = MAIN_MODEL
+    think = thinking and tier == "deep"
+    budget = THINK_BUDGET_DEEP if think else 0
+    return {
+        "tier": tier,
+        "reason": reason,
+        "model": model,
+        "thinking": think,
+        "think_budget": budget,
+        "num_predict": ANSWER_TOKENS + budget,
+    }
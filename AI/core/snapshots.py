@@ -0,0 +1,76 @@
+"""
+Startup cache for API worker processes.
+
+In multi-worker mode (API_WORKERS > 1) the master process builds the navigation
+map and file map once and writes them here as JSON. Each worker parses the file
+instead of rescanning router.js, every HTML partial and the script folders
+itself. This is a cache, not shared memory: every worker still holds its own
+parsed copy. What it saves is worker startup time and repo scans
+(benchmarks/bench_load.py --startup measures it). Writers replace files
+atomically (os.replace), and readers reload when a file's mtime changes, so a
+nav-map rebuild triggered by /api/reingest in one worker reaches all of them.
+"""
+
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+_AI_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", os.path.join(_AI_DIR, "database", "snapshots"))
+API_WORKERS = int(os.getenv("API_WORKERS", "1"))
+
+# Snapshots are only written/read when several workers share them
+ENABLED = API_WORKERS > 1
+# Set by the master before spawning workers: workers load instead of rebuilding
+_READER_ENV = "NG911_SNAPSHOT_READER"
+
+
+def is_reader() -> bool:
+    """True in worker processes that should load snapshots rather than build them."""
+    return ENABLED and os.getenv(_READER_ENV) == "1"
+
+
+def mark_workers_as_readers():
+    """Called by the master after building snapshots; inherited by spawned workers."""
+    os.environ[_READER_ENV] = "1"
+
+
+def _path(name: str) -> str:
+    return os.path.join(SNAPSHOT_DIR, f"{name}.json")
+
+
+def write_snapshot(name: str, data) -> float | None:
+    """Atomically write a snapshot. Returns its mtime, or None when disabled/failed."""
+    if not ENABLED:
+        return None
+    try:
+        os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+        tmp = _path(name) + f".{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp, _path(name))
+        return os.path.getmtime(_path(name))
+    except OSError as e:
+        logger.warning(f"Could not write snapshot '{name}': {e}")
+        return None
+
+
+def snapshot_mtime(name: str) -> float | None:
+    try:
+        return os.path.getmtime(_path(name))
+    except OSError:
+        return None
+
+
+def read_snapshot(name: str):
+    """Return (data, mtime) from a snapshot, or (None, None) if unavailable."""
+    try:
+        with open(_path(name), "rb") as f:
+            mtime = os.fstat(f.fileno()).st_mtime
+            return json.load(f), mtime
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not read snapshot '{name}': {e}")
+        return None, None
@@ -0,0 +1,89 @@
+"""
+Per-thread memo of tool results, stored in the agent state so it is persisted
+with the conversation checkpoint.
+
+The memo maps a key to the tool_call_id of the ToolMessage that holds the
+result, not to the result itself. That message is already in the checkpointed
+history (trim_messages only shortens the prompt), so an entry costs ~100 bytes
+instead of a second copy of a file read of up to 30K characters.
+
+Each entry is keyed by (tool name, arguments, source version). The source
+version is a cheap probe of whatever the tool reads. When it changes, the key
+changes and the stale entry is simply never hit again:
+  - read_file / list_directory: mtime + size of the file or directory (one stat)
+  - search_knowledge_base:      the active knowledge base generation
+  - search_codebase:            knowledge base generation (bumped by every deploy's
+                                /api/reingest) + a TTL bucket for local edits
+  - lookup_symbol:              the same (the symbol index belongs to the generation)
+  - query_cms_content:          a TTL bucket (the CMS has no cheap change probe)
+Tools without a probe (get_navigation_target is an in-memory lookup) are not memoized.
+"""
+
+import hashlib
+import json
+import os
+import time
+
+from database.retrieval import get_active_collection
+from tools import knowledge_tools
+from tools.file_tools import _safe_resolve
+
+TOOL_MEMO_MAX = int(os.getenv("TOOL_MEMO_MAX", "32"))  # entries kept per thread
+TOOL_MEMO_TTL_S = int(os.getenv("TOOL_MEMO_TTL_S", "600"))
+
+
+def _stat_version(path: str) -> str | None:
+    try:
+        st = os.stat(_safe_resolve(path))
+    except (OSError, ValueError):
+        return None  # missing or outside the root: let the tool report the error
+    return f"{st.st_mtime_ns}:{st.st_size}"
+
+
+def _kb_generation() -> str:
+    return get_active_collection(knowledge_tools.CHROMA_DB_DIR)
+
+
+def _ttl_bucket() -> str:
+    return str(int(time.time() // TOOL_MEMO_TTL_S))
+
+
+_VERSIONS = {
+    "read_file": lambda args: _stat_version(args.get("file_path", "")),
+    "list_directory": lambda args: _stat_version(args.get("directory_path", "")),
+    "search_knowledge_base": lambda args: _kb_generation(),
+    "search_codebase": lambda args: f"{_kb_generation()}:{_ttl_bucket()}",
+    "lookup_symbol": lambda args: f"{_kb_generation()}:{_ttl_bucket()}",
+    "query_cms_content": lambda args: _ttl_bucket(),
+}
+
+
+def memo_key(name: str, args: dict) -> str | None:
+    """Memo key for a tool call, or None when the call should not be memoized."""
+    probe = _VERSIONS.get(name)
+    if probe is None:
+        return None
+    version = probe(args)
+    if version is None:
+        return None
+    raw = json.dumps([name, args, version], sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def lookup(memo: dict, key: str | None, messages: list) -> str | None:
+    """The memoized result for key, read from the ToolMessage the memo points at."""
+    call_id = memo.get(key) if key else None
+    if call_id is None:
+        return None
+    for m in reversed(messages):
+        if m.type == "tool" and m.tool_call_id == call_id:
+            return m.content if isinstance(m.content, str) else None
+    return None  # the message is gone (e.g. history cleared): run the tool again
+
+
+def merge_memo(left: dict | None, right: dict | None) -> dict:
+    """State reducer: merge new entries, keeping only the newest TOOL_MEMO_MAX."""
+    merged = {**(left or {}), **(right or {})}
+    if len(merged) > TOOL_MEMO_MAX:
+        merged = dict(list(merged.items())[-TOOL_MEMO_MAX:])
+    return merged
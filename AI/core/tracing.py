@@ -0,0 +1,406 @@
+"""
+Lightweight span tracing for agent runs.
+
+Every /api/chat turn opens a Trace. A LangChain callback handler records a span
+for each LangGraph node, tool invocation and LLM call; api.py adds its own spans
+around pre/post-processing. Spans are buffered in memory. When the turn finishes
+they are queued for a single background writer thread, which stores them in a
+local rolling SQLite file in one transaction. The event loop never waits on the
+disk or on a locked database. The schema is created once, when the writer
+starts (api.py starts it at startup). The file is in WAL mode, and readers
+(/api/traces) use their own read-only connections, so reads and the writer
+do not block each other.
+
+Traces are served back by /api/traces/{thread_id} as a waterfall
+(offset + duration + depth per span) for profiling slow conversations.
+"""
+
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+from langchain_core.callbacks import BaseCallbackHandler
+from core import warmup
+
+logger = logging.getLogger(__name__)
+
+_AI_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TRACE_DB_PATH = os.getenv("TRACE_DB_PATH", os.path.join(_AI_DIR, "database", "traces.db"))
+TRACE_MAX_TRACES = int(os.getenv("TRACE_MAX_TRACES", "500"))  # rolling window
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "1") != "0"
+TRACE_DB_TIMEOUT_S = 10  # sqlite busy timeout, waited out on the writer thread
+
+# Preview length for tool inputs / error messages stored in span attributes
+_PREVIEW_CHARS = 200
+
+# The trace of the turn currently executing (set by api.py, read by agent.py)
+_current_trace: ContextVar["Trace | None"] = ContextVar("current_trace", default=None)
+
+
+def _preview(value) -> str:
+    text = value if isinstance(value, str) else str(value)
+    return text if len(text) <= _PREVIEW_CHARS else text[:_PREVIEW_CHARS] + "..."
+
+
+class Trace:
+    """In-memory span buffer for one agent turn."""
+
+    def __init__(self, thread_id: str, name: str = "chat_turn"):
+        self.trace_id = uuid.uuid4().hex
+        self.thread_id = thread_id
+        self.name = name
+        self.started_at = datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+        self._t0 = time.perf_counter()
+        self._lock = threading.Lock()
+        self.spans: list[dict] = []
+        self.root = self.start_span(name, "turn", parent_id=None)
+
+    def _now_ms(self) -> float:
+        return (time.perf_counter() - self._t0) * 1000
+
+    def start_span(self, name: str, kind: str, parent_id: str | None = "", **attrs) -> dict:
+        """
+        Open a span. parent_id="" attaches it to the innermost open node/turn span;
+        parent_id=None makes it a root span.
+        """
+        with self._lock:
+            if parent_id == "":
+                parent_id = self._innermost_open()
+            span = {
+                "span_id": uuid.uuid4().hex[:16],
+                "parent_id": parent_id,
+                "name": name,
+                "kind": kind,
+                "start_ms": self._now_ms(),
+                "duration_ms": None,
+                "attrs": attrs,
+            }
+            self.spans.append(span)
+        return span
+
+    def end_span(self, span: dict, **attrs):
+        """Close a span and merge any extra attributes into it."""
+        if span["duration_ms"] is None:
+            span["duration_ms"] = self._now_ms() - span["start_ms"]
+        span["attrs"].update(attrs)
+
+    def _innermost_open(self) -> str | None:
+        # Tool and LLM spans are leaves — only graph/node/turn spans act as parents
+        for span in reversed(self.spans):
+            if span["duration_ms"] is None and span["kind"] in ("turn", "graph", "node", "api"):
+                return span["span_id"]
+        return None
+
+    @contextmanager
+    def span(self, name: str, kind: str = "api", **attrs):
+        """Context manager that records the enclosed block as a span."""
+        s = self.start_span(name, kind, **attrs)
+        try:
+            yield s
+        except BaseException as e:
+            self.end_span(s, error=_preview(repr(e)))
+            raise
+        else:
+            self.end_span(s)
+
+    def finish(self, status: str = "ok"):
+        """Close any spans left open and persist the trace."""
+        self.end_span(self.root, status=status)
+        for s in self.spans:
+            if s["duration_ms"] is None:
+                self.end_span(s, unfinished=True)
+        if TRACING_ENABLED:
+            _enqueue(self, status)
+
+
+def set_current(trace: Trace):
+    """Make `trace` the current trace (read by span()). Returns a reset token."""
+    return _current_trace.set(trace)
+
+
+def reset_current(token):
+    """Undo set_current(). Tolerates being called from a different context."""
+    try:
+        _current_trace.reset(token)
+    except ValueError:
+        _current_trace.set(None)
+
+
+@contextmanager
+def span(name: str, kind: str = "api", **attrs):
+    """Record a span on the current trace, or do nothing when no trace is active."""
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+    with trace.span(name, kind, **attrs) as s:
+        yield s
+
+
+# ─── LangChain / LangGraph Callback Handler ─────────────────────────
+class TraceCallbackHandler(BaseCallbackHandler):
+    """
+    Records LangGraph node, tool and LLM runs as spans on a Trace.
+    Runnables that are not graph nodes (prompt callables, channel writers, etc.)
+    are skipped; their children are re-parented to the nearest recorded span.
+    """
+
+    run_inline = True  # keep span ordering deterministic under asyncio
+
+    def __init__(self, trace: Trace):
+        self.trace = trace
+        self._span_for_run: dict = {}   # run_id -> open span
+        self._parent_for_run: dict = {}  # run_id -> span_id children should attach to
+
+    def _resolve_parent(self, parent_run_id) -> str | None:
+        if parent_run_id is None:
+            return self.trace.root["span_id"]
+        return self._parent_for_run.get(parent_run_id, self.trace.root["span_id"])
+
+    def _open(self, run_id, parent_run_id, name: str, kind: str, **attrs):
+        span = self.trace.start_span(name, kind, parent_id=self._resolve_parent(parent_run_id), **attrs)
+        self._span_for_run[run_id] = span
+        self._parent_for_run[run_id] = span["span_id"]
+
+    def _close(self, run_id, **attrs):
+        span = self._span_for_run.pop(run_id, None)
+        if span is not None:
+            self.trace.end_span(span, **attrs)
+
+    # Chains: the graph itself and its nodes
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, tags=None, metadata=None, **kwargs):
+        name = kwargs.get("name") or (serialized or {}).get("name", "chain")
+        node = (metadata or {}).get("langgraph_node")
+        if parent_run_id is None:
+            self._open(run_id, parent_run_id, name, "graph")
+        elif node and node == name:
+            self._open(run_id, parent_run_id, name, "node", step=metadata.get("langgraph_step"))
+        else:
+            self._parent_for_run[run_id] = self._resolve_parent(parent_run_id)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._close(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._close(run_id, error=_preview(repr(error)))
+
+    # Tools
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, **kwargs):
+        name = kwargs.get("name") or (serialized or {}).get("name", "tool")
+        self._open(run_id, parent_run_id, name, "tool", input=_preview(input_str))
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        content = getattr(output, "content", output)
+        self._close(run_id, output_chars=len(content) if isinstance(content, str) else None)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._close(run_id, error=_preview(repr(error)))
+
+    # LLM calls
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, **kwargs):
+        params = kwargs.get("invocation_params") or {}
+        model = params.get("model") or (serialized or {}).get("name", "llm")
+        self._open(run_id, parent_run_id, model, "llm", messages=sum(len(m) for m in messages))
+
+    def on_llm_start(self, serialized, prompts, *, run_id, parent_run_id=None, **kwargs):
+        params = kwargs.get("invocation_params") or {}
+        model = params.get("model") or (serialized or {}).get("name", "llm")
+        self._open(run_id, parent_run_id, model, "llm", prompts=len(prompts))
+
+    def on_llm_new_token(self, token, *, run_id, **kwargs):
+        span = self._span_for_run.get(run_id)
+        if span is not None and "ttft_ms" not in span["attrs"]:
+            span["attrs"]["ttft_ms"] = round(self.trace._now_ms() - span["start_ms"], 1)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        attrs = {}
+        try:
+            message = response.generations[0][0].message
+            usage = getattr(message, "usage_metadata", None) or {}
+            attrs["input_tokens"] = usage.get("input_tokens")
+            attrs["output_tokens"] = usage.get("output_tokens")
+            attrs["tool_calls"] = len(getattr(message, "tool_calls", None) or [])
+            # Ollama reports model load time per request; non-trivial values are cold starts
+            meta = getattr(message, "response_metadata", None) or {}
+            if meta.get("load_duration"):
+                load_s = meta["load_duration"] / 1e9
+                attrs["load_ms"] = round(load_s * 1000, 1)
+                warmup.record_load(meta.get("model", ""), load_s, f"chat turn, thread {self.trace.thread_id}")
+        except (AttributeError, IndexError):
+            pass
+        self._close(run_id, **attrs)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._close(run_id, error=_preview(repr(error)))
+
+
+# ─── Rolling SQLite Store ────────────────────────────────────────────
+_write_queue: queue.Queue = queue.Queue()
+_writer: threading.Thread | None = None
+_writer_lock = threading.Lock()
+_STOP = object()
+
+
+def _connect() -> sqlite3.Connection:
+    return sqlite3.connect(TRACE_DB_PATH, timeout=TRACE_DB_TIMEOUT_S)
+
+
+def _connect_readonly() -> sqlite3.Connection:
+    uri = Path(os.path.abspath(TRACE_DB_PATH)).as_uri() + "?mode=ro"
+    return sqlite3.connect(uri, uri=True, timeout=TRACE_DB_TIMEOUT_S)
+
+
+def _create_schema(conn: sqlite3.Connection):
+    conn.execute("PRAGMA journal_mode=WAL")  # readers and the writer do not block each other
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS traces (
+            trace_id TEXT PRIMARY KEY,
+            thread_id TEXT NOT NULL,
+            name TEXT NOT NULL,
+            started_at TEXT NOT NULL,
+            duration_ms REAL,
+            status TEXT,
+            span_count INTEGER
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS spans (
+            trace_id TEXT NOT NULL,
+            span_id TEXT NOT NULL,
+            parent_id TEXT,
+            name TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            start_ms REAL NOT NULL,
+            duration_ms REAL,
+            attrs TEXT
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_traces_thread ON traces(thread_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_spans_trace ON spans(trace_id)")
+    conn.commit()
+
+
+def start_writer():
+    """Create the schema and start the background writer (idempotent; api.py calls it at startup)."""
+    global _writer
+    with _writer_lock:
+        if _writer is not None and _writer.is_alive():
+            return
+        _writer = threading.Thread(target=_write_loop, name="trace-writer", daemon=True)
+        _writer.start()
+
+
+def stop_writer(timeout: float = 5.0):
+    """Write out the queued traces and stop the writer (at shutdown)."""
+    with _writer_lock:
+        if _writer is None or not _writer.is_alive():
+            return
+        _write_queue.put(_STOP)
+        _writer.join(timeout)
+
+
+def _write_loop():
+    conn = _connect()
+    try:
+        _create_schema(conn)
+        while True:
+            item = _write_queue.get()
+            if item is _STOP:
+                return
+            try:
+                _write_trace(conn, *item)
+            except Exception as e:
+                logger.warning(f"Failed to persist trace {item[0][0]}: {e}")
+    finally:
+        conn.close()
+
+
+def _enqueue(trace: Trace, status: str):
+    """Copy the trace into rows and queue them for the writer. Never blocks."""
+    start_writer()
+    spans = [
+        (
+            trace.trace_id, s["span_id"], s["parent_id"], s["name"], s["kind"],
+            round(s["start_ms"], 2), round(s["duration_ms"], 2),
+            json.dumps({k: v for k, v in s["attrs"].items() if v is not None}),
+        )
+        for s in trace.spans
+    ]
+    row = (trace.trace_id, trace.thread_id, trace.name, trace.started_at,
+           round(trace.root["duration_ms"], 2), status, len(spans))
+    _write_queue.put((row, spans))
+
+
+def _write_trace(conn: sqlite3.Connection, row: tuple, spans: list[tuple]):
+    conn.execute("INSERT INTO traces VALUES (?, ?, ?, ?, ?, ?, ?)", row)
+    conn.executemany("INSERT INTO spans VALUES (?, ?, ?, ?, ?, ?, ?, ?)", spans)
+    # Keep only the newest TRACE_MAX_TRACES traces
+    conn.execute(
+        "DELETE FROM traces WHERE rowid <= (SELECT MAX(rowid) FROM traces) - ?",
+        (TRACE_MAX_TRACES,),
+    )
+    conn.execute("DELETE FROM spans WHERE trace_id NOT IN (SELECT trace_id FROM traces)")
+    conn.commit()
+
+
+def get_traces(thread_id: str, limit: int = 10) -> list[dict]:
+    """
+    Return the most recent traces for a thread as waterfalls.
+    Each span row carries offset_ms (from turn start), duration_ms and depth,
+    ordered by start time — ready to render as horizontal bars.
+    """
+    if not os.path.exists(TRACE_DB_PATH):
+        return []
+    conn = _connect_readonly()
+    try:
+        traces = conn.execute(
+            "SELECT trace_id, name, started_at, duration_ms, status, span_count FROM traces "
+            "WHERE thread_id = ? ORDER BY started_at DESC LIMIT ?",
+            (thread_id, limit),
+        ).fetchall()
+        result = []
+        for trace_id, name, started_at, duration_ms, status, span_count in traces:
+            spans = conn.execute(
+                "SELECT span_id, parent_id, name, kind, start_ms, duration_ms, attrs FROM spans "
+                "WHERE trace_id = ? ORDER BY start_ms",
+                (trace_id,),
+            ).fetchall()
+            result.append({
+                "trace_id": trace_id,
+                "name": name,
+                "started_at": started_at,
+                "duration_ms": duration_ms,
+                "status": status,
+                "span_count": span_count,
+                "waterfall": _waterfall(spans),
+            })
+        return result
+    finally:
+        conn.close()
+
+
+def _waterfall(spans) -> list[dict]:
+    depth = {}
+    rows = []
+    for span_id, parent_id, name, kind, start_ms, duration_ms, attrs in spans:
+        depth[span_id] = depth.get(parent_id, -1) + 1 if parent_id else 0
+        rows.append({
+            "span_id": span_id,
+            "parent_id": parent_id,
+            "name": name,
+            "kind": kind,
+            "depth": depth[span_id],
+            "offset_ms": start_ms,
+            "duration_ms": duration_ms,
+            "attrs": json.loads(attrs) if attrs else {},
+        })
+    return rows
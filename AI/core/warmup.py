@@ -0,0 +1,176 @@
+"""
+Ollama model warm-up and keep-alive.
+
+Loading qwen3.5:35b into VRAM takes tens of seconds, and nomic-embed-text a
+second or two. Without warm-up the first chat (or search) after an idle period
+pays that. At startup the API lifespan runs run(), which:
+  1. loads the chat model(s) and the embedding model with tiny requests (an
+     empty prompt, a one-word embedding) using the same load options as real
+     requests, so Ollama does not reload the model for the first chat
+  2. renews their keep-alive every KEEPALIVE_RENEW_S during business hours
+     (BUSINESS_DAYS, BUSINESS_HOURS, server local time). Outside those hours
+     the models unload MODEL_KEEP_ALIVE_S after their last request.
+Any load slower than COLD_START_S is logged as a cold start with its cost,
+whether it came from a warm-up, a renewal, or a chat turn (via record_load()
+from core/tracing.py). /api/ready reports the warm/cold state from Ollama's
+/api/ps.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timezone
+
+from ollama import AsyncClient
+
+from core.llm_config import (
+    EMBEDDING_MODEL, LLM_LOAD_OPTIONS, MAIN_MODEL, MODEL_KEEP_ALIVE_S, OLLAMA_BASE_URL, SMALL_MODEL,
+)
+
+logger = logging.getLogger(__name__)
+
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "1") == "1"
+KEEPALIVE_RENEW_S = int(os.getenv("KEEPALIVE_RENEW_S", "300"))
+BUSINESS_DAYS = os.getenv("BUSINESS_DAYS", "mon-fri")
+BUSINESS_HOURS = os.getenv("BUSINESS_HOURS", "07:00-18:00")
+COLD_START_S = float(os.getenv("COLD_START_S", "1.0"))  # loads slower than this are cold starts
+WARMUP_TIMEOUT_S = 300  # a 35B model load from disk can take minutes
+
+_DAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+
+_state = {
+    "phase": "pending",  # pending, warming, done, disabled
+    "models": {
+        MAIN_MODEL: {"role": "chat", "last_load_s": None, "cold_starts": 0, "last_warmed_at": None, "error": None},
+        EMBEDDING_MODEL: {"role": "embeddings", "last_load_s": None, "cold_starts": 0, "last_warmed_at": None, "error": None},
+    },
+}
+if SMALL_MODEL:
+    _state["models"][SMALL_MODEL] = {"role": "chat (fast tier)", "last_load_s": None, "cold_starts": 0,
+                                     "last_warmed_at": None, "error": None}
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def _parse_days(spec: str) -> set[int]:
+    """'mon-fri' or 'mon,wed,fri' -> weekday numbers (Monday = 0)."""
+    days = set()
+    for part in spec.lower().split(","):
+        first, _, last = part.strip().partition("-")
+        a = _DAYS.index(first[:3])
+        b = _DAYS.index(last[:3]) if last else a
+        days.update(range(a, b + 1) if a <= b else [*range(a, 7), *range(0, b + 1)])
+    return days
+
+
+def _minute_of_day(hhmm: str) -> int:
+    hours, _, minutes = hhmm.strip().partition(":")
+    return int(hours) * 60 + int(minutes or 0)
+
+
+def _parse_hours(spec: str) -> tuple[int, int]:
+    """'07:00-18:00' -> (minute of day start, minute of day end)."""
+    start, end = spec.split("-")
+    return _minute_of_day(start), _minute_of_day(end)
+
+
+def in_business_hours(now: datetime | None = None) -> bool:
+    now = now or datetime.now()
+    start, end = _parse_hours(BUSINESS_HOURS)
+    minute = now.hour * 60 + now.minute
+    return now.weekday() in _parse_days(BUSINESS_DAYS) and start <= minute < end
+
+
+def _tagged(name: str) -> str:
+    return name if ":" in name else f"{name}:latest"
+
+
+def _same_model(a: str, b: str) -> bool:
+    """Ollama reports 'nomic-embed-text:latest' for a model requested as 'nomic-embed-text'."""
+    return _tagged(a) == _tagged(b)
+
+
+def record_load(model: str, load_s: float, source: str):
+    """Record how long Ollama spent loading `model` for a request; log it if it was a cold start."""
+    entry = next((m for name, m in _state["models"].items() if _same_model(name, model)), None)
+    if entry is not None:
+        entry["last_load_s"] = round(load_s, 2)
+    if load_s >= COLD_START_S:
+        if entry is not None:
+            entry["cold_starts"] += 1
+        logger.warning(f"Cold start: {model} took {load_s:.1f}s to load ({source})")
+
+
+# ─── Warm-up / Keep-Alive ────────────────────────────────────────────
+async def _warm_chat(client: AsyncClient, model: str) -> float:
+    # An empty prompt loads the model without generating anything
+    start = time.perf_counter()
+    response = await client.generate(model=model, prompt="", keep_alive=MODEL_KEEP_ALIVE_S,
+                                     options=LLM_LOAD_OPTIONS)
+    wall = time.perf_counter() - start
+    return (response.load_duration or 0) / 1e9 or wall
+
+
+async def _warm_embeddings(client: AsyncClient, model: str) -> float:
+    start = time.perf_counter()
+    response = await client.embed(model=model, input="warm-up", keep_alive=MODEL_KEEP_ALIVE_S)
+    wall = time.perf_counter() - start
+    return (response.load_duration or 0) / 1e9 or wall
+
+
+async def warm_all(source: str):
+    """Load (or keep loaded) every model. Failures are recorded, never raised."""
+    client = AsyncClient(host=OLLAMA_BASE_URL, timeout=WARMUP_TIMEOUT_S)
+    for model, entry in _state["models"].items():
+        warm = _warm_embeddings if entry["role"] == "embeddings" else _warm_chat
+        try:
+            load_s = await warm(client, model)
+        except Exception as e:
+            entry["error"] = str(e) or type(e).__name__
+            logger.warning(f"Warm-up of {model} failed ({source}): {entry['error']}")
+            continue
+        entry["error"] = None
+        entry["last_warmed_at"] = _now()
+        record_load(model, load_s, source)
+
+
+async def run():
+    """Warm the models, then renew their keep-alive during business hours. Runs until cancelled."""
+    if not WARMUP_ENABLED:
+        _state["phase"] = "disabled"
+        return
+    _state["phase"] = "warming"
+    start = time.perf_counter()
+    await warm_all("startup warm-up")
+    _state["phase"] = "done"
+    logger.info(f"Model warm-up finished in {time.perf_counter() - start:.1f}s")
+    while True:
+        await asyncio.sleep(KEEPALIVE_RENEW_S)
+        if in_business_hours():
+            await warm_all("keep-alive")
+
+
+async def readiness() -> dict:
+    """Warm-up phase plus each model's warm/cold state from Ollama's /api/ps."""
+    models = {name: dict(entry) for name, entry in _state["models"].items()}
+    reachable = None
+    if WARMUP_ENABLED:
+        try:
+            loaded = (await AsyncClient(host=OLLAMA_BASE_URL, timeout=2).ps()).models
+            reachable = True
+        except Exception:
+            loaded, reachable = [], False
+        for name, entry in models.items():
+            match = next((m for m in loaded if _same_model(m.model or "", name)), None)
+            entry["warm"] = match is not None
+            entry["expires_at"] = match.expires_at.isoformat() if match and match.expires_at else None
+    return {
+        "warmup": _state["phase"],
+        "ollama_reachable": reachable,
+        "business_hours": in_business_hours(),
+        "keep_alive_s": MODEL_KEEP_ALIVE_S,
+        "models": models,
+    }
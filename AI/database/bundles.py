@@ -0,0 +1,174 @@
+"""
+Versioned knowledge-base bundles (KB_BACKEND=flat).
+
+A bundle is one flat generation directory (database/flat_index.py): the
+int8/float16 vectors, chunk texts and metadata, the navigation map and
+symbol index it was built with, and a manifest with per-file SHA-256
+hashes, a content_hash over all of them and a source_hash over the texts and
+metadata. Bundles are never modified after they are written.
+  - build once:  python -m database.bundles build --out <dir>   (e.g. in CI)
+  - ship:        copy <dir>/<bundle> to each environment
+  - install:     python -m database.bundles install <dir>/<bundle> --activate
+  - roll back:   python -m database.bundles activate <older bundle>
+                 or POST /api/bundles/<name>/activate
+Activation verifies the hashes, then flips the active pointer
+(retrieval.set_active_collection, an atomic rename). Searches memory-map the
+new bundle on their next call. Nothing is rebuilt or re-embedded on startup
+or rollback. /api/reingest builds a bundle in place and activates it. It
+keeps the newest KB_KEEP_BUNDLES bundles for rollback.
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import time
+import uuid
+
+from database import flat_index, symbols
+from database.retrieval import CHROMA_DB_DIR, get_active_collection, set_active_collection
+
+logger = logging.getLogger(__name__)
+
+KB_KEEP_BUNDLES = int(os.getenv("KB_KEEP_BUNDLES", "3"))  # newest bundles kept for rollback
+
+
+def _manifest(path: str) -> dict | None:
+    try:
+        with open(os.path.join(path, "manifest.json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def list_bundles(persist_dir: str = CHROMA_DB_DIR) -> list[dict]:
+    """Installed bundles, newest first: name, active flag and manifest summary."""
+    active = get_active_collection(persist_dir)
+    out = []
+    for name in flat_index.list_generations(persist_dir):
+        manifest = _manifest(flat_index.generation_dir(persist_dir, name))
+        if manifest is None:
+            continue  # still being written, or a failed build
+        out.append({
+            "name": name,
+            "active": name == active,
+            "created_at": manifest.get("created_at"),
+            "count": manifest.get("count"),
+            "dtype": manifest.get("dtype"),
+            "dims": manifest.get("dims"),
+            "model": manifest.get("model"),
+            "content_hash": manifest.get("content_hash"),
+            "source_hash": manifest.get("source_hash"),
+        })
+    return sorted(out, key=lambda b: b["created_at"] or "", reverse=True)
+
+
+def load_navigation_map(name: str, persist_dir: str = CHROMA_DB_DIR) -> bool:
+    """Serve the navigation map shipped in bundle `name`. False if it has none."""
+    path = os.path.join(flat_index.generation_dir(persist_dir, name), "navigation_map.json")
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            nav = json.load(f)
+    except (OSError, ValueError):
+        return False
+    from tools.navigation_tools import set_navigation_map
+    set_navigation_map(nav)
+    return True
+
+
+def activate(name: str, persist_dir: str = CHROMA_DB_DIR, verify: bool = True) -> dict:
+    """Verify bundle `name` and make it the active one. Returns its manifest."""
+    path = flat_index.generation_dir(persist_dir, name)
+    manifest = _manifest(path)
+    if manifest is None:
+        raise ValueError(f"Bundle '{name}' is not installed")
+    if verify:
+        problems = flat_index.verify(path)
+        if problems:
+            raise ValueError(f"Bundle '{name}' failed verification: {'; '.join(problems)}")
+    set_active_collection(name, persist_dir)
+    load_navigation_map(name, persist_dir)
+    logger.info(f"Activated knowledge-base bundle {name} ({manifest.get('content_hash', '')[:12]})")
+    return manifest
+
+
+def install(source: str, persist_dir: str = CHROMA_DB_DIR) -> str:
+    """Copy a bundle directory built elsewhere into this knowledge base. Returns its name."""
+    name = os.path.basename(os.path.normpath(source))
+    problems = flat_index.verify(source)
+    if problems:
+        raise ValueError(f"Bundle '{source}' failed verification: {'; '.join(problems)}")
+    target = flat_index.generation_dir(persist_dir, name)
+    if os.path.exists(target):
+        if _manifest(target) == _manifest(source):
+            return name  # already installed
+        raise ValueError(f"A different bundle named '{name}' is already installed")
+    # Copy beside the target, then rename: a bundle is either fully present or absent
+    tmp = f"{target}.{uuid.uuid4().hex[:6]}.tmp"
+    shutil.copytree(source, tmp)
+    os.replace(tmp, target)
+    return name
+
+
+def prune(persist_dir: str = CHROMA_DB_DIR, keep: int = KB_KEEP_BUNDLES) -> list[str]:
+    """Bundles beyond the newest `keep` (never the active one), i.e. the ones to remove."""
+    bundles = list_bundles(persist_dir)
+    return [b["name"] for b in bundles[keep:] if not b["active"]]
+
+
+# ─── CLI ─────────────────────────────────────────────────────────────
+def _build(out_dir: str) -> str:
+    """Load, split and embed the sources into a new bundle under out_dir. Returns its path."""
+    from database import ingest
+
+    generation = f"ng911_{time.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+    path = os.path.join(out_dir, generation)
+    t0 = time.perf_counter()
+    symbol_index = symbols.new_index()
+    ingest.embed_bundle(path, generation, ingest.iter_corpus_chunks(symbol_index=symbol_index), symbol_index)
+    print(f"Built in {time.perf_counter() - t0:.1f}s, peak RSS {ingest.peak_rss_mb()} MB")
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build, install and switch knowledge-base bundles")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build_cmd = sub.add_parser("build", help="build a bundle from the repo sources")
+    build_cmd.add_argument("--out", required=True, help="directory to write the bundle into")
+    install_cmd = sub.add_parser("install", help="copy a bundle into CHROMA_DB_DIR")
+    install_cmd.add_argument("path")
+    install_cmd.add_argument("--activate", action="store_true")
+    activate_cmd = sub.add_parser("activate", help="switch the active bundle (e.g. roll back)")
+    activate_cmd.add_argument("name")
+    verify_cmd = sub.add_parser("verify", help="check a bundle's files against its manifest")
+    verify_cmd.add_argument("path")
+    sub.add_parser("list", help="list installed bundles")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "build":
+            print(_build(args.out))
+        elif args.command == "install":
+            name = install(args.path)
+            print(f"Installed {name}")
+            if args.activate:
+                activate(name)
+                print(f"Activated {name}")
+        elif args.command == "activate":
+            activate(args.name)
+            print(f"Activated {args.name}")
+        elif args.command == "verify":
+            problems = flat_index.verify(args.path)
+            print("\n".join(problems) or "OK")
+            raise SystemExit(1 if problems else 0)
+        else:
+            for b in list_bundles():
+                print(f"{'*' if b['active'] else ' '} {b['name']}  {b['created_at']}  {b['count']} chunks  "
+                      f"{b['dtype']}x{b['dims']}  {b['content_hash'][:12] if b['content_hash'] else '-'}")
+    except ValueError as e:
+        raise SystemExit(str(e))
+
+
+if __name__ == "__main__":
+    main()
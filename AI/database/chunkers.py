@@ -0,0 +1,303 @@
+"""
+Structure-aware chunkers for the knowledge base.
+
+RecursiveCharacterTextSplitter cuts at the first separator that fits, so a
+61-field schema table or a long Arcade rule gets sliced at arbitrary points.
+These chunkers split on the document's own structure first:
+  - Python:   top-level functions and classes (ast); oversized classes by method
+  - Arcade:   top-level blocks of an attribute rule (blank lines at brace depth 0)
+  - HTML:     <section> blocks; oversized sections by table row, under the section heading
+              (inline base64 data: URIs are replaced by a placeholder)
+  - Markdown: heading sections, labelled with their heading path
+Adjacent small blocks are packed together up to chunk_size. A single block that
+is still larger falls back to the character splitter. Every chunk carries:
+  symbol       function/class names, section heading or heading path
+  kind         function, class, module, rule_block, section, table_rows, heading
+  element_ids  HTML ids (e.g. field-St_PreTyp) or Arcade $feature fields, comma-separated
+  start_line   1-based line of the chunk in the source file
+A chunk's text runs line for line from start_line, except for label lines
+added above it (the "[symbol]" line on the later pieces of a block split by
+the fallback splitter, the heading comment on HTML table rows); label_lines
+says how many there are, so line ranges can discount them
+(database/compaction.py).
+"""
+
+import ast
+import re
+
+from langchain_core.documents import Document
+
+# ─── Blocks ──────────────────────────────────────────────────────────
+# A block is (text, meta) where meta has symbol/kind/element_ids(list)/start_line.
+
+
+_SYMBOL_CHARS = 80  # headings can be arbitrarily long; symbols are labels
+
+
+def _short(text: str) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= _SYMBOL_CHARS else text[: _SYMBOL_CHARS - 3] + "..."
+
+
+def _block(text: str, symbol: str, kind: str, start_line: int, element_ids=()) -> tuple[str, dict]:
+    return text, {"symbol": symbol, "kind": kind, "element_ids": list(element_ids), "start_line": start_line}
+
+
+def _pack(blocks: list, chunk_size: int) -> list:
+    """
+    Merge runs of adjacent blocks while the result stays within chunk_size.
+    Whitespace-only blocks stay with the block before them and a labelled
+    block always starts a new chunk, so packed text still matches the file
+    line for line from its start_line.
+    """
+    packed, gap = [], True
+    for text, meta in blocks:
+        if not text.strip():
+            if packed and not gap and len(packed[-1][0]) + len(text) <= chunk_size:
+                packed[-1] = (packed[-1][0] + text, packed[-1][1])
+            else:
+                gap = True  # dropped: what follows no longer continues the previous chunk
+            continue
+        if packed and not gap and not meta.get("label_lines") and len(packed[-1][0]) + len(text) <= chunk_size:
+            prev_text, prev = packed[-1]
+            symbols = [s for s in (prev["symbol"], meta["symbol"]) if s]
+            packed[-1] = (prev_text + text, {
+                "symbol": ", ".join(dict.fromkeys(", ".join(symbols).split(", "))) if symbols else "",
+                "kind": prev["kind"] if prev["kind"] == meta["kind"] else "mixed",
+                "element_ids": prev["element_ids"] + [i for i in meta["element_ids"] if i not in prev["element_ids"]],
+                "start_line": prev["start_line"],
+                **({"label_lines": prev["label_lines"]} if prev.get("label_lines") else {}),
+            })
+        else:
+            packed.append((text, dict(meta)))
+        gap = False
+    return packed
+
+
+# ─── Python ──────────────────────────────────────────────────────────
+def _python_blocks(text: str, chunk_size: int) -> list:
+    tree = ast.parse(text)
+    lines = text.splitlines(keepends=True)
+    blocks, cursor = [], 0
+
+    def defs_start(node) -> int:
+        start = min([d.lineno for d in getattr(node, "decorator_list", [])] + [node.lineno]) - 1
+        # Keep the comment block directly above a definition with it
+        while start > 0 and lines[start - 1].lstrip().startswith("#"):
+            start -= 1
+        return start
+
+    for node in tree.body:
+        if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            continue
+        start = max(defs_start(node), cursor)
+        if start > cursor:
+            blocks.append(_block("".join(lines[cursor:start]), "", "module", cursor + 1))
+        body = "".join(lines[start:node.end_lineno])
+        if isinstance(node, ast.ClassDef) and len(body) > chunk_size:
+            blocks.extend(_class_blocks(node, lines, start, defs_start))
+        else:
+            kind = "class" if isinstance(node, ast.ClassDef) else "function"
+            blocks.append(_block(body, node.name, kind, start + 1))
+        cursor = node.end_lineno
+    if cursor < len(lines):
+        blocks.append(_block("".join(lines[cursor:]), "", "module", cursor + 1))
+    return blocks
+
+
+def _class_blocks(node: ast.ClassDef, lines: list[str], start: int, defs_start) -> list:
+    """Split an oversized class into its header and one block per method."""
+    blocks, cursor = [], start
+    for child in node.body:
+        if not isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            continue
+        child_start = max(defs_start(child), cursor)
+        if child_start > cursor:
+            blocks.append(_block("".join(lines[cursor:child_start]), node.name, "class", cursor + 1))
+        blocks.append(_block("".join(lines[child_start:child.end_lineno]),
+                             f"{node.name}.{child.name}", "function", child_start + 1))
+        cursor = child.end_lineno
+    if cursor < node.end_lineno:
+        blocks.append(_block("".join(lines[cursor:node.end_lineno]), node.name, "class", cursor + 1))
+    return blocks
+
+
+# ─── Arcade ──────────────────────────────────────────────────────────
+_ARCADE_STRIP = re.compile(r'//.*$|"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'')
+_ARCADE_FUNC = re.compile(r"\bfunction\s+(\w+)")
+_ARCADE_FIELD = re.compile(r"\$(?:feature|originalFeature)\.(\w+)")
+
+
+def _arcade_blocks(text: str, rule_name: str) -> list:
+    """Top-level blocks: runs of lines separated by blank lines at brace depth 0."""
+    blocks, current, depth, start = [], [], 0, 1
+    for lineno, line in enumerate(text.splitlines(keepends=True), 1):
+        if not current:
+            start = lineno
+        current.append(line)
+        code = _ARCADE_STRIP.sub("", line)
+        depth = max(depth + code.count("{") - code.count("}"), 0)
+        if depth == 0 and not line.strip():
+            blocks.append(_arcade_block("".join(current), rule_name, start))
+            current = []
+    if current:
+        blocks.append(_arcade_block("".join(current), rule_name, start))
+    return blocks
+
+
+def _arcade_block(text: str, rule_name: str, start: int) -> tuple[str, dict]:
+    functions = _ARCADE_FUNC.findall(text)
+    fields = list(dict.fromkeys(_ARCADE_FIELD.findall(text)))
+    return _block(text, ", ".join(functions) or rule_name, "rule_block", start, fields)
+
+
+# ─── HTML ────────────────────────────────────────────────────────────
+_SECTION_TAG = re.compile(r"<section\b|</section\s*>", re.IGNORECASE)
+_HEADING = re.compile(r"<h[1-4][^>]*>(.*?)</h[1-4]>", re.IGNORECASE | re.DOTALL)
+_TAGS = re.compile(r"<[^>]+>")
+_ID_ATTR = re.compile(r'\bid="([^"]+)"')
+_TR = re.compile(r"^[ \t]*<tr\b", re.IGNORECASE | re.MULTILINE)
+# Inline downloads/images (data:...;base64,...) are tens of KB of noise to an embedding
+_DATA_URI = re.compile(r"(data:[\w/+.-]+;base64,)[A-Za-z0-9+/=]{200,}")
+
+
+def _line_at(text: str, pos: int) -> int:
+    return text.count("\n", 0, pos) + 1
+
+
+def _html_blocks(text: str, chunk_size: int) -> list:
+    """Top-level <section> blocks; oversized sections are split by table row."""
+    text = _DATA_URI.sub(r"\1[embedded file omitted]", text)
+    spans, depth, open_at = [], 0, 0
+    for m in _SECTION_TAG.finditer(text):
+        if m.group(0).lower().startswith("<section"):
+            if depth == 0:
+                open_at = m.start()
+            depth += 1
+        elif depth:
+            depth -= 1
+            if depth == 0:
+                spans.append((open_at, m.end()))
+
+    blocks, cursor = [], 0
+    for start, end in spans:
+        # Back up to the start of the line so indentation stays with the section
+        start = text.rfind("\n", 0, start) + 1
+        if start > cursor:
+            blocks.append(_html_piece(text, cursor, start, "", "page"))
+        blocks.extend(_html_section(text, start, end, chunk_size))
+        cursor = end
+    if cursor < len(text):
+        blocks.append(_html_piece(text, cursor, len(text), "", "page"))
+    return blocks
+
+
+def _html_piece(text: str, start: int, end: int, symbol: str, kind: str, prefix: str = "") -> tuple[str, dict]:
+    piece = text[start:end]
+    return _block(prefix + piece, symbol, kind, _line_at(text, start), _ID_ATTR.findall(piece))
+
+
+def _html_section(text: str, start: int, end: int, chunk_size: int) -> list:
+    section = text[start:end]
+    heading = _HEADING.search(section)
+    title = _short(_TAGS.sub("", heading.group(1))) if heading else ""
+    if len(section) <= chunk_size:
+        return [_html_piece(text, start, end, title, "section")]
+
+    rows = [start + m.start() for m in _TR.finditer(section)]
+    if not rows:
+        return [_html_piece(text, start, end, title, "section")]
+    # Section intro (heading, table header), then runs of rows labelled with the heading
+    blocks = [_html_piece(text, start, rows[0], title, "section")]
+    prefix = f"<!-- {title} -->\n" if title else ""
+    row_blocks = [
+        _html_piece(text, a, b, title, "table_rows")
+        for a, b in zip(rows, rows[1:] + [end])
+    ]
+    for row_text, meta in _pack(row_blocks, chunk_size - len(prefix)):
+        blocks.append((prefix + row_text, {**meta, "label_lines": 1} if prefix else meta))
+    return blocks
+
+
+# ─── Markdown ────────────────────────────────────────────────────────
+_MD_HEADING = re.compile(r"^(#{1,4})\s+(.+?)\s*#*\s*$")
+
+
+def _markdown_blocks(text: str) -> list:
+    """One block per heading section, labelled with the heading path (H1 > H2 > H3)."""
+    blocks, current, path, start, in_fence = [], [], [], 1, False
+    symbol = ""
+    for lineno, line in enumerate(text.splitlines(keepends=True), 1):
+        if line.lstrip().startswith("```"):
+            in_fence = not in_fence
+        m = None if in_fence else _MD_HEADING.match(line)
+        if m:
+            if current:
+                blocks.append(_block("".join(current), symbol, "heading", start))
+            level = len(m.group(1))
+            path = path[: level - 1] + [_short(m.group(2))]
+            symbol = " > ".join(path)
+            current, start = [], lineno
+        current.append(line)
+    if current:
+        blocks.append(_block("".join(current), symbol, "heading", start))
+    return blocks
+
+
+# ─── Entry Point ─────────────────────────────────────────────────────
+def _blocks_for(doc: Document, chunk_size: int) -> list | None:
+    text = doc.page_content
+    ext = doc.metadata.get("extension", "")
+    if doc.metadata.get("category") == "attribute_rule" and ext in ("txt", "js"):
+        return _arcade_blocks(text, doc.metadata.get("component", ""))
+    if ext == "py":
+        return _python_blocks(text, chunk_size)
+    if ext == "html":
+        return _html_blocks(text, chunk_size)
+    if ext == "md":
+        return _markdown_blocks(text)
+    return None
+
+
+def split_structured(doc: Document, chunk_size: int, fallback) -> list[Document]:
+    """
+    Split one document along its structure. `fallback` is a text splitter used
+    for unsupported file types, unparseable files, and blocks over chunk_size.
+    """
+    try:
+        blocks = _blocks_for(doc, chunk_size)
+    except SyntaxError:
+        blocks = None
+    if blocks is None:
+        return fallback.split_documents([doc])
+
+    chunks = []
+    for text, meta in _pack(blocks, chunk_size):
+        metadata = {
+            **doc.metadata,
+            "symbol": meta["symbol"],
+            "kind": meta["kind"],
+            "element_ids": ",".join(meta["element_ids"]),
+            "start_line": meta["start_line"],
+        }
+        block_label = meta.get("label_lines", 0)
+        if block_label:
+            metadata["label_lines"] = block_label
+        if len(text) <= chunk_size:
+            chunks.append(Document(page_content=text, metadata=metadata))
+            continue
+        label = f"[{meta['symbol']}]\n" if meta["symbol"] else ""
+        offset = 0
+        for i, piece in enumerate(fallback.split_text(text)):
+            # Pieces overlap and come in order: find each one at or after the previous start
+            found = text.find(piece, offset)
+            offset = found if found >= 0 else offset
+            piece_meta = {**metadata, "start_line": meta["start_line"] + max(text.count("\n", 0, offset) - block_label, 0)}
+            if offset:
+                piece_meta.pop("label_lines", None)  # only the first piece starts with the block's label
+            if i and label:
+                # Pieces after the first lose the block's opening line; restate what they belong to
+                piece, piece_meta["label_lines"] = label + piece, 1
+            chunks.append(Document(page_content=piece, metadata=piece_meta))
+            offset += 1
+    return chunks
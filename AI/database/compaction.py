@@ -0,0 +1,147 @@
+"""
+Post-retrieval compaction of knowledge-base hits.
+
+Raw top-k chunks waste context: neighbouring chunks from one file repeat
+their overlap, weak matches ride along, and a 2,500-character chunk is sent
+when three lines of it answer the question. compact_hits():
+  1. drops hits below KB_MIN_RELEVANCE (the best hit is always kept)
+  2. merges hits from the same source that overlap or are adjacent
+  3. in "snippets" mode, cuts each result down to the lines that match the
+     query (with one line of context), up to KB_SNIPPET_CHARS
+Full chunks are returned in "full" mode.
+"""
+
+import os
+import re
+
+# 0.35 is an unmeasured guess, not a calibrated value; prefetch reuses it
+# (core/prefetch.py). Check it against the production embeddings with
+# benchmarks/bench_relevance.py and set KB_MIN_RELEVANCE from the result.
+KB_MIN_RELEVANCE = float(os.getenv("KB_MIN_RELEVANCE", "0.35"))
+KB_SNIPPET_CHARS = int(os.getenv("KB_SNIPPET_CHARS", "700"))
+
+_WORD = re.compile(r"[a-z0-9_]{3,}")
+_STOPWORDS = frozenset(
+    "the and for are how what when where which who why with does this that from into "
+    "about can you your show tell find".split()
+)
+
+
+def _query_terms(query: str) -> set[str]:
+    return {w for w in _WORD.findall(query.lower()) if w not in _STOPWORDS}
+
+
+def _overlap_len(a: str, b: str) -> int:
+    """Length of the longest suffix of `a` that is a prefix of `b` (0 if under 20 chars)."""
+    probe = b[:40]
+    if len(probe) < 20:
+        return 0
+    idx = a.find(probe, max(len(a) - 4000, 0))
+    while idx != -1:
+        tail = a[idx:]
+        if b.startswith(tail):
+            return len(tail)
+        idx = a.find(probe, idx + 1)
+    return 0
+
+
+def _hit(doc, relevance: float) -> dict:
+    meta = doc.metadata
+    start = meta.get("start_line") or None
+    text = doc.page_content
+    if meta.get("label_lines"):
+        # The "[symbol]" line database/chunkers.py put above a split piece is not in the file
+        text = text.split("\n", meta["label_lines"])[-1]
+    return {
+        "source": meta.get("source", "Unknown"),
+        "component": meta.get("component", ""),
+        "symbols": [meta["symbol"]] if meta.get("symbol") else [],
+        # Paths whose identical/near-identical copies were dropped at ingest (database/dedup.py)
+        "also_in": meta["duplicate_sources"].split("; ") if meta.get("duplicate_sources") else [],
+        "start_line": start,
+        "end_line": start + text.rstrip("\n").count("\n") if start else None,
+        "relevance": relevance,
+        "text": text,
+    }
+
+
+def _merge(a: dict, b: dict) -> dict | None:
+    """Merge b into a when b continues a (textual overlap or the next line); else None."""
+    overlap = _overlap_len(a["text"], b["text"])
+    follows = a["end_line"] is not None and b["start_line"] == a["end_line"] + 1
+    if not overlap and not follows:
+        return None
+    merged = dict(a)
+    joiner = "" if overlap or a["text"].endswith("\n") else "\n"
+    merged["text"] = a["text"] + joiner + b["text"][overlap:]
+    merged["symbols"] = a["symbols"] + [s for s in b["symbols"] if s not in a["symbols"]]
+    merged["relevance"] = max(a["relevance"], b["relevance"])
+    if b["end_line"] is not None:
+        merged["end_line"] = max(a["end_line"] or 0, b["end_line"])
+    return merged
+
+
+def _snippet(text: str, terms: set[str], max_chars: int) -> tuple[str, bool]:
+    """Query-focused excerpt: matching lines ±1, in file order. Returns (text, was_cut)."""
+    if len(text) <= max_chars or not terms:
+        return text[:max_chars] if len(text) > max_chars else text, len(text) > max_chars
+    lines = text.splitlines()
+    scores = [len(terms & set(_WORD.findall(line.lower()))) for line in lines]
+    keep: set[int] = set()
+    used = 0
+    for i in sorted(range(len(lines)), key=lambda i: -scores[i]):
+        if scores[i] == 0:
+            break
+        window = [j for j in (i - 1, i, i + 1) if 0 <= j < len(lines) and j not in keep]
+        cost = sum(len(lines[j]) + 1 for j in window)
+        if used + cost > max_chars and keep:
+            break
+        keep.update(window)
+        used += cost
+    if not keep:
+        return text[:max_chars], True
+    out, prev = [], None
+    for j in sorted(keep):
+        if prev is not None and j != prev + 1:
+            out.append("...")
+        out.append(lines[j][:max_chars])
+        prev = j
+    return "\n".join(out), True
+
+
+def compact_hits(query: str, hits: list[tuple], detail: str = "snippets",
+                 min_relevance: float = KB_MIN_RELEVANCE) -> list[dict]:
+    """
+    Compact (Document, relevance) pairs, best first. Returns result dicts with
+    source, component, symbols, also_in, start_line, end_line, relevance, text, snippet.
+    """
+    if not hits:
+        return []
+    # L2-derived relevance can go negative for weak matches, so a threshold <= 0 disables filtering
+    best = max(score for _, score in hits)
+    kept = [_hit(doc, score) for doc, score in hits
+            if min_relevance <= 0 or score >= min_relevance or score == best]
+
+    # Merge per source, walking each source's hits in file order
+    results: list[dict] = []
+    by_source: dict[str, list[dict]] = {}
+    for h in kept:
+        by_source.setdefault(h["source"], []).append(h)
+    for group in by_source.values():
+        group.sort(key=lambda h: h["start_line"] or 0)
+        merged = [group[0]]
+        for h in group[1:]:
+            combined = _merge(merged[-1], h)
+            if combined is None:
+                merged.append(h)
+            else:
+                merged[-1] = combined
+        results.extend(merged)
+    results.sort(key=lambda h: -h["relevance"])
+
+    terms = _query_terms(query)
+    for r in results:
+        r["snippet"] = False
+        if detail == "snippets":
+            r["text"], r["snippet"] = _snippet(r["text"], terms, KB_SNIPPET_CHARS)
+    return results
@@ -0,0 +1,126 @@
+"""
+Ingest-time deduplication of knowledge-base chunks.
+
+The sources repeat themselves: Web App/docs/<page>.html and
+docs/partials/<page>.html carry the same sections, municipality guides share
+templates, and scripts share helper functions. Identical chunks crowd the
+top-k and cost an embedding each. Before embedding, ingest.py makes a cheap
+first pass over the chunk stream (plan()) and a second, deduplicated one
+(apply()):
+  - exact duplicates: same SHA-1 after whitespace normalization
+  - near duplicates:  MinHash over word 5-gram shingles, LSH banding for
+    candidates, merged when the estimated Jaccard similarity is at least
+    KB_DEDUP_THRESHOLD
+One canonical chunk is kept per group, preferring the more specific category
+(an attribute rule over a web page, a page partial over the full web app
+file), then the first seen. Its metadata lists the other paths in
+duplicate_sources ("; "-separated, since Chroma metadata values are scalars).
+Only hashes and signatures are held between the passes, never chunk text.
+"""
+
+import hashlib
+import os
+import re
+import zlib
+
+import numpy as np
+
+KB_DEDUP = os.getenv("KB_DEDUP", "1") == "1"
+KB_DEDUP_THRESHOLD = float(os.getenv("KB_DEDUP_THRESHOLD", "0.9"))  # estimated Jaccard for near duplicates
+
+SHINGLE_WORDS = 5
+NUM_PERM = 64
+BANDS = 16  # 4 rows per band: pairs above ~0.5 Jaccard become candidates
+_PRIME = (1 << 31) - 1
+_rng = np.random.default_rng(911)  # fixed seed: signatures must not change between runs
+_A = _rng.integers(1, _PRIME, NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, _PRIME, NUM_PERM, dtype=np.uint64)
+
+_WORD = re.compile(r"\w+")
+# Lower rank wins when choosing the canonical copy
+_CATEGORY_RANK = {"attribute_rule": 0, "automation_script": 1, "documentation": 2, "web_page": 3, "web_app": 4}
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha1(" ".join(text.split()).encode("utf-8")).hexdigest()
+
+
+def signature(text: str) -> np.ndarray:
+    """MinHash signature (NUM_PERM uint32 values) of the text's word 5-gram shingles."""
+    words = _WORD.findall(text.lower())
+    n = max(len(words) - SHINGLE_WORDS + 1, 1)
+    shingles = {zlib.crc32(" ".join(words[i : i + SHINGLE_WORDS]).encode("utf-8")) for i in range(n)}
+    x = np.fromiter(shingles, dtype=np.uint64, count=len(shingles)) & np.uint64(_PRIME)
+    return ((_A[:, None] * x[None, :] + _B[:, None]) % np.uint64(_PRIME)).min(axis=1).astype(np.uint32)
+
+
+def _bands(sig: np.ndarray) -> list[bytes]:
+    rows = NUM_PERM // BANDS
+    return [bytes([b]) + sig[b * rows : (b + 1) * rows].tobytes() for b in range(BANDS)]
+
+
+def plan(chunks, threshold: float = KB_DEDUP_THRESHOLD) -> dict:
+    """
+    First pass: decide which chunk survives each duplicate group.
+    Returns {"canonical": {hash: source}, "sources": {hash: [paths]},
+    "seen": set of hashes, "stats": {...}}.
+    """
+    groups: dict[str, dict] = {}
+    total = 0
+    for chunk in chunks:
+        h = content_hash(chunk.page_content)
+        rank = (_CATEGORY_RANK.get(chunk.metadata.get("category"), 9), total)
+        source = chunk.metadata.get("source", "")
+        total += 1
+        group = groups.get(h)
+        if group is None:
+            groups[h] = {"best": (rank, source), "sources": [source], "sig": signature(chunk.page_content)}
+            continue
+        group["best"] = min(group["best"], (rank, source))
+        if source not in group["sources"]:
+            group["sources"].append(source)
+
+    # Near duplicates: visit groups best-first, so the one kept is the better-ranked
+    kept: dict[str, list[str]] = {}
+    buckets: dict[bytes, list[str]] = {}
+    merged = 0
+    for h in sorted(groups, key=lambda h: groups[h]["best"][0]):
+        sig = groups[h]["sig"]
+        keys = _bands(sig)
+        candidates = dict.fromkeys(c for k in keys for c in buckets.get(k, []))
+        target = next((c for c in candidates if np.mean(groups[c]["sig"] == sig) >= threshold), None)
+        if target is None:
+            kept[h] = list(groups[h]["sources"])
+            for k in keys:
+                buckets.setdefault(k, []).append(h)
+        else:
+            merged += 1
+            kept[target] += [s for s in groups[h]["sources"] if s not in kept[target]]
+
+    canonical = {h: groups[h]["best"][1] for h in kept}
+    sources = {h: [canonical[h]] + [s for s in kept[h] if s != canonical[h]] for h in kept}
+    stats = {
+        "chunks": total,
+        "exact_duplicates": total - len(groups),
+        "near_duplicates": merged,
+        "kept": len(kept),
+        "dropped_pct": round(100 * (total - len(kept)) / total, 1) if total else 0.0,
+    }
+    return {"canonical": canonical, "sources": sources, "seen": set(groups), "stats": stats}
+
+
+def apply(chunks, dedup_plan: dict):
+    """Second pass: yield only the canonical chunks, annotated with the paths of their duplicates."""
+    emitted = set()
+    for chunk in chunks:
+        h = content_hash(chunk.page_content)
+        if h not in dedup_plan["seen"]:
+            yield chunk  # changed since the first pass; keep it rather than guess
+            continue
+        if dedup_plan["canonical"].get(h) != chunk.metadata.get("source", "") or h in emitted:
+            continue
+        emitted.add(h)
+        others = dedup_plan["sources"][h][1:]
+        if others:
+            chunk.metadata["duplicate_sources"] = "; ".join(others)
+        yield chunk
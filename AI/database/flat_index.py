@@ -0,0 +1,397 @@
+"""
+Flat NumPy vector index: an alternative knowledge-base backend to Chroma.
+
+The corpus is a few thousand chunks, so exact search is one matrix-vector
+product, cheaper than maintaining an HNSW graph. A generation is a directory
+under <CHROMA_DB_DIR>/flat/<generation>/:
+  vectors.npy    (n, dims) int8 with per-row scales in scales.npy, or float16
+  texts.bin      chunk texts, UTF-8, concatenated (spans in offsets.npy)
+  metadata.json  chunk ids and metadata, one entry per row
+  <extra>.json   artifacts built alongside the vectors (e.g. navigation_map.json)
+  manifest.json  dtype, dims, count, embedding model, per-file SHA-256, and
+                 content_hash / source_hash over them
+vectors.npy and texts.bin are memory-mapped: loading reads only the metadata,
+and a query touches the pages it scores plus the texts it returns.
+Generations are immutable once written, so the directory doubles as a
+versioned bundle that can be copied between machines (database/bundles.py).
+
+Vectors are L2-normalized (after optional Matryoshka-style truncation to
+KB_FLAT_DIMS), so scores are cosine similarities. Relevance uses the same
+formula Chroma's default L2 space gives, so KB_MIN_RELEVANCE means the same
+thing on either backend. Category filters use boolean masks built at load.
+
+Select with KB_BACKEND=flat (ingest.py then builds flat generations instead
+of Chroma collections).
+
+A swapped-out generation's FlatIndex is closed once its in-flight searches
+finish (after RETIRE_GRACE_S, for callers that already hold it), so its
+memory maps do not keep the files open. Windows cannot delete open files.
+"""
+
+import hashlib
+import json
+import logging
+import math
+import mmap
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import numpy as np
+from langchain_core.documents import Document
+
+logger = logging.getLogger(__name__)
+
+KB_FLAT_DTYPE = os.getenv("KB_FLAT_DTYPE", "int8")  # int8 or float16
+KB_FLAT_DIMS = int(os.getenv("KB_FLAT_DIMS", "0"))     # 0 = keep the model's full width
+
+_SUBDIR = "flat"
+_BLOCK_ROWS = 1024  # rows converted to float32 per matmul block (stays in cache)
+FORMAT_VERSION = 1
+_SOURCE_FILES = ("texts.bin", "metadata.json")  # what source_hash covers: same inputs, same hash
+RETIRE_GRACE_S = 30  # a replaced index stays open this long for callers that already hold it
+
+
+def generation_dir(persist_dir: str, generation: str) -> str:
+    return os.path.join(persist_dir, _SUBDIR, generation)
+
+
+def list_generations(persist_dir: str) -> list[str]:
+    try:
+        return sorted(os.listdir(os.path.join(persist_dir, _SUBDIR)))
+    except OSError:
+        return []
+
+
+def remove_generation(persist_dir: str, generation: str) -> bool:
+    """Delete a generation's directory. True only if it is gone (failures are logged)."""
+    path = generation_dir(persist_dir, generation)
+    if not os.path.isdir(path):
+        return False
+    with _open_lock:
+        index = _open.pop(path, None)
+    if index is not None:
+        index.retire(0)  # closes now, or when its last in-flight search ends
+    # manifest.json goes last: a generation that could not be fully removed stays
+    # listed (bundles.list_bundles), so the next cleanup retries it
+    errors = []
+    on_error = lambda func, failed, exc: errors.append(f"{os.path.basename(failed)}: {exc[1]}")
+    for name in sorted(os.listdir(path), key=lambda n: n == "manifest.json"):
+        if name == "manifest.json" and errors:
+            break
+        target = os.path.join(path, name)
+        if os.path.isdir(target):
+            shutil.rmtree(target, onerror=on_error)
+        else:
+            try:
+                os.remove(target)
+            except OSError as e:
+                errors.append(f"{name}: {e}")
+    if not errors:
+        try:
+            os.rmdir(path)
+        except OSError as e:
+            errors.append(f"{generation}: {e}")
+    if errors or os.path.exists(path):
+        # e.g. on Windows, a file another worker process still has mapped
+        logger.warning(f"Could not fully remove flat generation '{generation}' "
+                       f"({len(errors)} error(s), first: {errors[0] if errors else 'directory remains'})")
+        return False
+    return True
+
+
+def _prepare(vectors: np.ndarray, dims: int) -> np.ndarray:
+    """Truncate to `dims` (Matryoshka) and L2-normalize each row."""
+    if dims and dims < vectors.shape[1]:
+        vectors = vectors[:, :dims]
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32)
+
+
+def _quantize(vectors: np.ndarray, dtype: str) -> tuple[np.ndarray, np.ndarray | None]:
+    if dtype == "float16":
+        return vectors.astype(np.float16), None
+    if dtype == "int8":
+        # Symmetric per-row scale: row ≈ q * scale
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        q = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+        return q, scales.astype(np.float32)
+    raise ValueError(f"Unsupported KB_FLAT_DTYPE '{dtype}' (use float16 or int8)")
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _combined_hash(files: dict, names) -> str:
+    return hashlib.sha256("".join(f"{n}:{files[n]['sha256']}\n" for n in sorted(names)).encode()).hexdigest()
+
+
+def hash_files(path: str) -> dict:
+    """{file name: {"bytes", "sha256"}} for every file in a generation except the manifest."""
+    return {
+        name: {"bytes": os.path.getsize(os.path.join(path, name)), "sha256": _sha256(os.path.join(path, name))}
+        for name in sorted(os.listdir(path)) if name != "manifest.json"
+    }
+
+
+def verify(path: str) -> list[str]:
+    """Problems found comparing a generation's files with its manifest ([] when intact)."""
+    try:
+        with open(os.path.join(path, "manifest.json"), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        return [f"manifest.json unreadable: {e}"]
+    expected = manifest.get("files")
+    if not expected:
+        return ["manifest has no file hashes (built before bundles were versioned)"]
+    actual = hash_files(path)
+    problems = [f"{name} missing" for name in expected if name not in actual]
+    problems += [f"{name} not in manifest" for name in actual if name not in expected]
+    problems += [f"{name} hash mismatch" for name in expected
+                 if name in actual and actual[name]["sha256"] != expected[name]["sha256"]]
+    return problems
+
+
+def build(path: str, chunks: list[Document], vectors, model: str = "",
+          dtype: str = KB_FLAT_DTYPE, dims: int = KB_FLAT_DIMS,
+          extras: dict | None = None, info: dict | None = None) -> dict:
+    """
+    Write a flat index for `chunks` and their embeddings into `path`. Returns the manifest.
+    - extras: {name: JSON-serializable} artifacts written as <name>.json and hashed with the rest
+    - info:   extra manifest fields (generation name, chunking settings)
+    """
+    return build_streaming(path, [(chunks, vectors)], model, dtype, dims, extras, info)
+
+
+def build_streaming(path: str, batches, model: str = "",
+                    dtype: str = KB_FLAT_DTYPE, dims: int = KB_FLAT_DIMS,
+                    extras: dict | None = None, info: dict | None = None) -> dict:
+    """
+    build() from an iterable of (chunks, vectors) batches. Texts and metadata
+    go to disk batch by batch, so only the quantized vectors (a few hundred
+    bytes per chunk) stay in memory. Same files, byte for byte, as build().
+    """
+    os.makedirs(path, exist_ok=True)
+    stored, scales, offsets = [], [], []
+    pos = count = 0
+    with open(os.path.join(path, "texts.bin"), "wb") as texts, \
+            open(os.path.join(path, "metadata.json"), "w", encoding="utf-8") as meta:
+        meta.write("[")
+        for chunks, vectors in batches:
+            q, s = _quantize(_prepare(np.asarray(vectors, dtype=np.float32), dims), dtype)
+            stored.append(q)
+            if s is not None:
+                scales.append(s)
+            for chunk in chunks:
+                raw = chunk.page_content.encode("utf-8")
+                texts.write(raw)
+                offsets.append((pos, len(raw)))
+                pos += len(raw)
+                # Same separators as json.dump on the whole list
+                entry = {"id": chunk.id or str(count), "metadata": chunk.metadata}
+                meta.write((", " if count else "") + json.dumps(entry))
+                count += 1
+        meta.write("]")
+    if not stored:
+        raise ValueError("No chunks to index")
+
+    matrix = np.concatenate(stored)
+    np.save(os.path.join(path, "vectors.npy"), matrix)
+    if scales:
+        np.save(os.path.join(path, "scales.npy"), np.concatenate(scales))
+    np.save(os.path.join(path, "offsets.npy"), np.asarray(offsets, dtype=np.int64).reshape(-1, 2))
+
+    for name, artifact in (extras or {}).items():
+        with open(os.path.join(path, f"{name}.json"), "w", encoding="utf-8") as f:
+            json.dump(artifact, f, sort_keys=True)
+
+    files = hash_files(path)
+    manifest = {
+        "format": FORMAT_VERSION,
+        **(info or {}),
+        "dtype": dtype,
+        "dims": int(matrix.shape[1]),
+        "count": count,
+        "model": model,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "files": files,
+        "content_hash": _combined_hash(files, files),
+        "source_hash": _combined_hash(files, [n for n in _SOURCE_FILES if n in files]),
+    }
+    # Written last: a generation without a manifest is incomplete and never opened
+    tmp = os.path.join(path, "manifest.json.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(tmp, os.path.join(path, "manifest.json"))
+    return manifest
+
+
+class FlatIndex:
+    """
+    Read-only exact-search index over one flat generation. Implements the
+    subset of the Chroma vector store API the knowledge tools use.
+    """
+
+    def __init__(self, path: str, embedding_function):
+        self.path = path
+        self.embedding_function = embedding_function
+        with open(os.path.join(path, "manifest.json"), "r", encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        with open(os.path.join(path, "metadata.json"), "r", encoding="utf-8") as f:
+            entries = json.load(f)
+        self.ids = [e["id"] for e in entries]
+        self.metadatas = [e["metadata"] for e in entries]
+
+        self.vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+        scales = os.path.join(path, "scales.npy")
+        self.scales = np.load(scales) if os.path.exists(scales) else None
+        self.offsets = np.load(os.path.join(path, "offsets.npy"))
+        self._texts_file = open(os.path.join(path, "texts.bin"), "rb")
+        self._texts = (mmap.mmap(self._texts_file.fileno(), 0, access=mmap.ACCESS_READ)
+                       if os.path.getsize(os.path.join(path, "texts.bin")) else b"")
+
+        categories = np.array([m.get("category", "") for m in self.metadatas])
+        self._masks = {c: categories == c for c in set(categories.tolist())}
+
+        self._state_lock = threading.Lock()
+        self._active = 0        # searches in flight
+        self._retired = False   # close when _active drops to 0
+        self.closed = False
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def close(self):
+        """Release the memory maps and the texts file (idempotent)."""
+        with self._state_lock:
+            if self.closed:
+                return
+            self.closed = True
+        # Searches copy what they read (float32 blocks, decoded texts), so no views
+        # outlive this; dropping the memmap closes its mapping
+        self.vectors = None
+        if isinstance(self._texts, mmap.mmap):
+            self._texts.close()
+        self._texts = b""
+        self._texts_file.close()
+
+    def retire(self, grace_s: float = RETIRE_GRACE_S):
+        """Close after grace_s, or when the last search still running then finishes."""
+        if grace_s <= 0:
+            self._retire_now()
+            return
+        timer = threading.Timer(grace_s, self._retire_now)
+        timer.daemon = True
+        timer.start()
+
+    def _retire_now(self):
+        with self._state_lock:
+            self._retired = True
+            idle = not self._active
+        if idle:
+            self.close()
+
+    @contextmanager
+    def _searching(self):
+        with self._state_lock:
+            if self.closed:
+                raise RuntimeError(f"Flat index {os.path.basename(self.path)} was closed (generation replaced)")
+            self._active += 1
+        try:
+            yield
+        finally:
+            with self._state_lock:
+                self._active -= 1
+                idle = self._retired and not self._active
+            if idle:
+                self.close()
+
+    def _mask(self, filter: dict | None) -> np.ndarray | None:
+        """Boolean row mask for {"category": "documentation"} or {"category": {"$in": [...]}} style filters."""
+        if not filter:
+            return None
+        none = np.zeros(len(self.ids), dtype=bool)
+        mask = np.ones(len(self.ids), dtype=bool)
+        for key, value in filter.items():
+            if key == "category" and isinstance(value, dict):
+                mask &= np.logical_or.reduce([self._masks.get(v, none) for v in value["$in"]] or [none])
+            elif key == "category":
+                mask &= self._masks.get(value, none)
+            elif isinstance(value, dict):
+                mask &= np.array([m.get(key) in value["$in"] for m in self.metadatas], dtype=bool)
+            else:
+                mask &= np.array([m.get(key) == value for m in self.metadatas], dtype=bool)
+        return mask
+
+    def _scores(self, query: str) -> np.ndarray:
+        q = _prepare(np.asarray([self.embedding_function.embed_query(query)], dtype=np.float32),
+                     self.manifest["dims"])[0]
+        scores = np.empty(len(self.ids), dtype=np.float32)
+        for start in range(0, len(self.ids), _BLOCK_ROWS):
+            block = np.asarray(self.vectors[start : start + _BLOCK_ROWS], dtype=np.float32)
+            scores[start : start + len(block)] = block @ q
+        if self.scales is not None:
+            scores *= self.scales
+        return scores
+
+    def _document(self, i: int) -> Document:
+        start, length = self.offsets[i]
+        text = self._texts[start : start + length].decode("utf-8")
+        return Document(id=self.ids[i], page_content=text, metadata=dict(self.metadatas[i]))
+
+    def similarity_search_with_score(self, query: str, k: int = 4, filter: dict | None = None) -> list[tuple]:
+        """Top-k (Document, cosine similarity) pairs, best first."""
+        if not self.ids:
+            return []
+        with self._searching():
+            scores = self._scores(query)
+            mask = self._mask(filter)
+            if mask is not None:
+                scores = np.where(mask, scores, -np.inf)
+                k = min(k, int(mask.sum()))
+            k = min(k, len(scores))
+            if k <= 0:
+                return []
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [(self._document(int(i)), float(scores[i])) for i in top]
+
+    def similarity_search_with_relevance_scores(self, query: str, k: int = 4,
+                                                filter: dict | None = None) -> list[tuple]:
+        """Same scale as Chroma's default: 1 - squared_l2 / sqrt(2), squared_l2 = 2 - 2·cos."""
+        return [(doc, 1.0 - (2.0 - 2.0 * cos) / math.sqrt(2))
+                for doc, cos in self.similarity_search_with_score(query, k, filter)]
+
+    def similarity_search(self, query: str, k: int = 4, filter: dict | None = None) -> list[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, filter)]
+
+
+# ─── Open Indexes ────────────────────────────────────────────────────
+# One FlatIndex per generation per process; opening is cheap, but the masks and
+# metadata are rebuilt on every open, so reuse it until the generation changes.
+_open_lock = threading.Lock()
+_open: dict[str, FlatIndex] = {}
+
+
+def open_generation(persist_dir: str, generation: str, embedding_function) -> FlatIndex | None:
+    """The FlatIndex for `generation`, or None if it has not been built."""
+    path = generation_dir(persist_dir, generation)
+    with _open_lock:
+        index = _open.get(path)
+        if index is None:
+            if not os.path.exists(os.path.join(path, "manifest.json")):
+                return None
+            # Previous generations close once their in-flight searches finish
+            for old in [p for p in _open if os.path.dirname(p) == os.path.dirname(path)]:
+                _open.pop(old).retire()
+            index = _open[path] = FlatIndex(path, embedding_function)
+        return index
@@ -7,19 +7,70 @@ Dynamic architecture:
 - Ingests full documentation directory (schema, dependencies, guides)
 - Rebuilds the navigation map after ingestion
 - Called automatically via /api/reingest endpoint
+
+Blue/green rebuilds: each run embeds into a fresh collection ("generation"),
+validates it, then atomically repoints readers (see database/retrieval.py).
+With KB_BACKEND=flat a generation is a memory-mapped NumPy index
+(database/flat_index.py) instead of a Chroma collection: a versioned,
+hashed bundle that also carries the navigation map (database/bundles.py).
+On Chroma, a generation is one collection per category by default
+(database/partitions.py).
+The live collection is never emptied, so searches keep working during a
+rebuild. Only one job runs at a time; progress is exposed via
+get_reingest_status() (/api/reingest/status).
+
+Ingestion is one streaming pass: a single pruned directory walk per source,
+files read on a small thread pool (INGEST_WORKERS) a few ahead of the
+embedder, then split and embedded in batches and written as they go. Memory
+stays bounded by the read-ahead window and one batch of chunks rather than
+the whole corpus. Exact and near-duplicate chunks are dropped before
+embedding (database/dedup.py). The same pass indexes the definitions in
+the code files for lookup_symbol (database/symbols.py), stored with the
+generation. Duration, peak RSS, dedup and symbol counts are reported in the
+job status.
 """
 
 import os
-import glob
+import json
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from itertools import chain, islice
+import chromadb
 from dotenv import load_dotenv
-from langchain_community.document_loaders import TextLoader
+from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_chroma import Chroma
-from core.llm_config import get_embeddings
+from core.llm_config import EMBEDDING_MODEL, get_embeddings
+from database import dedup, flat_index, partitions, symbols
+from database.chunkers import split_structured
+from database.retrieval import KB_BACKEND, get_active_collection, set_active_collection
 
 load_dotenv()
 
 CHROMA_DB_DIR = os.getenv("CHROMA_DB_DIR", "./database/chroma_db")
+# Seconds to keep the previous generation after the swap, so in-flight searches finish
+CLEANUP_GRACE_S = float(os.getenv("REINGEST_CLEANUP_GRACE_S", "30"))
+
+# Chunking parameters (see benchmarks/bench_retrieval.py for how to evaluate changes)
+CHUNK_SIZE = 2500
+CHUNK_OVERLAP = 300
+SEPARATORS = [
+    "\ndef ",      # Python function boundaries
+    "\nclass ",    # Python class boundaries
+    "\n## ",       # Markdown H2
+    "\n# ",        # Markdown H1
+    "\n<section",  # HTML section boundaries
+    "\n<div",      # HTML div boundaries
+    "\n<tr",       # HTML table row boundaries
+    "\n\n",        # Paragraph breaks
+    "\n",          # Line breaks
+    " ",           # Word breaks
+]
 
 
 # ─── Category / component tagging rules ──────────────────────────────
@@ -52,64 +103,75 @@ def _classify(file_path: str) -> dict:
     return meta
 
 
-def load_documents(directory: str, extensions: list[str]) -> list:
-    """Recursively load files from a directory, skipping non-essential folders."""
-    documents = []
-    # Only skip truly non-useful directories — partials are NOW included
-    skip_dirs = {"Archive", "venv", "__pycache__", "node_modules", ".git", "chroma_db", "assets"}
-
-    for ext in extensions:
-        pattern = os.path.join(directory, f"**/*.{ext}")
-        for file_path in glob.glob(pattern, recursive=True):
-            # Skip directories we don't want
-            parts = set(file_path.replace("\\", "/").split("/"))
-            if parts & skip_dirs:
-                continue
-
-            # Skip massive files (binary/generated data)
-            try:
-                size = os.path.getsize(file_path)
-                if size > 120_000:  # 120KB limit (increased for large HTML partials)
-                    print(f"[Skip large] {file_path} ({size:,} bytes)")
-                    continue
-            except OSError:
-                continue
+# ─── Loading ─────────────────────────────────────────────────────────
+# Only skip truly non-useful directories — partials are NOW included
+SKIP_DIRS = {"Archive", "venv", "__pycache__", "node_modules", ".git", "chroma_db", "assets"}
+MAX_FILE_BYTES = 120_000  # larger files are binary/generated data (limit sized for big HTML partials)
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "8"))  # threads reading files ahead of the embedder
 
-            try:
-                loader = TextLoader(file_path, encoding="utf-8")
-                loaded = loader.load()
-                meta = _classify(file_path)
-                for doc in loaded:
-                    doc.metadata["source"] = file_path
-                    doc.metadata["extension"] = ext
-                    doc.metadata.update(meta)
-                documents.extend(loaded)
-                print(f"[Loaded] {file_path}")
-            except Exception as e:
-                print(f"[Skip error] {file_path}: {e}")
-    return documents
 
+def _walk(directory: str, extensions: set[str]):
+    """Yield (path, extension) for matching files under `directory`, one pruned scandir walk."""
+    try:
+        entries = sorted(os.scandir(directory), key=lambda e: e.name)
+    except OSError as e:
+        print(f"[Skip error] {directory}: {e}")
+        return
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            if entry.name not in SKIP_DIRS:
+                yield from _walk(entry.path, extensions)
+            continue
+        ext = os.path.splitext(entry.name)[1][1:]
+        if ext not in extensions:
+            continue
+        try:
+            size = entry.stat().st_size
+        except OSError:
+            continue
+        if size > MAX_FILE_BYTES:
+            print(f"[Skip large] {entry.path} ({size:,} bytes)")
+            continue
+        yield entry.path, ext
 
-def ingest():
-    """Run the full ingestion pipeline."""
-    embeddings = get_embeddings()
-    store = Chroma(persist_directory=CHROMA_DB_DIR, embedding_function=embeddings)
 
-    # Wipe existing data
-    print("\n--- Clearing existing ChromaDB ---")
+def _load_file(file_path: str, ext: str, log: bool = True) -> Document | None:
     try:
-        existing = store.get()
-        if existing and existing.get("ids"):
-            store.delete(ids=existing["ids"])
-            print(f"Deleted {len(existing['ids'])} existing chunks.")
+        with open(file_path, "r", encoding="utf-8") as f:
+            text = f.read()
     except Exception as e:
-        print(f"Note: {e}")
+        if log:
+            print(f"[Skip error] {file_path}: {e}")
+        return None
+    if log:
+        print(f"[Loaded] {file_path}")
+    return Document(page_content=text, metadata={"source": file_path, "extension": ext, **_classify(file_path)})
 
-    # Define sources — read directly from the repo root.
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    repo_root = os.path.normpath(os.path.join(script_dir, "..", ".."))
 
-    sources = {
+def _read_ahead(files, workers: int, log: bool = True):
+    """Load files on a thread pool, yielding documents in walk order with at most 2 x workers in flight."""
+    with ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix="ingest-read") as pool:
+        pending = deque()
+        for file_path, ext in files:
+            pending.append(pool.submit(_load_file, file_path, ext, log))
+            if len(pending) >= 2 * workers:
+                doc = pending.popleft().result()
+                if doc is not None:
+                    yield doc
+        while pending:
+            doc = pending.popleft().result()
+            if doc is not None:
+                yield doc
+
+
+def load_documents(directory: str, extensions: list[str]) -> list:
+    """Recursively load files from a directory, skipping non-essential folders."""
+    return list(_read_ahead(_walk(directory, set(extensions)), INGEST_WORKERS))
+
+
+def get_sources(repo_root: str) -> dict[str, list[str]]:
+    """Source directories (read directly from the repo root) and the extensions ingested from each."""
+    return {
         # NG911 System: Attribute Rules
         os.path.join(repo_root, "NG911System", "Database Scripts", "0.Attribute Rules"): ["txt", "js"],
         # NG911 System: Automation scripts + Power Automate templates
@@ -123,48 +185,383 @@ def ingest():
         os.path.join(repo_root, ".agents", "memory"): ["md"],
     }
 
-    all_docs = []
-    print("\n--- Loading documents ---")
-    for directory, extensions in sources.items():
-        if os.path.exists(directory):
-            docs = load_documents(directory, extensions)
-            all_docs.extend(docs)
-        else:
-            print(f"[Warning] Not found: {directory}")
 
-    if not all_docs:
-        print("\n[Error] No documents loaded.")
-        return
+def _repo_root() -> str:
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.normpath(os.path.join(script_dir, "..", ".."))
+
+
+def iter_documents(repo_root: str | None = None, workers: int = INGEST_WORKERS, log: bool = True):
+    """Stream every source document listed in get_sources(): one walk per source, files read in parallel."""
+    def files():
+        for directory, extensions in get_sources(repo_root or _repo_root()).items():
+            if os.path.exists(directory):
+                yield from _walk(directory, set(extensions))
+            else:
+                print(f"[Warning] Not found: {directory}")
+    return _read_ahead(files(), workers, log)
+
+
+def load_all_documents(repo_root: str | None = None) -> list:
+    """Load every source document listed in get_sources()."""
+    return list(iter_documents(repo_root))
 
-    print(f"\n--- Splitting {len(all_docs)} documents ---")
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=2500,
-        chunk_overlap=300,
+
+def _splitter(chunk_size: int, chunk_overlap: int, separators: list[str] | None):
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
         length_function=len,
-        separators=[
-            "\ndef ",      # Python function boundaries
-            "\nclass ",    # Python class boundaries
-            "\n## ",       # Markdown H2
-            "\n# ",        # Markdown H1
-            "\n<section",  # HTML section boundaries
-            "\n<div",      # HTML div boundaries
-            "\n<tr",       # HTML table row boundaries
-            "\n\n",        # Paragraph breaks
-            "\n",          # Line breaks
-            " ",           # Word breaks
-        ],
+        separators=separators or SEPARATORS,
     )
-    chunks = splitter.split_documents(all_docs)
-    print(f"Created {len(chunks)} chunks (avg ~{sum(len(c.page_content) for c in chunks)//max(len(chunks),1)} chars).")
 
-    print("\n--- Ingesting into ChromaDB ---")
-    BATCH = 100
-    for i in range(0, len(chunks), BATCH):
-        batch = chunks[i : i + BATCH]
+
+def iter_chunks(docs, chunk_size: int = CHUNK_SIZE, chunk_overlap: int = CHUNK_OVERLAP,
+                separators: list[str] | None = None, structure_aware: bool = True):
+    """Stream the chunks of `docs` (any iterable), one document at a time. See split_documents()."""
+    splitter = _splitter(chunk_size, chunk_overlap, separators)
+    for doc in docs:
+        yield from split_structured(doc, chunk_size, splitter) if structure_aware else splitter.split_documents([doc])
+
+
+def split_documents(docs: list, chunk_size: int = CHUNK_SIZE, chunk_overlap: int = CHUNK_OVERLAP,
+                    separators: list[str] | None = None, structure_aware: bool = True) -> list:
+    """
+    Split loaded documents into chunks (defaults match the production index).
+    With structure_aware, Python/Arcade/HTML/Markdown files are chunked along
+    their structure (database/chunkers.py); the character splitter handles the
+    rest and any block still over chunk_size.
+    """
+    return list(iter_chunks(docs, chunk_size, chunk_overlap, separators, structure_aware))
+
+
+def _tapped(docs, count: bool, symbol_index: dict | None, repo_root: str | None):
+    if count:
+        docs = _counted(docs)
+    if symbol_index is not None:
+        docs = symbols.collect(docs, symbol_index, repo_root or _repo_root())
+    return docs
+
+
+def iter_corpus_chunks(repo_root: str | None = None, count: bool = False, symbol_index: dict | None = None):
+    """
+    The chunks to embed: every source, split, and with KB_DEDUP deduplicated
+    (database/dedup.py). Deduplication reads the sources twice; the first pass
+    keeps only hashes. With count, loaded documents are counted into the job status.
+    With symbol_index (symbols.new_index()), the code files' definitions are
+    indexed into it as the documents stream past.
+    """
+    if not dedup.KB_DEDUP:
+        return iter_chunks(_tapped(iter_documents(repo_root), count, symbol_index, repo_root))
+    _set_status(phase="deduplicating")
+    dedup_plan = dedup.plan(iter_chunks(iter_documents(repo_root, log=False)))
+    stats = dedup_plan["stats"]
+    _set_status(dedup=stats, phase="embedding")
+    print(f"[Dedup] {stats['chunks']} chunks: {stats['exact_duplicates']} exact and "
+          f"{stats['near_duplicates']} near duplicates dropped, {stats['kept']} to embed")
+    docs = _tapped(iter_documents(repo_root), count, symbol_index, repo_root)
+    return dedup.apply(iter_chunks(docs), dedup_plan)
+
+
+def _batched(iterable, n: int):
+    it = iter(iterable)
+    while batch := list(islice(it, n)):
+        yield batch
+
+
+def peak_rss_mb() -> float | None:
+    """Peak resident set size of this process so far, in MB (None where unavailable, e.g. Windows)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)  # bytes on macOS, KB on Linux
+
+
+# ─── Job State ───────────────────────────────────────────────────────
+# The job lock is a thread lock plus a lock file in CHROMA_DB_DIR, so only one
+# rebuild runs even when several API workers receive /api/reingest. Status is
+# mirrored to a JSON file so every worker reports the same progress.
+_job_lock = threading.Lock()
+_status_lock = threading.Lock()
+_status = {"state": "idle"}
+_LOCK_FILE = "reingest.lock"
+_STATUS_FILE = "reingest_status.json"
+LOCK_TTL_S = 2 * 3600  # a lock file older than this is from a crashed job
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def _set_status(**fields):
+    with _status_lock:
+        _status.update(fields)
+        try:
+            os.makedirs(CHROMA_DB_DIR, exist_ok=True)
+            tmp = os.path.join(CHROMA_DB_DIR, f"{_STATUS_FILE}.{os.getpid()}.tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(_status, f)
+            os.replace(tmp, os.path.join(CHROMA_DB_DIR, _STATUS_FILE))
+        except OSError:
+            pass
+
+
+def get_reingest_status() -> dict:
+    """Snapshot of the current/last ingestion job (state, phase, progress, generation)."""
+    try:
+        with open(os.path.join(CHROMA_DB_DIR, _STATUS_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        with _status_lock:
+            return dict(_status)
+
+
+def _try_lock() -> bool:
+    """Acquire the thread lock and the cross-process lock file, or neither."""
+    if not _job_lock.acquire(blocking=False):
+        return False
+    path = os.path.join(CHROMA_DB_DIR, _LOCK_FILE)
+    os.makedirs(CHROMA_DB_DIR, exist_ok=True)
+    for _ in range(2):
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            os.write(fd, str(os.getpid()).encode())
+            os.close(fd)
+            return True
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(path) < LOCK_TTL_S:
+                    break
+                os.remove(path)  # stale lock from a crashed job — retry once
+            except OSError:
+                break
+    _job_lock.release()
+    return False
+
+
+def _unlock():
+    try:
+        os.remove(os.path.join(CHROMA_DB_DIR, _LOCK_FILE))
+    except OSError:
+        pass
+    _job_lock.release()
+
+
+def start_reingest() -> bool:
+    """Start ingest() on a background thread. Returns False if a job is already running."""
+    if not _try_lock():
+        return False
+    # Mark as running before the thread starts so a status poll never sees stale state
+    _set_status(state="running", phase="starting", started_at=_now(), finished_at=None, error=None)
+    thread = threading.Thread(target=_run_locked, daemon=True)
+    thread.start()
+    return True
+
+
+def _run_locked():
+    try:
+        _build_generation()
+    finally:
+        _unlock()
+
+
+def ingest():
+    """Run the full ingestion pipeline (blocking). Waits if another job is running."""
+    while not _try_lock():
+        time.sleep(1)
+    _set_status(state="running", phase="starting", started_at=_now(), finished_at=None, error=None)
+    _run_locked()
+
+
+def _drop_collections(names: list[str]):
+    flat = set(flat_index.list_generations(CHROMA_DB_DIR))
+    for name in [n for n in names if n in flat]:
+        if flat_index.remove_generation(CHROMA_DB_DIR, name):
+            print(f"[Cleanup] Dropped previous flat generation '{name}'")
+        else:
+            print(f"[Cleanup] Warning: could not remove flat generation '{name}'; the next ingest retries it")
+    names = [n for n in names if n not in flat]
+    for name in names:
+        symbols.remove(CHROMA_DB_DIR, name)
+    if not names:
+        return
+    try:
+        client = chromadb.PersistentClient(path=CHROMA_DB_DIR)
+        # A partitioned generation is several collections (database/partitions.py)
+        for collection in [getattr(c, "name", c) for c in client.list_collections()]:
+            if partitions.generation_of(collection) in names:
+                client.delete_collection(collection)
+                print(f"[Cleanup] Dropped previous generation collection '{collection}'")
+    except Exception as e:
+        print(f"[Cleanup] Warning: {e}")
+
+
+def _list_generations() -> list[str]:
+    """Every generation on disk, Chroma collections and flat indexes."""
+    names = flat_index.list_generations(CHROMA_DB_DIR)
+    if os.path.exists(os.path.join(CHROMA_DB_DIR, "chroma.sqlite3")):
+        client = chromadb.PersistentClient(path=CHROMA_DB_DIR)
+        names += [partitions.generation_of(getattr(c, "name", c)) for c in client.list_collections()]
+    return list(dict.fromkeys(names))
+
+
+BATCH = 100  # chunks per embedding call
+
+
+def _counted(docs):
+    """Pass documents through, counting them into the job status (persisted with the next batch)."""
+    for doc in docs:
+        with _status_lock:
+            _status["documents"] = _status.get("documents", 0) + 1
+        yield doc
+
+
+def _report_batch(n: int, size: int, done: int):
+    _set_status(chunks_embedded=done, peak_rss_mb=peak_rss_mb())
+    print(f"  Batch {n}: {size} chunks embedded.")
+
+
+def _embed_chroma(generation: str, chunks) -> tuple[Chroma, int]:
+    store = Chroma(
+        collection_name=generation,
+        persist_directory=CHROMA_DB_DIR,
+        embedding_function=get_embeddings(),
+    )
+    done = 0
+    for n, batch in enumerate(_batched(chunks, BATCH), 1):
         store.add_documents(batch)
-        print(f"  Batch {i // BATCH + 1}: {len(batch)} chunks embedded.")
+        done += len(batch)
+        _report_batch(n, len(batch), done)
+    return store, done
+
+
+def _embed_partitioned(generation: str, chunks) -> tuple[partitions.PartitionedStore, int]:
+    """One Chroma collection per category (database/partitions.py); each chunk is embedded once."""
+    stores = {}
+    done = 0
+    for n, batch in enumerate(_batched(chunks, BATCH), 1):
+        by_category = {}
+        for chunk in batch:
+            by_category.setdefault(chunk.metadata.get("category") or "other", []).append(chunk)
+        for category, docs in by_category.items():
+            if category not in stores:
+                stores[category] = Chroma(
+                    collection_name=partitions.collection_name(generation, category),
+                    persist_directory=CHROMA_DB_DIR,
+                    embedding_function=get_embeddings(),
+                )
+            stores[category].add_documents(docs)
+        done += len(batch)
+        _report_batch(n, len(batch), done)
+    return partitions.PartitionedStore(stores, get_embeddings()), done
+
+
+def embed_bundle(path: str, generation: str, chunks, symbol_index: dict | None = None) -> dict:
+    """
+    Embed `chunks` (any iterable, consumed once) and write them, with the
+    navigation map, as a flat bundle at `path`. Returns the manifest.
+    symbol_index is written into the bundle once `chunks` is exhausted, so it
+    may be the one iter_corpus_chunks() is still filling.
+    """
+    from tools.navigation_tools import build_navigation_map
+
+    embeddings = get_embeddings()
+
+    def batches():
+        done = 0
+        for n, batch in enumerate(_batched(chunks, BATCH), 1):
+            yield batch, embeddings.embed_documents([c.page_content for c in batch])
+            done += len(batch)
+            _report_batch(n, len(batch), done)
+
+    extras = {"navigation_map": build_navigation_map()}
+    if symbol_index is not None:
+        extras["symbol_index"] = symbol_index
+    manifest = flat_index.build_streaming(
+        path, batches(), model=EMBEDDING_MODEL, extras=extras,
+        info={"generation": generation, "chunk_size": CHUNK_SIZE, "chunk_overlap": CHUNK_OVERLAP},
+    )
+    print(f"  Flat index: {manifest['count']} x {manifest['dims']} {manifest['dtype']} "
+          f"(content {manifest['content_hash'][:12]}, sources {manifest['source_hash'][:12]})")
+    return manifest
+
 
-    print(f"\n[Done] {len(chunks)} chunks stored in {CHROMA_DB_DIR}")
+def _embed_flat(generation: str, chunks, symbol_index: dict | None = None) -> tuple[flat_index.FlatIndex, int]:
+    path = flat_index.generation_dir(CHROMA_DB_DIR, generation)
+    manifest = embed_bundle(path, generation, chunks, symbol_index)
+    return flat_index.FlatIndex(path, get_embeddings()), manifest["count"]
+
+
+def _validate(store, expected: int):
+    """Raise if the freshly built generation is incomplete or unsearchable."""
+    count = len(store.get(include=[])["ids"]) if isinstance(store, Chroma) else len(store)
+    if count != expected:
+        raise RuntimeError(f"Validation failed: {count} chunks stored, expected {expected}")
+    if not store.similarity_search("NG911 address", k=1):
+        raise RuntimeError("Validation failed: probe query returned no results")
+
+
+def _build_generation():
+    """Build a new generation, validate, swap the active pointer, schedule cleanup."""
+    generation = f"ng911_{time.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+    previous = get_active_collection(CHROMA_DB_DIR)
+    _set_status(generation=generation, previous_generation=previous, documents=0, chunks_total=None,
+                chunks_embedded=0, duration_s=None, peak_rss_mb=None, dedup=None, symbols=None)
+    t0, started = time.perf_counter(), False
+    try:
+        # One streaming pass: walk -> read (thread pool) -> classify -> split -> embed -> write.
+        # Only the files being read ahead and the current batch of chunks are held in memory.
+        print(f"\n--- Ingesting into {KB_BACKEND} generation '{generation}' ---")
+        _set_status(phase="embedding", backend=KB_BACKEND)
+        symbol_index = symbols.new_index()
+        chunks = iter_corpus_chunks(count=True, symbol_index=symbol_index)
+        first = next(chunks, None)
+        if first is None:
+            raise RuntimeError("No documents loaded.")
+        started = True
+        if KB_BACKEND == "flat":
+            store, count = _embed_flat(generation, chain([first], chunks), symbol_index)
+        else:
+            embed = _embed_partitioned if partitions.KB_PARTITIONED else _embed_chroma
+            store, count = embed(generation, chain([first], chunks))
+            symbols.save(symbol_index, CHROMA_DB_DIR, generation)
+        stats = symbols.summary(symbol_index)
+        _set_status(chunks_total=count, symbols=stats)
+        print(f"[Symbols] {stats['definitions']} definitions indexed in {stats['files']} code files")
+
+        _set_status(phase="validating")
+        _validate(store, count)
+
+        # Swap: readers pick up the new collection on their next search
+        _set_status(phase="swapping")
+        categories = sorted(store.stores) if isinstance(store, partitions.PartitionedStore) else None
+        set_active_collection(generation, CHROMA_DB_DIR, partitions=categories)
+        duration = round(time.perf_counter() - t0, 1)
+        rss = peak_rss_mb()
+        _set_status(duration_s=duration, peak_rss_mb=rss)
+        print(f"\n[Done] {count} chunks from {_status['documents']} documents stored in {CHROMA_DB_DIR} "
+              f"(active: {generation}) in {duration}s, peak RSS {rss} MB")
+    except Exception as e:
+        print(f"\n[Error] Ingestion failed, keeping '{previous}' active: {e}")
+        if started:
+            _drop_collections([generation])
+        _set_status(state="failed", phase="done", error=str(e), finished_at=_now())
+        return
+
+    # Drop every other generation (the previous one plus any leftovers) after a grace period.
+    # Flat bundles are immutable and cheap to switch back to, so the newest few stay for rollback.
+    if KB_BACKEND == "flat":
+        from database.bundles import prune
+        flat = set(flat_index.list_generations(CHROMA_DB_DIR))
+        stale = prune(CHROMA_DB_DIR) + [n for n in _list_generations() if n not in flat]
+    else:
+        stale = [name for name in _list_generations() if name != generation]
+    if stale:
+        timer = threading.Timer(CLEANUP_GRACE_S, _drop_collections, args=(stale,))
+        timer.daemon = True
+        timer.start()
 
     # Rebuild the navigation map after ingestion so it picks up any new pages/fields
     try:
@@ -174,6 +571,8 @@ def ingest():
     except Exception as e:
         print(f"[Nav] Warning: could not rebuild navigation map: {e}")
 
+    _set_status(state="succeeded", phase="done", finished_at=_now(), stale_generations=stale)
+
 
 if __name__ == "__main__":
     ingest()
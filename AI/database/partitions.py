@@ -0,0 +1,139 @@
+"""
+Per-category knowledge-base partitions and the query router that picks them.
+
+Every chunk has a category (ingest._classify). With KB_PARTITIONED (the
+default), a Chroma generation is one collection per category,
+"<generation>__<category>", instead of one shared collection:
+  - a category-filtered search queries one small HNSW graph, not a filtered
+    walk of the shared one
+  - an unfiltered search embeds the query once, queries the routed
+    partitions and merges the hits by relevance
+The flat backend (KB_BACKEND=flat) already scans exactly with per-category
+row masks, so it stays one index and takes the same routed filter.
+
+route() decides which categories a query needs without a model call. By
+default everything except web_app is searched: CSS and JS chunks match many
+questions loosely and crowd out the documentation. web_app is added when the
+query is about the web app itself, and clear Arcade or script questions skip
+the other code category. Compare against filtered search on one collection
+with `python -m benchmarks.bench_partitions`.
+"""
+
+import os
+import re
+import threading
+
+KB_PARTITIONED = os.getenv("KB_PARTITIONED", "1") == "1"
+
+CATEGORIES = ("attribute_rule", "automation_script", "documentation", "web_page", "web_app", "other")
+_SEP = "__"
+
+# ─── Routing ─────────────────────────────────────────────────────────
+_WEB_APP = re.compile(
+    r"\b(css|style ?sheets?|styles?|javascript|js|html|front-?end|ui|button|modal|sidebar|browser|"
+    r"log ?in|sign ?in|admin|auth\w*|rbac|cms|router|routes?|partials?|spa|search box|sync app|hub)\b", re.I)
+_RULE = re.compile(r"\b(arcade|attribute rules?|\$feature|constraint rule|calculation rule)\b", re.I)
+_SCRIPT = re.compile(r"\b(python|arcpy|gp tools?|geoprocessing|etl|scripts?)\b", re.I)
+_ALWAYS = ("documentation", "web_page", "other")
+
+
+def route(query: str) -> list[str]:
+    """Categories worth searching for `query`."""
+    code = [c for c, pattern in (("attribute_rule", _RULE), ("automation_script", _SCRIPT)) if pattern.search(query)]
+    cats = list(_ALWAYS) + (code or ["attribute_rule", "automation_script"])
+    if _WEB_APP.search(query):
+        cats.append("web_app")
+    return [c for c in CATEGORIES if c in cats]
+
+
+def route_filter(query: str) -> dict | None:
+    """Chroma-style category filter for `query` (None when every category is routed)."""
+    cats = route(query)
+    return None if len(cats) == len(CATEGORIES) else {"category": {"$in": cats}}
+
+
+# ─── Partitioned Store ───────────────────────────────────────────────
+def collection_name(generation: str, category: str) -> str:
+    return f"{generation}{_SEP}{category}"
+
+
+def generation_of(collection: str) -> str:
+    """'ng911_..._abc__web_app' -> 'ng911_..._abc' (unpartitioned names unchanged)."""
+    base, sep, category = collection.rpartition(_SEP)
+    return base if sep and category in CATEGORIES else collection
+
+
+def _split_filter(filter: dict | None) -> tuple[list[str] | None, dict | None]:
+    """(categories named by the filter or None for all, the rest of the filter)."""
+    if not filter or "category" not in filter:
+        return None, filter
+    value = filter["category"]
+    cats = list(value["$in"]) if isinstance(value, dict) else [value]
+    rest = {k: v for k, v in filter.items() if k != "category"}
+    return cats, rest or None
+
+
+class PartitionedStore:
+    """
+    The per-category Chroma collections of one generation behind the subset of
+    the vector store API the knowledge tools use.
+    """
+
+    def __init__(self, stores: dict, embedding_function):
+        self.stores = stores  # category -> Chroma
+        self.embedding_function = embedding_function
+        self._counts: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return sum(self._count(store) for store in self.stores.values())
+
+    def _count(self, store) -> int:
+        # A generation's collections never change after the swap, so count each once
+        name = store._collection.name
+        if name not in self._counts:
+            self._counts[name] = store._collection.count()
+        return self._counts[name]
+
+    def similarity_search_with_relevance_scores(self, query: str, k: int = 4,
+                                                filter: dict | None = None) -> list[tuple]:
+        cats, rest = _split_filter(filter)
+        targets = [self.stores[c] for c in (cats or self.stores) if c in self.stores]
+        if not targets:
+            return []
+        embedding = self.embedding_function.embed_query(query)  # once, not once per partition
+        hits = []
+        for store in targets:
+            count = self._count(store)
+            if not count:
+                continue
+            relevance = store._select_relevance_score_fn()
+            for doc, distance in store.similarity_search_by_vector_with_relevance_scores(
+                    embedding, k=min(k, count), filter=rest):
+                hits.append((doc, relevance(distance)))
+        hits.sort(key=lambda h: -h[1])
+        return hits[:k]
+
+    def similarity_search(self, query: str, k: int = 4, filter: dict | None = None) -> list:
+        return [doc for doc, _ in self.similarity_search_with_relevance_scores(query, k, filter)]
+
+
+# One PartitionedStore per generation per process (the Chroma clients are reused across searches)
+_open_lock = threading.Lock()
+_open: dict[tuple, PartitionedStore] = {}
+
+
+def open_partitioned(persist_dir: str, generation: str, categories: list[str], embedding_function):
+    from langchain_chroma import Chroma
+
+    key = (persist_dir, generation, tuple(categories))
+    with _open_lock:
+        store = _open.get(key)
+        if store is None:
+            stores = {
+                c: Chroma(collection_name=collection_name(generation, c), persist_directory=persist_dir,
+                          embedding_function=embedding_function)
+                for c in categories
+            }
+            _open.clear()  # the previous generation; in-flight searches keep their reference
+            store = _open[key] = PartitionedStore(stores, embedding_function)
+        return store
@@ -1,14 +1,76 @@
 """
 NG911 Knowledge Base Retrieval — utility module.
 The primary search tool is in tools/knowledge_tools.py.
-This module provides the raw retriever for advanced use cases.
+This module provides the raw retriever for advanced use cases, the
+active-generation pointer that lets ingest.py rebuild the knowledge base
+blue/green (readers always open whichever collection the pointer names), and
+open_store(), which opens the active generation on the configured backend:
+  KB_BACKEND=chroma  persistent Chroma collections (HNSW), the default; one per
+                     category with KB_PARTITIONED (database/partitions.py)
+  KB_BACKEND=flat    memory-mapped NumPy index, exact search (database/flat_index.py)
 """
 
+import json
 import os
 from langchain_chroma import Chroma
 from core.llm_config import get_embeddings
+from database import flat_index, partitions
 
 CHROMA_DB_DIR = os.getenv("CHROMA_DB_DIR", "./database/chroma_db")
+KB_BACKEND = os.getenv("KB_BACKEND", "chroma").lower()
+
+# Collection used before blue/green rebuilds existed (langchain_chroma's default name)
+LEGACY_COLLECTION = "langchain"
+_POINTER_FILE = "active_collection.json"
+
+
+def get_active_collection(persist_dir: str = CHROMA_DB_DIR) -> str:
+    """Name of the collection readers should query (falls back to the legacy collection)."""
+    try:
+        with open(os.path.join(persist_dir, _POINTER_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)["collection"]
+    except (OSError, ValueError, KeyError):
+        return LEGACY_COLLECTION
+
+
+def get_active_partitions(persist_dir: str = CHROMA_DB_DIR) -> list[str]:
+    """Categories of the active Chroma generation's partitions ([] for a single collection)."""
+    try:
+        with open(os.path.join(persist_dir, _POINTER_FILE), "r", encoding="utf-8") as f:
+            return json.load(f).get("partitions", [])
+    except (OSError, ValueError):
+        return []
+
+
+def set_active_collection(name: str, persist_dir: str = CHROMA_DB_DIR, partitions: list[str] | None = None):
+    """Atomically point readers at `name` (write temp file, then os.replace)."""
+    os.makedirs(persist_dir, exist_ok=True)
+    tmp = os.path.join(persist_dir, _POINTER_FILE + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"collection": name, **({"partitions": partitions} if partitions else {})}, f)
+    os.replace(tmp, os.path.join(persist_dir, _POINTER_FILE))
+
+
+def open_store(persist_dir: str = CHROMA_DB_DIR):
+    """
+    Vector store for the active generation (Chroma, or a FlatIndex with KB_BACKEND=flat).
+    All support similarity_search and similarity_search_with_relevance_scores
+    with an equality `filter`, or {"category": {"$in": [...]}}, e.g. from
+    partitions.route_filter(). Returns None if the knowledge base has not been built.
+    """
+    if not os.path.exists(persist_dir):
+        return None
+    if KB_BACKEND == "flat":
+        return flat_index.open_generation(persist_dir, get_active_collection(persist_dir), get_embeddings())
+    categories = get_active_partitions(persist_dir)
+    if categories:
+        return partitions.open_partitioned(persist_dir, get_active_collection(persist_dir), categories,
+                                           get_embeddings())
+    return Chroma(
+        collection_name=get_active_collection(persist_dir),
+        persist_directory=persist_dir,
+        embedding_function=get_embeddings(),
+    )
 
 
 def get_retriever(k: int = 4, category: str = ""):
@@ -21,10 +83,11 @@ def get_retriever(k: int = 4, category: str = ""):
         print("[Warning] ChromaDB directory not found. Run ingest.py first.")
         return None
 
-    store = Chroma(
-        persist_directory=CHROMA_DB_DIR,
-        embedding_function=get_embeddings(),
-    )
+    if KB_BACKEND == "flat":
+        print("[Warning] get_retriever() needs KB_BACKEND=chroma; use open_store() with the flat backend.")
+        return None
+
+    store = open_store()
 
     search_kwargs = {"k": k}
     if category:
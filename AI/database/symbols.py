@@ -0,0 +1,390 @@
+"""
+Symbol index: where each function, class and constant of the code sources is defined.
+
+Built by ingest.py in the same streaming pass as the chunks (collect()) and
+stored with the generation it was built from, so a swap or a bundle rollback
+switches it too:
+  - flat bundles: symbol_index.json inside the bundle, hashed with the rest
+  - Chroma:       <CHROMA_DB_DIR>/symbols/<generation>.json
+Indexed per language:
+  - Python (ast):  functions, classes, methods as Class.method, and
+                   UPPER_CASE module constants
+  - Arcade rules:  functions, and the variables declared outside them
+  - JS:            function declarations, functions assigned to
+                   const/let/var, classes and their methods as Class.method
+Arcade and JS are scanned with comments and string literals blanked out, then
+spans are closed by brace matching (or the end of the statement for
+variables). A span starts at the comment block directly above a definition.
+
+Each file's SHA-1 is recorded: lookup() re-parses a file that changed since
+ingest, so a span never points at the wrong lines. A generation built before
+the index existed gets one built from the sources on first lookup.
+"""
+
+import ast
+import bisect
+import difflib
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+
+from database import flat_index
+from database.retrieval import get_active_collection
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+_REPO_ROOT = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+_FILE = "symbol_index.json"  # inside a flat bundle (an extra of flat_index.build)
+_SUBDIR = "symbols"          # Chroma generations: <persist_dir>/symbols/<generation>.json
+
+
+# ─── Extraction ──────────────────────────────────────────────────────
+# A symbol is (name, kind, start_line, end_line), lines 1-based and inclusive.
+
+_CONSTANT = re.compile(r"^_*[A-Z][A-Z0-9_]*$")
+
+
+def _python_symbols(text: str) -> list[tuple]:
+    tree = ast.parse(text)
+    lines = text.splitlines()
+    out = []
+
+    def add(node, name: str, kind: str):
+        start = min([d.lineno for d in getattr(node, "decorator_list", [])] + [node.lineno])
+        out.append((name, kind, _with_comments(lines, start, ("#",)), node.end_lineno))
+
+    def module_level(body):
+        # Definitions guarded by a top-level if/try (optional imports, platform switches) count too
+        for node in body:
+            if isinstance(node, ast.If):
+                yield from module_level(node.body + node.orelse)
+            elif isinstance(node, ast.Try):
+                yield from module_level(node.body + [n for h in node.handlers for n in h.body]
+                                        + node.orelse + node.finalbody)
+            else:
+                yield node
+
+    for node in module_level(tree.body):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            add(node, node.name, "function")
+        elif isinstance(node, ast.ClassDef):
+            add(node, node.name, "class")
+            for child in node.body:
+                if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                    add(child, f"{node.name}.{child.name}", "method")
+        elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            for target in targets:
+                names = target.elts if isinstance(target, ast.Tuple) else [target]
+                for n in names:
+                    if isinstance(n, ast.Name) and _CONSTANT.match(n.id):
+                        add(node, n.id, "constant")
+    return out
+
+
+def _with_comments(lines: list[str], start: int, markers: tuple) -> int:
+    """Move a 1-based start line up over the comment lines directly above it."""
+    while start > 1 and lines[start - 2].lstrip().startswith(markers):
+        start -= 1
+    return start
+
+
+# Comments and string literals, leftmost first: a quote inside a comment is part of the comment
+_LEXEMES = re.compile(
+    r"//[^\n]*|/\*.*?\*/|\"(?:\\.|[^\"\\\n])*\"|'(?:\\.|[^'\\\n])*'|`(?:\\.|[^`\\])*`", re.DOTALL)
+_NOT_NEWLINE = re.compile(r"[^\n]")
+_C_COMMENT = ("//", "/*", "*")
+
+
+def _blank(text: str) -> str:
+    """`text` with comments and literals replaced by spaces (same length, same lines)."""
+    return _LEXEMES.sub(lambda m: _NOT_NEWLINE.sub(" ", m.group(0)), text)
+
+
+class _Code:
+    """Blanked source with brace matching and offset -> line lookups."""
+
+    def __init__(self, text: str):
+        self.text = _blank(text)
+        self.lines = text.splitlines()
+        self._newlines = [m.start() for m in re.finditer("\n", self.text)]
+        self.closing: dict[int, int] = {}
+        self._opens, self._closes, stack = [], [], []
+        for m in re.finditer(r"[{}]", self.text):
+            if m.group() == "{":
+                stack.append(m.start())
+                self._opens.append(m.start())
+            else:
+                self._closes.append(m.start())
+                if stack:
+                    self.closing[stack.pop()] = m.start()
+
+    def line(self, pos: int) -> int:
+        return bisect.bisect_left(self._newlines, pos) + 1
+
+    def depth(self, pos: int) -> int:
+        return bisect.bisect_left(self._opens, pos) - bisect.bisect_left(self._closes, pos)
+
+    def block_end(self, pos: int) -> int:
+        """End of the brace block opening at or after pos (the file's end if unbalanced)."""
+        start = self.text.find("{", pos)
+        return self.closing.get(start, len(self.text) - 1) if start >= 0 else len(self.text) - 1
+
+    def statement_end(self, pos: int) -> int:
+        """End of the statement running from pos: a ';' or a line break outside brackets that does not continue."""
+        depth = 0
+        for m in _STATEMENT.finditer(self.text, pos):
+            ch = m.group()
+            if ch in "([{":
+                depth += 1
+            elif ch in ")]}":
+                depth -= 1
+                if depth < 0:
+                    return m.start()  # the end of the enclosing block
+            elif depth == 0:
+                if ch == ";":
+                    return m.start()
+                line = self.text[self.text.rfind("\n", 0, m.start()) + 1 : m.start()]
+                rest = self.text[m.end():].lstrip()
+                if not _CONTINUED.search(line) and not _CONTINUES.match(rest):
+                    return m.start() - 1
+        return len(self.text) - 1
+
+    def symbol(self, name: str, kind: str, start: int, end: int) -> tuple:
+        return name, kind, _with_comments(self.lines, self.line(start), _C_COMMENT), self.line(end)
+
+
+_STATEMENT = re.compile(r"[()\[\]{};\n]")
+_CONTINUED = re.compile(r"[-=+*/%&|^<>!?:,.(\[{]\s*$")  # the line stops mid-expression
+_CONTINUES = re.compile(r"[-+*/%&|^<>?:=.]")             # the next line carries on
+
+_FUNCTION = re.compile(r"\bfunction\s*\*?\s*([A-Za-z_$][\w$]*)\s*\(")
+_ARCADE_VAR = re.compile(r"\bvar\s+([A-Za-z_]\w*)")
+_JS_CLASS = re.compile(r"\bclass\s+([A-Za-z_$][\w$]*)[^{]*\{")
+_JS_ASSIGNED = re.compile(
+    r"\b(?:const|let|var)\s+([A-Za-z_$][\w$]*)\s*=\s*(?:async\s+)?"
+    r"(?:function\b|\([^()]*\)\s*=>|[A-Za-z_$][\w$]*\s*=>)")
+_JS_METHOD = re.compile(
+    r"^[ \t]*(?:static\s+)?(?:async\s+)?(?:get\s+|set\s+)?\*?([A-Za-z_$][\w$]*)\s*\([^()]*\)\s*\{", re.MULTILINE)
+_JS_KEYWORDS = {"if", "for", "while", "switch", "catch", "function", "return", "with"}
+
+
+def _arcade_symbols(text: str) -> list[tuple]:
+    code = _Code(text)
+    out, functions = [], []
+    for m in _FUNCTION.finditer(code.text):
+        end = code.block_end(m.end())
+        functions.append((m.start(), end))
+        out.append(code.symbol(m.group(1), "function", m.start(), end))
+    for m in _ARCADE_VAR.finditer(code.text):
+        if not any(a <= m.start() <= b for a, b in functions):  # locals are not worth a lookup
+            out.append(code.symbol(m.group(1), "variable", m.start(), code.statement_end(m.end())))
+    return out
+
+
+def _js_symbols(text: str) -> list[tuple]:
+    code = _Code(text)
+    out = []
+    for m in _FUNCTION.finditer(code.text):
+        out.append(code.symbol(m.group(1), "function", m.start(), code.block_end(m.end())))
+    for m in _JS_ASSIGNED.finditer(code.text):
+        out.append(code.symbol(m.group(1), "function", m.start(), code.statement_end(m.end())))
+    for m in _JS_CLASS.finditer(code.text):
+        open_at = m.end() - 1
+        end = code.closing.get(open_at, len(code.text) - 1)
+        out.append(code.symbol(m.group(1), "class", m.start(), end))
+        inside = code.depth(open_at) + 1
+        for method in _JS_METHOD.finditer(code.text, open_at + 1, end):
+            if method.group(1) in _JS_KEYWORDS or code.depth(method.start()) != inside:
+                continue
+            out.append(code.symbol(f"{m.group(1)}.{method.group(1)}", "method", method.start(),
+                                   code.block_end(method.end() - 1)))
+    return sorted(set(out), key=lambda s: (s[2], s[0]))  # `const f = function f()` matches twice
+
+
+_EXTRACTORS = {"python": _python_symbols, "arcade": _arcade_symbols, "js": _js_symbols}
+
+
+def language_of(metadata: dict) -> str | None:
+    """Which extractor applies to an ingested document (None: not code)."""
+    ext = metadata.get("extension", "")
+    if metadata.get("category") == "attribute_rule" and ext in ("txt", "js"):
+        return "arcade"
+    return {"py": "python", "js": "js", "mjs": "js"}.get(ext)
+
+
+def extract(text: str, language: str) -> list[tuple]:
+    """(name, kind, start_line, end_line) for every definition in `text`. [] if it does not parse."""
+    try:
+        return _EXTRACTORS[language](text)
+    except (SyntaxError, ValueError, KeyError):
+        return []
+
+
+# ─── Index ───────────────────────────────────────────────────────────
+def new_index() -> dict:
+    return {"format": FORMAT_VERSION, "files": {}, "symbols": {}}
+
+
+def _sha1(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def _rel(path: str, root: str) -> str:
+    return os.path.relpath(path, root).replace("\\", "/")
+
+
+def add_file(index: dict, rel_path: str, text: str, language: str) -> int:
+    """Index one file's definitions. Returns how many were added."""
+    found = extract(text, language)
+    index["files"][rel_path] = {"sha1": _sha1(text), "language": language}
+    for name, kind, start, end in found:
+        index["symbols"].setdefault(name, []).append({"file": rel_path, "kind": kind, "start": start, "end": end})
+    return len(found)
+
+
+def collect(docs, index: dict, repo_root: str = _REPO_ROOT):
+    """Pass documents through, indexing the definitions of the code files among them."""
+    for doc in docs:
+        language = language_of(doc.metadata)
+        if language:
+            add_file(index, _rel(doc.metadata.get("source", ""), repo_root), doc.page_content, language)
+        yield doc
+
+
+def build(repo_root: str = _REPO_ROOT) -> dict:
+    """Index the ingest sources directly (no embedding)."""
+    from database.ingest import iter_documents
+
+    index = new_index()
+    for _ in collect(iter_documents(repo_root, log=False), index, repo_root):
+        pass
+    return index
+
+
+def summary(index: dict) -> dict:
+    return {"files": len(index["files"]), "definitions": sum(len(v) for v in index["symbols"].values())}
+
+
+# ─── Storage ─────────────────────────────────────────────────────────
+def index_path(persist_dir: str, generation: str) -> str:
+    bundle = flat_index.generation_dir(persist_dir, generation)
+    if os.path.isdir(bundle):
+        return os.path.join(bundle, _FILE)
+    return os.path.join(persist_dir, _SUBDIR, f"{generation}.json")
+
+
+def save(index: dict, persist_dir: str, generation: str):
+    """Write a Chroma generation's index beside its collections (flat bundles carry theirs)."""
+    path = os.path.join(persist_dir, _SUBDIR, f"{generation}.json")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(index, f, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def remove(persist_dir: str, generation: str):
+    try:
+        os.remove(os.path.join(persist_dir, _SUBDIR, f"{generation}.json"))
+    except OSError:
+        pass
+
+
+# One index per process, reloaded when the active generation's file changes
+_cache_lock = threading.Lock()
+_cache: dict = {"key": None, "index": None}
+
+
+def load_active(persist_dir: str) -> dict:
+    """The active generation's index (built from the sources if it has none)."""
+    path = index_path(persist_dir, get_active_collection(persist_dir))
+    try:
+        key = (path, os.stat(path).st_mtime_ns)
+    except OSError:
+        key = (path, None)
+    with _cache_lock:
+        if _cache["key"] != key:
+            index = None
+            if key[1] is not None:
+                try:
+                    with open(path, "r", encoding="utf-8") as f:
+                        index = json.load(f)
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Unreadable symbol index {path}: {e}")
+            if index is None:
+                logger.info("No symbol index for the active generation; indexing the sources")
+                index = build()
+            _cache.update(key=key, index=index)
+        return _cache["index"]
+
+
+# ─── Lookup ──────────────────────────────────────────────────────────
+def _names(index: dict, name: str) -> list[str]:
+    """Indexed names matching `name`: exact, then case-insensitive, then as a method name."""
+    symbols = index["symbols"]
+    if name in symbols:
+        return [name]
+    lower = name.lower()
+    found = [n for n in symbols if n.lower() == lower]
+    return found or [n for n in symbols if n.lower().endswith("." + lower)]
+
+
+def _current(index: dict, rel_path: str, repo_root: str) -> tuple[str | None, dict | None]:
+    """(file text, fresh symbols by name if the file changed since indexing, else None)."""
+    try:
+        with open(os.path.join(repo_root, rel_path), "r", encoding="utf-8") as f:
+            text = f.read()
+    except OSError:
+        return None, None
+    info = index["files"].get(rel_path, {})
+    if info.get("sha1") == _sha1(text):
+        return text, None
+    fresh: dict[str, list] = {}
+    for name, kind, start, end in extract(text, info.get("language", "")):
+        fresh.setdefault(name, []).append({"file": rel_path, "kind": kind, "start": start, "end": end})
+    return text, fresh
+
+
+def lookup(index: dict, name: str, file: str = "", repo_root: str = _REPO_ROOT) -> dict:
+    """
+    Definitions of `name` (optionally only in files whose path contains `file`).
+    Returns {"matches": [{name, kind, file, start, end, text}], "suggestions": [names]}.
+    """
+    name = name.strip().strip("`()")
+    entries = [(n, e) for n in _names(index, name) for e in index["symbols"][n]]
+    if file:
+        entries = [(n, e) for n, e in entries if file.lower() in e["file"].lower()]
+
+    matches, texts = [], {}
+    for rel_path in dict.fromkeys(e["file"] for _, e in entries):
+        text, fresh = _current(index, rel_path, repo_root)
+        if text is None:
+            continue
+        names = [n for n, e in entries if e["file"] == rel_path]
+        spans = ([(n, e) for n in dict.fromkeys(names) for e in fresh.get(n, [])] if fresh is not None
+                 else [(n, e) for n, e in entries if e["file"] == rel_path])
+        lines = texts.setdefault(rel_path, text.splitlines())
+        for n, e in spans:
+            matches.append({"name": n, **e, "text": "\n".join(lines[e["start"] - 1 : e["end"]])})
+
+    suggestions = []
+    if not matches:
+        lower = name.lower()
+        pool = list(index["symbols"])
+        suggestions = [n for n in pool if lower and lower in n.lower() and n.lower() != lower][:5]
+        suggestions += [n for n in difflib.get_close_matches(name, pool, n=5, cutoff=0.75)
+                        if n not in suggestions and n.lower() != lower]
+    return {"matches": matches, "suggestions": suggestions[:5]}
+
+
+def members(index: dict, class_name: str, rel_path: str) -> list[dict]:
+    """Indexed methods of a class in one file, in file order."""
+    prefix = class_name + "."
+    found = [{"name": n, **e} for n, entries in index["symbols"].items() if n.startswith(prefix)
+             for e in entries if e["file"] == rel_path]
+    return sorted(found, key=lambda e: e["start"])
@@ -1,10 +1,27 @@
 """
 Read-only file system tools for the NG911 AI Agent.
 These tools let the agent browse and read project files but NEVER write or modify them.
+
+read_file renders markup and data for the model instead of returning it raw
+(raw=True returns the exact source):
+  - HTML: compact Markdown (headings, lists, pipe tables, code, links), with
+    element ids kept as {#id} so navigation targets stay visible; scripts,
+    styles, classes and inline data URIs are dropped
+  - JSON: an indented outline, arrays of objects as pipe tables, and columns
+    with one value in every row stated once above the table
+  - CSS:  comments removed, one minified rule per line
+  - JS:   verbatim (whitespace costs few tokens and comments carry meaning),
+          led by an outline of top-level declarations with line numbers when
+          the file is over the size cap and would be cut off
+Templates (e.g. the Power Automate email .html files) are always returned
+raw: they are source the user asks to see, not pages to read.
+See benchmarks/bench_renderers.py for the savings on the repo.
 """
 
+import json
 import os
 import re
+from html.parser import HTMLParser
 from langchain_core.tools import tool
 
 _raw_root = os.getenv(
@@ -32,22 +49,334 @@ def _safe_resolve(path: str) -> str:
     return resolved
 
 
+# ─── Renderers ───────────────────────────────────────────────────────
+READ_MAX_CHARS = 30_000          # returned to the model
+RENDER_MAX_BYTES = 2_000_000     # files read in full for rendering; larger ones are returned raw
+
+_DATA_URI = re.compile(r"data:[\w/+.-]+;base64,[A-Za-z0-9+/=]{64,}")
+
+
+def _elide_data_uris(text: str) -> str:
+    return _DATA_URI.sub(lambda m: f"data:...({len(m.group(0)):,} chars)", text)
+
+
+_HTML_SKIP = {"script", "style", "svg", "noscript", "template", "head"}
+_HTML_BLOCK = {
+    "p", "div", "section", "header", "footer", "nav", "article", "main", "aside", "ul", "ol", "li",
+    "h1", "h2", "h3", "h4", "h5", "h6", "pre", "blockquote", "details", "summary", "form", "figure",
+    "figcaption", "dl", "dt", "dd", "hr", "br", "table", "body",
+}
+_HTML_VOID = {"br", "hr", "img", "input", "meta", "link", "source", "col", "wbr"}
+
+
+class _HtmlToMarkdown(HTMLParser):
+    """Streaming HTML -> compact Markdown. Tolerates the unclosed tags of page partials."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.lines: list[str] = []
+        self.buf: list[str] = []
+        self.prefix = ""          # heading marker or list bullet of the current block
+        self.suffix = ""          # heading id
+        self.skip = 0
+        self.pre = 0
+        self.tables: list[list] = []  # stack of [rows]; a row is (cells, is_header)
+        self.row: list[str] | None = None
+        self.row_id = ""
+        self.row_header = False
+        self.cell: list[str] | None = None
+        self.nested = 0           # tables inside a cell are flattened into its text
+        self.links: list[tuple] = []  # (parts list, start index, href)
+
+    def _parts(self) -> list[str]:
+        return self.cell if self.cell is not None else self.buf
+
+    def _flush(self):
+        text = "".join(self.buf)
+        text = text.strip("\n") if self.pre else re.sub(r"\s+", " ", text).strip()
+        if text:
+            self.lines.append(f"```\n{text}\n```" if self.pre else self.prefix + text + self.suffix)
+        self.buf, self.prefix, self.suffix = [], "", ""
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _HTML_SKIP:
+            self.skip += tag not in _HTML_VOID
+            return
+        if self.skip:
+            return
+        a = dict(attrs)
+        anchor = a.get("id") or ""
+        in_cell = self.cell is not None
+        if tag == "table" and in_cell:
+            self.nested += 1
+        elif tag in ("table", "tr", "td", "th") and not self.nested and (not in_cell or tag != "table"):
+            self._table_start(tag, anchor)
+            return
+        if tag in _HTML_BLOCK:
+            if in_cell:
+                self.cell.append(" ")
+            else:
+                self._flush()
+            if tag == "pre":
+                self.pre += 1
+            elif tag[0] == "h" and tag[1:].isdigit() and not in_cell:
+                self.prefix = "#" * int(tag[1]) + " "
+                self.suffix = f" {{#{anchor}}}" if anchor else ""
+                return
+            elif tag == "li":
+                self.prefix = "- "
+            elif tag == "hr" and not in_cell:
+                self.lines.append("---")
+        parts = self._parts()
+        if anchor:
+            parts.append(f"{{#{anchor}}} ")
+        if tag == "code" and not self.pre:
+            parts.append("`")
+        elif tag in ("strong", "b"):
+            parts.append("**")
+        elif tag == "a":
+            self.links.append((parts, len(parts), a.get("href") or ""))
+            parts.append("[")
+        elif tag == "img" and a.get("alt"):
+            parts.append(f"![{a['alt']}]")
+        elif tag in ("input", "select", "textarea"):
+            label = a.get("placeholder") or a.get("name") or a.get("type") or tag
+            parts.append(f"[{tag}: {label}]")
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        if tag in _HTML_SKIP:
+            self.skip = max(self.skip - 1, 0)
+            return
+        if self.skip:
+            return
+        if tag == "table" and self.nested:
+            self.nested -= 1
+        elif tag in ("td", "th", "tr", "table") and not self.nested and self.tables:
+            self._table_end(tag)
+            return
+        parts = self._parts()
+        if tag == "code" and not self.pre:
+            parts.append("`")
+        elif tag in ("strong", "b"):
+            parts.append("**")
+        elif tag == "a" and self.links:
+            target, start, href = self.links.pop()
+            if not "".join(target[start + 1 :]).strip():
+                del target[start:]  # icon-only link
+            elif href and not href.startswith(("data:", "javascript:")):
+                target.append(f"]({href})")
+            else:
+                target[start] = ""
+        elif tag in _HTML_BLOCK:
+            if self.cell is not None:
+                self.cell.append(" ")
+                return
+            self._flush()
+            if tag == "pre":
+                self.pre = max(self.pre - 1, 0)
+
+    def handle_data(self, data):
+        if not self.skip:
+            self._parts().append(data)
+
+    # Tables: rows of cells, emitted as one pipe table when the table closes
+    def _table_start(self, tag, anchor):
+        if tag == "table":
+            self._flush()
+            self.tables.append([])
+        elif tag == "tr":
+            self._end_row()
+            self.row, self.row_id, self.row_header = [], anchor, False
+        else:
+            self._end_cell()
+            if self.row is None:
+                self.row, self.row_id, self.row_header = [], "", False
+            self.cell = [f"{{#{anchor}}} "] if anchor else []
+            self.row_header = self.row_header or tag == "th"
+
+    def _end_cell(self):
+        if self.cell is not None and self.row is not None:
+            text = re.sub(r"\s+", " ", "".join(self.cell)).strip().replace("|", "\\|")
+            if self.row_id and not self.row:
+                text = f"{{#{self.row_id}}} {text}"
+            self.row.append(text)
+        self.cell = None
+
+    def _end_row(self):
+        self._end_cell()
+        if self.row and self.tables:
+            self.tables[-1].append((self.row, self.row_header))
+        self.row = None
+
+    def _table_end(self, tag):
+        if tag in ("td", "th"):
+            self._end_cell()
+        elif tag == "tr":
+            self._end_row()
+        elif self.tables:
+            self._end_row()
+            rows = self.tables.pop()
+            if rows:
+                width = max(len(cells) for cells, _ in rows)
+                for i, (cells, header) in enumerate(rows):
+                    self.lines.append("| " + " | ".join(cells + [""] * (width - len(cells))) + " |")
+                    if i == 0:
+                        self.lines.append("|" + "---|" * width)
+
+    def render(self, html: str) -> str:
+        self.feed(html)
+        self.close()
+        while self.tables:
+            self._table_end("table")
+        self._flush()
+        return "\n".join(self.lines)
+
+
+def render_html(text: str) -> str:
+    return _elide_data_uris(_HtmlToMarkdown().render(text))
+
+
+def _json_scalar(value) -> str:
+    if isinstance(value, str):
+        return value if value and "\n" not in value and value.strip() == value else json.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def _json_cell(value) -> str:
+    return _json_scalar(value).replace("|", "\\|")
+
+
+def _json_outline(value, key: str, depth: int, lines: list[str]):
+    pad = "  " * depth
+    label = f"{key}: " if key else ""
+    child = depth + 1 if key else depth
+    if isinstance(value, dict) and value:
+        if key:
+            lines.append(f"{pad}{key}:")
+        for k, v in value.items():
+            _json_outline(v, str(k), child, lines)
+    elif isinstance(value, list) and value:
+        if all(not isinstance(v, (dict, list)) for v in value):
+            lines.append(f"{pad}{label}[{', '.join(_json_scalar(v) for v in value)}]")
+        elif len(value) > 1 and all(isinstance(v, dict) for v in value):
+            _json_table(value, key, depth, lines)
+        else:
+            if key:
+                lines.append(f"{pad}{key}:")
+            for item in value:
+                lines.append(f"{'  ' * child}-")
+                _json_outline(item, "", child + 1, lines)
+    else:
+        lines.append(f"{pad}{label}{_json_scalar(value)}")
+
+
+def _json_table(rows: list[dict], key: str, depth: int, lines: list[str]):
+    """Array of objects as a pipe table; columns with one value in every row are stated once."""
+    pad = "  " * depth
+    columns = list(dict.fromkeys(k for row in rows for k in row))
+    missing = object()
+    constant = {c: rows[0][c] for c in columns
+                if all(row.get(c, missing) == rows[0].get(c, missing) for row in rows) and c in rows[0]}
+    varying = [c for c in columns if c not in constant]
+    shared = f"; every row: {', '.join(f'{c}={_json_scalar(v)}' for c, v in constant.items())}" if constant else ""
+    lines.append(f"{pad}{key + ': ' if key else ''}{len(rows)} items{shared}")
+    if varying:
+        lines.append(f"{pad}| " + " | ".join(varying) + " |")
+        lines.append(f"{pad}|" + "---|" * len(varying))
+        for row in rows:
+            lines.append(f"{pad}| " + " | ".join(_json_cell(row[c]) if c in row else "" for c in varying) + " |")
+
+
+def render_json(text: str) -> str | None:
+    """Outline of a JSON document, or None if it does not parse."""
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return None
+    lines: list[str] = []
+    _json_outline(data, "", 0, lines)
+    return "\n".join(lines)
+
+
+def render_css(text: str) -> str:
+    text = re.sub(r"/\*.*?\*/", "", text, flags=re.S)
+    text = re.sub(r"\s+", " ", text)
+    text = re.sub(r"\s*([{};,>])\s*", r"\1", text).replace(";}", "}")
+    text = re.sub(r"\s*:\s*(?=[^{}]*})", ":", text)  # declarations only; selector pseudo-classes untouched
+    return _elide_data_uris(text.replace("}", "}\n").strip())
+
+
+_JS_DECL = re.compile(
+    r"^(?:export\s+)?(?:default\s+)?(?:async\s+)?(?:function\*?\s+(\w+)|class\s+(\w+)|"
+    r"(?:const|let|var)\s+(\w+)\s*=)")
+
+
+def render_js(text: str, max_chars: int = READ_MAX_CHARS) -> str | None:
+    """Outline + source for a file too long to return whole (None otherwise: read it as is)."""
+    if len(text) <= max_chars:
+        return None
+    decls = []
+    for n, line in enumerate(text.splitlines(), 1):
+        m = _JS_DECL.match(line)
+        if m:
+            decls.append(f"{next(g for g in m.groups() if g)} (line {n})")
+    if not decls:
+        return None
+    return f"Top-level declarations ({len(decls)}): {', '.join(decls)}\n\n" + _elide_data_uris(text)
+
+
+# Files whose markup is the content (email/flow templates): never rendered
+_TEMPLATE_NAME = re.compile(r"template|email|powerautomate", re.I)
+
+_RENDERERS = {
+    ".html": render_html, ".htm": render_html,
+    ".json": render_json,
+    ".css": render_css,
+    ".js": render_js, ".mjs": render_js,
+}
+
+
+def render(path: str, text: str) -> tuple[str, bool]:
+    """(text for the model, whether it was rendered) for a file of the given path."""
+    renderer = _RENDERERS.get(os.path.splitext(path)[1].lower())
+    if renderer is None or _TEMPLATE_NAME.search(os.path.basename(path)):
+        return text, False
+    rendered = renderer(text)
+    if rendered is None:
+        return text, False
+    return rendered, True
+
+
 @tool
-def read_file(file_path: str) -> str:
+def read_file(file_path: str, raw: bool = False) -> str:
     """Read the full contents of a file in the NG911 project.
     Accepts absolute paths or paths relative to the project root.
     Use this to inspect scripts, Arcade rules, configuration files, or documentation.
-    Returns the complete file text (capped at 30 000 characters for safety).
+    HTML comes back as compact Markdown (element ids as {#id}), JSON as an outline
+    with tables, CSS minified, and long JS led by an outline of its declarations;
+    templates (Power Automate email .html) come back as-is. Set raw=True for the
+    exact source text, e.g. to quote markup, CSS classes or line numbers, and
+    ALWAYS when the user asks to see or show a file.
+    Returns the file text (capped at 30 000 characters for safety).
     """
     resolved = _safe_resolve(file_path)
     if not os.path.isfile(resolved):
         return f"Error: '{file_path}' is not a file or does not exist."
     try:
         with open(resolved, "r", encoding="utf-8", errors="replace") as f:
-            content = f.read(30_000)
-        if len(content) == 30_000:
-            content += "\n\n... [truncated at 30 000 characters]"
-        return content
+            content = f.read(READ_MAX_CHARS if raw else RENDER_MAX_BYTES)
+        note = ""
+        if not raw and len(content) < RENDER_MAX_BYTES:
+            rendered, changed = render(resolved, content)
+            if changed:
+                note = f"[Rendered for reading: {len(content):,} -> {len(rendered):,} chars. raw=True for the source.]\n\n"
+                content = rendered
+        if len(content) >= READ_MAX_CHARS:
+            content = content[:READ_MAX_CHARS] + "\n\n... [truncated at 30 000 characters]"
+        return note + content
     except Exception as exc:
         return f"Error reading file: {exc}"
 
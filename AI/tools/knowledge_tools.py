@@ -1,52 +1,75 @@
 """
-Improved knowledge-base search tool backed by ChromaDB.
+Improved knowledge-base search tool backed by ChromaDB (or the flat NumPy
+index with KB_BACKEND=flat, see database/retrieval.py).
 """
 
 import os
-from langchain_chroma import Chroma
 from langchain_core.tools import tool
-from core.llm_config import get_embeddings
+from database.compaction import compact_hits
+from database.partitions import route_filter
+from database.retrieval import open_store
 
 CHROMA_DB_DIR = os.getenv("CHROMA_DB_DIR", "./database/chroma_db")
+SEARCH_K = 4  # results per search (see benchmarks/bench_retrieval.py)
 
 
 def _get_vector_store():
-    if not os.path.exists(CHROMA_DB_DIR):
+    return open_store(CHROMA_DB_DIR)
+
+
+def search(query: str, category: str = "", detail: str = "snippets", k: int = SEARCH_K,
+           filter: dict | None = None) -> list[dict] | None:
+    """
+    Search and compact (database/compaction.py). Returns result dicts, or None
+    if the knowledge base has not been built. `filter` overrides `category`;
+    with neither, the query is routed to its categories (database/partitions.py).
+    """
+    store = _get_vector_store()
+    if store is None:
         return None
-    return Chroma(
-        persist_directory=CHROMA_DB_DIR,
-        embedding_function=get_embeddings(),
-    )
+    search_kwargs = {"k": k}
+    search_filter = filter or ({"category": category} if category else route_filter(query))
+    if search_filter:
+        search_kwargs["filter"] = search_filter
+    hits = store.similarity_search_with_relevance_scores(query, **search_kwargs)
+    return compact_hits(query, hits, detail="full" if detail == "full" else "snippets")
+
+
+def format_results(results: list[dict]) -> str:
+    out = []
+    for i, r in enumerate(results, 1):
+        tag = f" [{r['component']}]" if r["component"] else ""
+        # Structure metadata from database/chunkers.py (absent in older indexes)
+        where = f", {', '.join(r['symbols'])}" if r["symbols"] else ""
+        if r["start_line"]:
+            where += f", lines {r['start_line']}-{r['end_line']}"
+        if r["also_in"]:
+            more = f" +{len(r['also_in']) - 3} more" if len(r["also_in"]) > 3 else ""
+            where += f", also in {'; '.join(r['also_in'][:3])}{more}"
+        out.append(
+            f"--- Result {i} (Source: {r['source']}{tag}{where}, relevance {r['relevance']:.2f}) ---\n{r['text']}"
+        )
+    if any(r["snippet"] for r in results):
+        out.append("[Snippets only. Use detail=\"full\" or read_file on the source for complete text.]")
+    return "\n\n".join(out)
 
 
 @tool
-def search_knowledge_base(query: str, category: str = "") -> str:
+def search_knowledge_base(query: str, category: str = "", detail: str = "snippets") -> str:
     """Search the NG911 vector knowledge base for documentation, scripts, and rules.
     Use this for broad or ambiguous questions where you don't know which specific file to read.
     - query:    natural-language search query.
-    - category: optional filter — one of: attribute_rule, automation_script, documentation, web_app.
-                Leave empty to search everything.
-    Returns the top 6 most relevant chunks with source paths.
+    - category: optional filter — one of: attribute_rule, automation_script, documentation,
+                web_page (Documentation Hub pages), web_app (Hub JS/CSS source).
+                Leave empty to search whatever the query is about.
+    - detail:   "snippets" (default) returns only the lines matching the query;
+                "full" returns the whole matching chunks.
+    Returns up to 4 relevant results with source paths and line numbers. Weak matches
+    are dropped and neighbouring chunks of one file are merged.
     """
-    store = _get_vector_store()
-    if store is None:
+    results = search(query, category, detail)
+    if results is None:
         return "Error: Knowledge base not initialized. Run ingest.py first."
-
-    search_kwargs = {"k": 4}
-    if category:
-        search_kwargs["filter"] = {"category": category}
-
-    docs = store.similarity_search(query, **search_kwargs)
-
-    if not docs:
+    if not results:
         return "No relevant information found in the knowledge base."
-
-    results = []
-    for i, doc in enumerate(docs, 1):
-        src = doc.metadata.get("source", "Unknown")
-        comp = doc.metadata.get("component", "")
-        tag = f" [{comp}]" if comp else ""
-        results.append(
-            f"--- Result {i} (Source: {src}{tag}) ---\n{doc.page_content}"
-        )
-    return "\n\n".join(results)
+    return format_results(results)
@@ -3,12 +3,14 @@ Dynamic Navigation Context Tool.
 Scans the Web App's router.js and HTML partials at startup to build
 a live navigation map. No more hard-coded routes or field IDs.
 Rebuilds automatically when /api/reingest is called.
+In multi-worker mode workers load the map from a startup cache (core/snapshots.py).
 """
 
 import os
 import re
 import logging
 from langchain_core.tools import tool
+from core import snapshots
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +23,8 @@ _ROUTER_JS = os.path.join(_WEBAPP_DIR, "router.js")
 
 # Module-level cache — rebuilt by build_navigation_map()
 NAVIGATION_MAP: dict[str, dict] = {}
+_SNAPSHOT = "navigation_map"
+_snapshot_mtime: float | None = None  # mtime of the snapshot NAVIGATION_MAP came from
 
 
 def _humanize_route(route: str) -> str:
@@ -73,7 +77,7 @@ def build_navigation_map() -> dict[str, dict]:
     Populates both route-level entries (e.g., "schema guide" → schema-guide)
     and element-level entries (e.g., "st_pretyp" → schema-guide#field-St_PreTyp).
     """
-    global NAVIGATION_MAP
+    global NAVIGATION_MAP, _snapshot_mtime
     nav = {}
     routes = _scan_routes()
 
@@ -152,10 +156,34 @@ def build_navigation_map() -> dict[str, dict]:
                 }
 
     NAVIGATION_MAP = nav
+    _snapshot_mtime = snapshots.write_snapshot(_SNAPSHOT, nav)
     logger.info(f"Navigation map built: {len(nav)} entries from {len(routes)} routes")
     return nav
 
 
+def set_navigation_map(nav: dict[str, dict]):
+    """Replace the map with a prebuilt one (e.g. from a knowledge-base bundle) and publish it to workers."""
+    global NAVIGATION_MAP, _snapshot_mtime
+    NAVIGATION_MAP = nav
+    _snapshot_mtime = snapshots.write_snapshot(_SNAPSHOT, nav)
+    logger.info(f"Navigation map loaded: {len(nav)} entries")
+
+
+def refresh_from_snapshot() -> bool:
+    """Reload NAVIGATION_MAP if another worker published a newer snapshot."""
+    global NAVIGATION_MAP, _snapshot_mtime
+    if not snapshots.ENABLED:
+        return False
+    mtime = snapshots.snapshot_mtime(_SNAPSHOT)
+    if mtime is None or mtime == _snapshot_mtime:
+        return False
+    nav, mtime = snapshots.read_snapshot(_SNAPSHOT)
+    if nav is None:
+        return False
+    NAVIGATION_MAP, _snapshot_mtime = nav, mtime
+    return True
+
+
 @tool
 def get_navigation_target(topic: str) -> str:
     """Find the best web app page and element to navigate the user to for a given topic.
@@ -163,7 +191,8 @@ def get_navigation_target(topic: str) -> str:
     - topic: what the user wants to see (e.g., 'St_PreTyp', 'NGUID rule', 'GP tools', 'domains')
     Returns the navigation syntax to embed in your response.
     """
-    # Lazy-build on first call if map is empty
+    # Pick up rebuilds from other workers; lazy-build on first call if map is empty
+    refresh_from_snapshot()
     if not NAVIGATION_MAP:
         build_navigation_map()
 
@@ -192,18 +221,26 @@ def get_navigation_target(topic: str) -> str:
     )
 
 
-def _format_nav(entry: dict) -> str:
+def nav_syntax(entry: dict) -> str:
+    """The {{nav:route#element|Label}} button syntax for a NAVIGATION_MAP entry."""
     route = entry["route"]
     element = entry.get("element", "")
     label = entry.get("label", route)
+    target = f"{route}#{element}" if element else route
+    return f"{{{{nav:{target}|{label}}}}}"
+
+
+def _format_nav(entry: dict) -> str:
+    route = entry["route"]
+    element = entry.get("element", "")
+    syntax = nav_syntax(entry)
 
     if element:
-        syntax = f"{{{{nav:{route}#{element}|{label}}}}}"
         return f"Navigation target found.\nRoute: #{route}\nElement: #{element}\nUse this syntax in your response: {syntax}"
     else:
-        syntax = f"{{{{nav:{route}|{label}}}}}"
         return f"Navigation target found.\nRoute: #{route}\nUse this syntax in your response: {syntax}"
 
 
-# Build the map on module import
-build_navigation_map()
+# Build the map on module import (workers load the master's snapshot instead)
+if not (snapshots.is_reader() and refresh_from_snapshot()):
+    build_navigation_map()
@@ -0,0 +1,54 @@
+"""
+Symbol lookup tool backed by the symbol index ingest builds (database/symbols.py).
+Answers "show me X" / "where is X set" with just the definition, its file and
+line range: one call instead of search_codebase followed by a whole-file read_file.
+"""
+
+import os
+from langchain_core.tools import tool
+from database import symbols
+
+CHROMA_DB_DIR = os.getenv("CHROMA_DB_DIR", "./database/chroma_db")
+SYMBOL_MAX_DEFINITIONS = 3  # returned in full; further definitions of the name are listed
+SYMBOL_MAX_CHARS = 12_000   # per definition; a longer class is cut and its methods listed
+
+
+def _where(m: dict) -> str:
+    return f"{m['file']}, lines {m['start']}-{m['end']}"
+
+
+def format_lookup(index: dict, name: str, result: dict) -> str:
+    matches = result["matches"]
+    if not matches:
+        hint = f" Did you mean: {', '.join(result['suggestions'])}?" if result["suggestions"] else ""
+        return (f"No definition of '{name}' in the symbol index.{hint} "
+                "Use search_codebase for usages, or text that is not a definition.")
+    out = []
+    for m in matches[:SYMBOL_MAX_DEFINITIONS]:
+        text = m["text"]
+        if len(text) > SYMBOL_MAX_CHARS:
+            text = text[:SYMBOL_MAX_CHARS] + f"\n... [truncated at {SYMBOL_MAX_CHARS:,} characters]"
+            if m["kind"] == "class":
+                methods = symbols.members(index, m["name"], m["file"])
+                text += " Methods: " + ", ".join(
+                    f"{e['name'].split('.', 1)[1]} (lines {e['start']}-{e['end']})" for e in methods)
+        out.append(f"--- {m['name']} ({m['kind']}) in {_where(m)} ---\n{text}")
+    rest = matches[SYMBOL_MAX_DEFINITIONS:]
+    if rest:
+        out.append("Also defined: " + "; ".join(f"{m['name']} ({m['kind']}) in {_where(m)}" for m in rest)
+                   + ". Pass file= to pick one.")
+    return "\n\n".join(out)
+
+
+@tool
+def lookup_symbol(name: str, file: str = "") -> str:
+    """Show the exact source of a named function, class, method, module constant or Arcade variable.
+    Use this instead of search_codebase + read_file whenever you know the name,
+    e.g. "_build_qastatus_updates", "ADDRESS_DUP_MAX_ROWS", "sameValue", "SPA_Router.navigate".
+    - name: the symbol. Methods as Class.method or just the method name.
+    - file: optional part of a file path, to choose between definitions with the same name.
+    Returns each definition with its file and line range. Covers the Python scripts,
+    Arcade attribute rules and Web App JavaScript.
+    """
+    index = symbols.load_active(CHROMA_DB_DIR)
+    return format_lookup(index, name, symbols.lookup(index, name, file))
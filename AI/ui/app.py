@@ -1,16 +1,69 @@
-import streamlit as st
-import uuid
-import sys
+"""
+Streamlit chat UI: a thin SSE client of the API's /api/chat.
+
+The agent, checkpointer, caches and per-thread queueing all live in the API
+process (api.py), so this app imports none of them. A Streamlit session only
+holds its message list and an HTTP client.
+
+Run the API first, then:
+    streamlit run ui/app.py
+AI_API_URL points at the API (default http://localhost:8000). If WEB_APP_URL
+is set, {{nav:...}} buttons become links into the Documentation Hub.
+"""
+
+import json
 import os
-import time
+import re
+import uuid
+
+import httpx
+import streamlit as st
+
+AI_API_URL = os.getenv("AI_API_URL", "http://localhost:8000").rstrip("/")
+WEB_APP_URL = os.getenv("WEB_APP_URL", "").rstrip("/")
+CONTEXT_LIMIT = 32768  # num_ctx in core/llm_config.py
+REQUEST_TIMEOUT = httpx.Timeout(10.0, read=600.0)  # long gaps while the model thinks
+
+_NAV = re.compile(r"\{\{nav:([^|}]+)\|([^}]+)\}\}")
+_THINK = re.compile(r"<think>.*?(</think>|$)", re.S)
+
+
+@st.cache_resource
+def _client() -> httpx.Client:
+    # One connection pool per Streamlit server, shared by all sessions
+    return httpx.Client(timeout=REQUEST_TIMEOUT)
+
+
+def _render(text: str) -> str:
+    """Strip reasoning blocks and turn {{nav:route|Label}} into links (or bold labels)."""
+    text = _THINK.sub("", text)
+    if WEB_APP_URL:
+        return _NAV.sub(lambda m: f"[{m.group(2)}]({WEB_APP_URL}/#{m.group(1)})", text)
+    return _NAV.sub(lambda m: f"**{m.group(2)}**", text)
+
 
-CONTEXT_LIMIT = 65536
+def _stats_caption(stats: dict) -> str:
+    tokens = (f" | {stats['input_tokens']} in / {stats['output_tokens']} out ({stats['tokens_per_s']:.0f} tok/s)"
+              if stats.get("output_tokens") else "")
+    return (f"{stats['duration_s']:.1f}s | {stats['model']} ({stats['tier']}){tokens} | "
+            f"Tools: {', '.join(stats['tools']) or 'none'}")
 
-# Ensure the AI root is on the Python path
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from langchain_core.messages import HumanMessage, AIMessage, AIMessageChunk
-from agent import agent  # single ReAct agent
+def _sse_events(response: httpx.Response):
+    """Yield (event, data) pairs from a text/event-stream response."""
+    event, data = "message", []
+    for line in response.iter_lines():
+        if not line:
+            if data:
+                yield event, json.loads("\n".join(data))
+            event, data = "message", []
+        elif line.startswith("event:"):
+            event = line[6:].strip()
+        elif line.startswith("data:"):
+            data.append(line[5:].strip())
+    if data:
+        yield event, json.loads("\n".join(data))
+
 
 # ── Page Config ──────────────────────────────────────────────────────
 st.set_page_config(
@@ -31,20 +84,31 @@ This AI agent has **direct read access** to every file in the NG911 system and c
 """
 )
 
+# ── Session State ────────────────────────────────────────────────────
+if "messages" not in st.session_state:
+    st.session_state.messages = []  # {"role", "content", "stats"}
+if "thread_id" not in st.session_state:
+    st.session_state.thread_id = str(uuid.uuid4())
+if "context_used" not in st.session_state:
+    st.session_state.context_used = 0
+
 # ── Sidebar ──────────────────────────────────────────────────────────
 with st.sidebar:
     st.header("Session")
+    username = st.text_input("Username", value=os.getenv("USERNAME", "streamlit"))
+    thinking = st.toggle("Thinking", value=True)
     if st.button("Clear conversation"):
         st.session_state.messages = []
         st.session_state.thread_id = str(uuid.uuid4())
         st.session_state.context_used = 0
         st.rerun()
-    st.caption(f"Thread: `{st.session_state.get('thread_id', 'new')[:8]}...`")
+    st.caption(f"Thread: `{st.session_state.thread_id[:8]}...`")
+    st.caption(f"API: `{AI_API_URL}`")
 
     # -- Context Window Tracker --
     st.markdown("---")
     st.subheader("Context Window")
-    ctx_used = st.session_state.get("context_used", 0)
+    ctx_used = st.session_state.context_used
     ctx_pct = min(ctx_used / CONTEXT_LIMIT, 1.0) if CONTEXT_LIMIT > 0 else 0
 
     st.progress(ctx_pct)
@@ -58,103 +122,54 @@ with st.sidebar:
     elif ctx_pct >= 0.65:
         st.warning("Context usage is high. Consider clearing soon.")
 
-# ── Session State ────────────────────────────────────────────────────
-if "messages" not in st.session_state:
-    st.session_state.messages = []
-if "thread_id" not in st.session_state:
-    st.session_state.thread_id = str(uuid.uuid4())
-if "context_used" not in st.session_state:
-    st.session_state.context_used = 0
-
 # ── Render History ───────────────────────────────────────────────────
 for msg in st.session_state.messages:
-    role = "user" if isinstance(msg, HumanMessage) else "assistant"
-    with st.chat_message(role):
-        st.markdown(msg.content)
+    with st.chat_message(msg["role"]):
+        st.markdown(_render(msg["content"]))
+        if msg.get("stats"):
+            st.caption(_stats_caption(msg["stats"]))
 
-# ── Chat Input & Agent Execution ─────────────────────────────────────
+# ── Chat Input & Streaming ───────────────────────────────────────────
 if user_query := st.chat_input("Ask about the NG911 system…"):
     with st.chat_message("user"):
         st.markdown(user_query)
-    st.session_state.messages.append(HumanMessage(content=user_query))
+    st.session_state.messages.append({"role": "user", "content": user_query})
 
     with st.chat_message("assistant"):
         placeholder = st.empty()
         status_area = st.empty()
-
-        with st.spinner("Thinking…"):
-            try:
-                config = {
-                    "configurable": {"thread_id": st.session_state.thread_id}
-                }
-                full_response = ""
-                total_input = 0
-                total_output = 0
-                tools_called = []
-                start = time.time()
-
-                # Track which message IDs we already displayed
-                seen_ids = {
-                    m.id
-                    for m in st.session_state.messages
-                    if hasattr(m, "id") and m.id
-                }
-
-                for event in agent.stream(
-                    {"messages": [HumanMessage(content=user_query)]},
-                    config=config,
-                    stream_mode="messages",
-                ):
-                    msg = event[0]
-                    metadata = event[1]
-
-                    # Accumulate token metrics
-                    if hasattr(msg, "usage_metadata") and msg.usage_metadata:
-                        total_input += msg.usage_metadata.get("input_tokens", 0)
-                        total_output += msg.usage_metadata.get("output_tokens", 0)
-
-                    # Track tool calls for the status ribbon
-                    if hasattr(msg, "tool_calls") and msg.tool_calls:
-                        for tc in msg.tool_calls:
-                            name = tc.get("name", "")
-                            if name and name not in tools_called:
-                                tools_called.append(name)
-                                status_area.caption(
-                                    f"Using tool: {name}"
-                                )
-
-                    # Skip already-seen messages
-                    if getattr(msg, "id", None) in seen_ids:
-                        continue
-
-                    # Stream AI text (skip tool messages and internal routing)
-                    if msg.content and isinstance(msg, (AIMessage, AIMessageChunk)):
-                        if isinstance(msg, AIMessageChunk):
-                            full_response += msg.content
-                            placeholder.markdown(full_response + "▌")
-                        else:
-                            full_response = msg.content
-                            placeholder.markdown(full_response)
-
-                placeholder.markdown(full_response)
-
-                # Performance ribbon
-                duration = time.time() - start
-                tok_s = total_output / duration if duration > 0 else 0
-                st.caption(
-                    f"{duration:.1f}s | "
-                    f"qwen3.5:35b | "
-                    f"{total_input} in / {total_output} out ({tok_s:.0f} tok/s) | "
-                    f"Tools: {', '.join(tools_called) or 'none'}"
-                )
-
-                # Update context tracker
-                if total_input > 0:
-                    st.session_state.context_used = total_input
-
-                st.session_state.messages.append(AIMessage(content=full_response))
-
-            except Exception as exc:
-                st.error(f"Agent error: {exc}")
-                import traceback
-                st.code(traceback.format_exc())
+        full_response, stats = "", None
+        payload = {
+            "message": user_query,
+            "thread_id": st.session_state.thread_id,
+            "user_context": {"username": username or "anonymous"},
+            "thinking": thinking,
+            "client_message_id": str(uuid.uuid4()),
+        }
+
+        try:
+            with st.spinner("Thinking…"), _client().stream("POST", f"{AI_API_URL}/api/chat", json=payload) as response:
+                response.raise_for_status()
+                for event, data in _sse_events(response):
+                    if event == "message":
+                        full_response += data.get("chunk", "")
+                        placeholder.markdown(_render(full_response) + "▌")
+                    elif event == "tool":
+                        status_area.caption(f"Using tool: {data['tool']}")
+                    elif event == "queued":
+                        status_area.caption("Waiting for the previous message in this conversation…")
+                    elif event == "stats":
+                        stats = data
+                    elif event == "error":
+                        full_response += f"\n\n**Error:** {data['error']}"
+        except httpx.HTTPError as exc:
+            full_response += f"\n\n**Connection error:** could not reach the AI API at {AI_API_URL} ({exc})."
+
+        status_area.empty()
+        placeholder.markdown(_render(full_response))
+        if stats:
+            st.caption(_stats_caption(stats))
+            if stats.get("context_tokens"):
+                st.session_state.context_used = stats["context_tokens"]
+
+    st.session_state.messages.append({"role": "assistant", "content": full_response, "stats": stats})
@@ -18,9 +18,12 @@ document.addEventListener('DOMContentLoaded', () => {
 
     let isFullScreen = false;
     let isWaitingForResponse = false;
+    // Message whose answer has not arrived yet: { id, text, threadId }. A resend of the
+    // same text reuses the ID, so the backend attaches it to the original turn.
+    let pendingMessage = null;
     let aiHostUrl = null; // resolved once on first use
     let thinkingEnabled = true; // on by default for Qwen 3.5 35B
-    let pendingScreenshot = null; // base64 PNG or null
+    let pendingScreenshot = null; // image Blob (PNG capture or pasted file) or null
 
     // --- Session Management (persistent per user) ---
     const getUsername = () => {
@@ -176,7 +179,8 @@ document.addEventListener('DOMContentLoaded', () => {
                     return;
                 }
                 const canvas = await html2canvas(target, { scale: 0.5, useCORS: true, logging: false });
-                pendingScreenshot = canvas.toDataURL('image/png').split(',')[1];
+                // Kept as a Blob and sent as multipart (no Base64 inflation); the backend downsizes it
+                pendingScreenshot = await new Promise(resolve => canvas.toBlob(resolve, 'image/png'));
                 btnScreenshot.classList.add('ai-screenshot-active');
                 if (ssLabel) ssLabel.textContent = 'Attached';
                 btnScreenshot.title = 'Screenshot attached (click to remove)';
@@ -194,16 +198,11 @@ document.addEventListener('DOMContentLoaded', () => {
         for (const item of items) {
             if (item.type.startsWith('image/')) {
                 e.preventDefault();
-                const blob = item.getAsFile();
-                const reader = new FileReader();
-                reader.onloadend = () => {
-                    pendingScreenshot = reader.result.split(',')[1];
-                    if (btnScreenshot) {
-                        btnScreenshot.classList.add('ai-screenshot-active');
-                        btnScreenshot.title = 'Screenshot attached (click to remove)';
-                    }
-                };
-                reader.readAsDataURL(blob);
+                pendingScreenshot = item.getAsFile();
+                if (btnScreenshot) {
+                    btnScreenshot.classList.add('ai-screenshot-active');
+                    btnScreenshot.title = 'Screenshot attached (click to remove)';
+                }
                 break;
             }
         }
@@ -343,6 +342,34 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     };
 
+    // Prepends the previous transcript page above the oldest rendered message
+    const addLoadEarlierButton = (url, threadId, cursor) => {
+        if (cursor == null) return;
+        const btn = document.createElement('button');
+        btn.className = 'ai-load-earlier';
+        btn.textContent = 'Load earlier messages';
+        btn.addEventListener('click', async () => {
+            btn.disabled = true;
+            try {
+                const res = await fetch(`${url}/api/conversations/${threadId}?before=${cursor}`);
+                if (!res.ok) throw new Error("API returned status " + res.status);
+                const data = await res.json();
+                const anchor = btn.nextSibling;
+                for (const msg of data.messages) {
+                    const div = appendMessage(msg.role === 'user' ? 'user' : 'assistant', msg.content);
+                    messagesContainer.insertBefore(div, anchor);
+                }
+                btn.remove();
+                messagesContainer.scrollTop = 0;
+                addLoadEarlierButton(url, threadId, data.next_cursor);
+            } catch (e) {
+                console.error("Failed to load earlier messages:", e);
+                btn.disabled = false;
+            }
+        });
+        messagesContainer.insertBefore(btn, messagesContainer.firstChild);
+    };
+
     const loadConversation = async (threadId) => {
         const url = await resolveHostUrl();
         try {
@@ -354,11 +381,12 @@ document.addEventListener('DOMContentLoaded', () => {
             sessionId = threadId;
             localStorage.setItem(getSessionKey(), threadId);
 
-            // Clear and re-render messages
+            // Clear and re-render messages (the newest page; older pages load on demand)
             messagesContainer.innerHTML = '';
             for (const msg of data.messages) {
                 appendMessage(msg.role === 'user' ? 'user' : 'assistant', msg.content);
             }
+            addLoadEarlierButton(url, threadId, data.next_cursor);
 
             // Close sidebar
             historySidebar.classList.remove('open');
@@ -450,20 +478,39 @@ document.addEventListener('DOMContentLoaded', () => {
         let accumulatedText = "";
         let thinkingCleared = false;
 
+        // Same ID when retrying a message that never got its answer; new after a completed turn
+        const isRetry = pendingMessage && pendingMessage.text === text && pendingMessage.threadId === sessionId;
+        const clientMessageId = isRetry
+            ? pendingMessage.id
+            : (window.crypto && crypto.randomUUID)
+                ? crypto.randomUUID()
+                : `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+        pendingMessage = { id: clientMessageId, text, threadId: sessionId };
+
         try {
             const url = await resolveHostUrl();
 
-            const response = await fetch(`${url}/api/chat`, {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({
-                    message: text,
-                    thread_id: sessionId,
-                    user_context: getUserContext(),
-                    screenshot: pendingScreenshot,
-                    thinking: thinkingEnabled
-                })
-            });
+            const payload = {
+                message: text,
+                thread_id: sessionId,
+                user_context: getUserContext(),
+                thinking: thinkingEnabled,
+                client_message_id: clientMessageId
+            };
+            let response;
+            if (pendingScreenshot) {
+                // Multipart upload: raw image bytes instead of a Base64 string inside JSON
+                const form = new FormData();
+                form.append('payload', JSON.stringify(payload));
+                form.append('screenshot', pendingScreenshot, 'screenshot.png');
+                response = await fetch(`${url}/api/chat/upload`, { method: 'POST', body: form });
+            } else {
+                response = await fetch(`${url}/api/chat`, {
+                    method: 'POST',
+                    headers: { 'Content-Type': 'application/json' },
+                    body: JSON.stringify(payload)
+                });
+            }
 
             // Clear screenshot after sending
             pendingScreenshot = null;
@@ -520,11 +567,19 @@ document.addEventListener('DOMContentLoaded', () => {
                             const data = JSON.parse(dataStr);
                             toolRibbon.style.display = "block";
                             toolRibbon.innerHTML = `<i class="fas fa-cog fa-spin"></i> Using tool: <code>${data.tool}</code>`;
+                        } else if (currentEvent === 'queued') {
+                            toolRibbon.style.display = "block";
+                            toolRibbon.innerHTML = '<i class="fas fa-hourglass-half"></i> Queued: waiting for the previous message in this conversation to finish';
+                        } else if (currentEvent === 'duplicate') {
+                            // Already sent: the events that follow are the original turn's answer
+                            toolRibbon.style.display = "block";
+                            toolRibbon.innerHTML = '<i class="fas fa-link"></i> Already sent: showing the answer to the earlier send';
                         } else if (currentEvent === 'error') {
                             const data = JSON.parse(dataStr);
                             accumulatedText += "\n\n**Error:** " + data.error;
                             responseDiv.innerHTML = marked.parse(accumulatedText);
                         } else if (currentEvent === 'done') {
+                            pendingMessage = null;
                             toolRibbon.style.display = "none";
                             processNavigationCommands(responseDiv);
                             wrapTables(responseDiv);
@@ -533,8 +588,10 @@ document.addEventListener('DOMContentLoaded', () => {
                 }
             }
         } catch (error) {
-            accumulatedText += "\n\n**Connection Error:** Could not reach the AI backend.";
+            accumulatedText += "\n\n**Connection Error:** Could not reach the AI backend. Send the message again to retry.";
             responseDiv.innerHTML = marked.parse(accumulatedText);
+            // Put the message back so a resend carries the same ID
+            if (!inputField.value) inputField.value = text;
         } finally {
             isWaitingForResponse = false;
             toolRibbon.style.display = "none";